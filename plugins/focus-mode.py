@@ -2,6 +2,11 @@ def run(args):
     """Display high-priority incomplete tasks from both Node.js and Python versions."""
     import json
     import os
+    import sys
+
+    # Stream the task files instead of loading them whole; they can be huge
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from python_ver.storage import iter_json_array
 
     # Check both Node.js and Python task files
     node_file = "todos.json"
@@ -15,15 +20,15 @@ def run(args):
     # Check Node.js tasks
     if os.path.exists(node_file):
         try:
+            # Filter for high-priority, incomplete tasks while reading
             with open(node_file, "r") as f:
-                node_tasks = json.load(f)
-
-            # Filter for high-priority, incomplete tasks
-            high_priority_node = [
-                task
-                for task in node_tasks
-                if task.get("priority") == "High" and not task.get("completed", False)
-            ]
+                high_priority_node = [
+                    task
+                    for task in iter_json_array(f)
+                    if isinstance(task, dict)
+                    and task.get("priority") == "High"
+                    and not task.get("completed", False)
+                ]
 
             if high_priority_node:
                 print("\n📋 Node.js Tasks:")
@@ -41,15 +46,15 @@ def run(args):
     # Check Python tasks
     if os.path.exists(python_file):
         try:
+            # Filter for high-priority, incomplete tasks while reading
             with open(python_file, "r") as f:
-                python_tasks = json.load(f)
-
-            # Filter for high-priority, incomplete tasks
-            high_priority_python = [
-                task
-                for task in python_tasks
-                if task.get("priority") == "High" and not task.get("completed", False)
-            ]
+                high_priority_python = [
+                    task
+                    for task in iter_json_array(f)
+                    if isinstance(task, dict)
+                    and task.get("priority") == "High"
+                    and not task.get("completed", False)
+                ]
 
             if high_priority_python:
                 print("\n🐍 Python Tasks:")
@@ -1,77 +1,281 @@
+"""
+Google Calendar sync for the CLI Todo App.
+
+The credentials and the API client are set up once per process and reused for
+every call. Events are created through the API's batch endpoint (up to
+BATCH_SIZE inserts per HTTP request, a few batches in flight at once), and
+``fetch_calendar_changes()`` uses sync tokens so that after the first call only
+events changed since the previous one are downloaded.
+
+Every event is sent with a client-generated id, so retrying an insert whose
+response was lost (a server error or a dropped connection) can't create it
+twice: the server answers the retry with 409 Conflict and the existing event
+is fetched instead.
+
+Set TODO_GCAL_API_URL to talk to another server than Google's, such as the
+local fake calendar server in tests (see python_ver/tests/fake_calendar.py).
+"""
+
 from __future__ import print_function
 import datetime
+import json
 import os.path
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 
 # If modifying scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+API_URL = os.environ.get("TODO_GCAL_API_URL", "https://www.googleapis.com/")
+TOKEN_FILE = "token.json"
+# Sync token of every calendar, for incremental fetches
+SYNC_STATE_FILE = "calendar_sync.json"
+
+# The Calendar API accepts at most 50 requests in one batch
+BATCH_SIZE = 50
+MAX_CONCURRENT_BATCHES = 4
+# Inserts that failed with these statuses (rate limits, server errors) are retried
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRIES = 3
+# Seconds before the first retry, doubled for each later one
+RETRY_DELAY = 0.5
+# Errors of a whole batch request that never got an answer (socket errors and
+# timeouts are OSErrors); its inserts are retried like a 503
+TRANSPORT_ERRORS = (OSError, httplib2.HttpLib2Error)
+
+_creds = None
+_creds_lock = threading.Lock()
+
 def authenticate_google():
-    """Handles authentication with Google Calendar API."""
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials.json", SCOPES
-            )
-            creds = flow.run_local_server(port=0)
-        
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
-    return creds
+    """Handles authentication with Google Calendar API (once per process)."""
+    global _creds
+    with _creds_lock:
+        creds = _creds
+        if creds is None and os.path.exists(TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
 
-def add_to_calendar(task_name, due_date_obj):
-    """Adds a task to the Google Calendar as an all-day event."""
-    try:
-        creds = authenticate_google()
-        service = build("calendar", "v3", credentials=creds)
-
-        event = {
-            "summary": task_name,
-            "description": "Task added from CLI Todo App",
-            "start": {
-                "date": due_date_obj.isoformat(),
-            },
-            "end": {
-                "date": due_date_obj.isoformat(),
-            },
-        }
-
-        created_event = service.events().insert(calendarId="primary", body=event).execute()
-        print(f"✅ Event created: {created_event.get('htmlLink')}")
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    "credentials.json", SCOPES
+                )
+                creds = flow.run_local_server(port=0)
 
-    except HttpError as error:
-        raise Exception(f"An API error occurred: {error}")
-    except Exception as e:
-        raise e
+            with open(TOKEN_FILE, "w") as token:
+                token.write(creds.to_json())
+        _creds = creds
+        return creds
 
-def fetch_upcoming_events(max_results=10):
-    """Fetches the next N upcoming events from the primary calendar."""
-    try:
-        creds = authenticate_google()
-        service = build("calendar", "v3", credentials=creds)
+class CalendarSync:
+    """
+    Calendar API client that is built once and shared by all calls.
+
+    ``credentials`` default to authenticate_google(); ``api_url`` to
+    TODO_GCAL_API_URL or Google's API.
+    """
+
+    def __init__(self, credentials=None, api_url=None, calendar_id="primary",
+                 batch_size=BATCH_SIZE, max_workers=MAX_CONCURRENT_BATCHES, state_file=SYNC_STATE_FILE):
+        self._credentials = credentials
+        self.api_url = (api_url or API_URL).rstrip("/") + "/"
+        self.calendar_id = calendar_id
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.state_file = state_file
+        self._service = None
+        self._service_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def credentials(self):
+        if self._credentials is None:
+            self._credentials = authenticate_google()
+        return self._credentials
+
+    @property
+    def service(self):
+        """The Calendar API client, built on first use (from the bundled discovery document)."""
+        with self._service_lock:
+            if self._service is None:
+                self._service = build("calendar", "v3", http=self._http(), static_discovery=True,
+                                      client_options={"api_endpoint": self.api_url + "calendar/v3/"})
+            return self._service
+
+    def _http(self):
+        # httplib2 connections can't be shared between threads, so every
+        # thread gets its own (kept open and reused for its later requests)
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def insert_events(self, events):
+        """
+        Create ``events`` (event bodies) and return, in the same order, the
+        created event or the error (an HttpError, or one of TRANSPORT_ERRORS)
+        that creating it failed with.
+        """
+        events = [event if event.get("id") else dict(event, id=uuid.uuid4().hex) for event in events]
+        events_api = self.service.events()
+        results = [None] * len(events)
+        pending = list(range(len(events)))
+        for attempt in range(RETRIES + 1):
+            self._run_batches(pending, lambda index: events_api.insert(calendarId=self.calendar_id,
+                                                                       body=events[index]), results)
+            if attempt:
+                # A conflict on a retry means an earlier attempt did create the event
+                created = [i for i in pending if _status(results[i]) == 409]
+                self._run_batches(created, lambda index: events_api.get(calendarId=self.calendar_id,
+                                                                        eventId=events[index]["id"]), results)
+            pending = [i for i in pending if _retryable(results[i])]
+            if not pending or attempt == RETRIES:
+                break
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+        return results
+
+    def _run_batches(self, indexes, make_request, results):
+        """Send the requests for ``indexes`` in batches and store their outcome in ``results``."""
+        chunks = [indexes[i:i + self.batch_size] for i in range(0, len(indexes), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for outcome in pool.map(lambda chunk: self._batch(chunk, make_request), chunks):
+                for index, result in outcome.items():
+                    results[index] = result
 
+    def _batch(self, indexes, make_request):
+        """Send one batch of requests; returns {index: response or error}."""
+        outcome = {}
+
+        def collect(request_id, response, exception):
+            outcome[int(request_id)] = exception if exception is not None else response
+
+        # new_batch_http_request() always targets Google, whatever api_url is
+        batch = BatchHttpRequest(callback=collect, batch_uri=self.api_url + "batch/calendar/v3")
+        for index in indexes:
+            batch.add(make_request(index), request_id=str(index))
+        try:
+            batch.execute(http=self._http())
+        except (HttpError,) + TRANSPORT_ERRORS as error:
+            return {index: error for index in indexes}
+        return outcome
+
+    def fetch_changes(self):
+        """
+        Events created, changed or deleted (status "cancelled") since the last
+        call. The first call, or one after the server expired the sync token,
+        returns every event.
+        """
+        state = self._load_state()
+        try:
+            events, sync_token = self._list_events(state.get(self.calendar_id))
+        except HttpError as error:
+            if error.resp.status != 410:
+                raise
+            # 410 Gone: the sync token is no longer valid, start over
+            events, sync_token = self._list_events(None)
+        state[self.calendar_id] = sync_token
+        self._save_state(state)
+        return events
+
+    def _list_events(self, sync_token):
+        """All pages of an events listing; returns (events, next sync token)."""
+        events, page_token = [], None
+        while True:
+            page = self.service.events().list(
+                calendarId=self.calendar_id, syncToken=sync_token, pageToken=page_token,
+                singleEvents=True, maxResults=2500,
+            ).execute(http=self._http())
+            events.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return events, page.get("nextSyncToken")
+
+    def fetch_upcoming(self, max_results=10):
         now = datetime.datetime.utcnow().isoformat() + 'Z'  # 'Z' indicates UTC time
-        
-        events_result = service.events().list(
-            calendarId='primary', 
+        events_result = self.service.events().list(
+            calendarId=self.calendar_id,
             timeMin=now,
-            maxResults=max_results, 
+            maxResults=max_results,
             singleEvents=True,
             orderBy='startTime'
-        ).execute()
-        
+        ).execute(http=self._http())
         return events_result.get('items', [])
 
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        with open(self.state_file, "w") as f:
+            json.dump(state, f)
+
+def _status(result):
+    """HTTP status of a failed request, or None."""
+    return result.resp.status if isinstance(result, HttpError) else None
+
+def _retryable(result):
+    return _status(result) in RETRY_STATUSES or isinstance(result, TRANSPORT_ERRORS)
+
+_sync = None
+
+def get_calendar_sync():
+    """The CalendarSync shared by the functions below."""
+    global _sync
+    if _sync is None:
+        _sync = CalendarSync()
+    return _sync
+
+def task_event(task_name, due_date_obj):
+    """All-day event body for a task due on ``due_date_obj``."""
+    return {
+        "summary": task_name,
+        "description": "Task added from CLI Todo App",
+        "start": {
+            "date": due_date_obj.isoformat(),
+        },
+        "end": {
+            "date": due_date_obj.isoformat(),
+        },
+    }
+
+def add_to_calendar(task_name, due_date_obj):
+    """Adds a task to the Google Calendar as an all-day event."""
+    created_event = get_calendar_sync().insert_events([task_event(task_name, due_date_obj)])[0]
+    if isinstance(created_event, Exception):
+        raise Exception(f"An API error occurred: {created_event}")
+    print(f"✅ Event created: {created_event.get('htmlLink')}")
+
+def add_tasks_to_calendar(tasks):
+    """
+    Adds many tasks at once, given as (task_name, due_date_obj) pairs.
+
+    Returns the created event or the error for each task, in order.
+    """
+    return get_calendar_sync().insert_events([task_event(name, due) for name, due in tasks])
+
+def fetch_upcoming_events(max_results=10):
+    """Fetches the next N upcoming events from the primary calendar."""
+    try:
+        return get_calendar_sync().fetch_upcoming(max_results)
     except HttpError as error:
         print(f'An error occurred while fetching events: {error}')
-        return None
\ No newline at end of file
+        return None
+
+def fetch_calendar_changes():
+    """Events changed since the previous call (all events the first time)."""
+    return get_calendar_sync().fetch_changes()
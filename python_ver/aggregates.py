@@ -0,0 +1,116 @@
+"""
+Running totals over a task list: counts by status, priority and tag, plus the
+number of dependency edges.
+
+The TaskList keeps one of these up to date as tasks are added, changed and
+removed, so progress bars and ``stats`` never rescan the task bodies. Storage
+backends persist the record next to the tasks, which lets ``stats`` answer
+without loading the task list at all.
+"""
+
+from collections import Counter
+
+
+def aggregate_fields(task):
+    """The parts of a task the aggregates depend on."""
+    return (bool(task.get('completed', False)), task.get('priority', 'Medium'), tuple(task.get('tags', [])),
+            len(task.get('depends_on', [])))
+
+
+class Aggregates:
+    """Counts by status, priority and tag."""
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.dependencies = 0
+        self.pending_by_priority = Counter()
+        self.completed_by_priority = Counter()
+        self.tags = Counter()
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Compute the aggregates from scratch."""
+        aggregates = cls()
+        for task in tasks:
+            aggregates.add(task)
+        return aggregates
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        aggregates.total = data['total']
+        aggregates.completed = data['completed']
+        aggregates.dependencies = data['dependencies']
+        aggregates.pending_by_priority = Counter(data['pending_by_priority'])
+        aggregates.completed_by_priority = Counter(data['completed_by_priority'])
+        aggregates.tags = Counter(data['tags'])
+        return aggregates
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'dependencies': self.dependencies,
+            'pending_by_priority': dict(self.pending_by_priority),
+            'completed_by_priority': dict(self.completed_by_priority),
+            'tags': dict(self.tags),
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, Aggregates) and self.to_dict() == other.to_dict()
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    def add(self, task):
+        self._apply(aggregate_fields(task), 1)
+
+    def remove(self, task):
+        self._apply(aggregate_fields(task), -1)
+
+    def replace(self, old_fields, task):
+        """Account for a task whose fields were ``old_fields`` before an update."""
+        new_fields = aggregate_fields(task)
+        if new_fields != old_fields:
+            self._apply(old_fields, -1)
+            self._apply(new_fields, 1)
+
+    def merge(self, other):
+        """Add the counts of another set of tasks (``other``) to these."""
+        self.total += other.total
+        self.completed += other.completed
+        self.dependencies += other.dependencies
+        self.pending_by_priority.update(other.pending_by_priority)
+        self.completed_by_priority.update(other.completed_by_priority)
+        self.tags.update(other.tags)
+
+    def differences(self, other):
+        """Human-readable list of the counts that differ from ``other``."""
+        mine, theirs = self.to_dict(), other.to_dict()
+        diffs = []
+        for key in mine:
+            if isinstance(mine[key], dict):
+                for name in sorted(set(mine[key]) | set(theirs[key])):
+                    if mine[key].get(name, 0) != theirs[key].get(name, 0):
+                        diffs.append(f"{key}[{name}]: {mine[key].get(name, 0)} != {theirs[key].get(name, 0)}")
+            elif mine[key] != theirs[key]:
+                diffs.append(f"{key}: {mine[key]} != {theirs[key]}")
+        return diffs
+
+    def _apply(self, fields, delta):
+        completed, priority, tags, dependencies = fields
+        self.total += delta
+        self.dependencies += delta * dependencies
+        if completed:
+            self.completed += delta
+        _bump(self.completed_by_priority if completed else self.pending_by_priority, priority, delta)
+        for tag in tags:
+            _bump(self.tags, tag, delta)
+
+
+def _bump(counter, key, delta):
+    counter[key] += delta
+    if counter[key] == 0:
+        del counter[key]
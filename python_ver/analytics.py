@@ -0,0 +1,263 @@
+"""
+Columnar analytics for ``stats --by week|tag|priority``.
+
+The tasks are turned into NumPy columns once: completion status, priority
+codes, created/completed timestamps (seconds, NaN when unknown) and the tags
+as a sparse task x tag matrix in CSR form (``tag_offsets`` into ``tag_ids``).
+Every report is then a handful of vectorised operations over those arrays.
+
+Building the columns means reading every task, so they are cached in a
+``.columns.npz`` file next to the task data, keyed on the storage revision;
+reports on an unchanged list only load the arrays.
+
+NumPy is optional: ``available()`` tells whether these reports can run.
+"""
+
+import importlib
+import json
+import os
+from array import array
+from datetime import datetime, timedelta
+
+# Bumped whenever the layout of the cached columns changes
+CACHE_VERSION = 1
+
+PRIORITIES = ['High', 'Medium', 'Low', 'Other']
+_PRIORITY_CODES = {'High': 0, 'Medium': 1, 'Low': 2}
+_OTHER = 3
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY = 86400.0
+_WEEK = 7 * _DAY
+# 1970-01-01 was a Thursday; weeks start on the Monday before it
+_WEEK_OFFSET = 3 * _DAY
+
+_np = None
+
+
+def available():
+    """Import NumPy on first use; False if it isn't installed."""
+    global _np
+    if _np is None:
+        try:
+            _np = importlib.import_module('numpy')
+        except ImportError:
+            _np = False
+    return bool(_np)
+
+
+def _seconds(value):
+    """Seconds since the naive epoch for an ISO timestamp, NaN if there isn't one."""
+    if not isinstance(value, str):
+        return float('nan')
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return float('nan')
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return (moment - _EPOCH).total_seconds()
+
+
+class Columns:
+    """Task fields as parallel NumPy arrays (one entry per task)."""
+
+    FIELDS = ('completed', 'priority', 'created', 'completed_at', 'tag_offsets', 'tag_ids')
+
+    def __init__(self, completed, priority, created, completed_at, tag_offsets, tag_ids, tag_names):
+        self.completed = completed
+        self.priority = priority
+        self.created = created
+        self.completed_at = completed_at
+        self.tag_offsets = tag_offsets
+        self.tag_ids = tag_ids
+        self.tag_names = tag_names
+
+    def __len__(self):
+        return len(self.completed)
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Build the columns from task records in a single pass."""
+        completed, priority = array('b'), array('b')
+        created, completed_at = array('d'), array('d')
+        tag_offsets, tag_ids = array('q', [0]), array('l')
+        tag_index = {}
+        for task in tasks:
+            completed.append(bool(task.get('completed', False)))
+            priority.append(_PRIORITY_CODES.get(task.get('priority', 'Medium'), _OTHER))
+            created.append(_seconds(task.get('created_at')))
+            completed_at.append(_seconds(task.get('completed_at')))
+            for tag in task.get('tags', ()):
+                tag_id = tag_index.get(tag)
+                if tag_id is None:
+                    tag_id = tag_index[tag] = len(tag_index)
+                tag_ids.append(tag_id)
+            tag_offsets.append(len(tag_ids))
+
+        np = _np
+        return cls(
+            np.frombuffer(completed, dtype=np.int8).astype(bool),
+            np.frombuffer(priority, dtype=np.int8).copy(),
+            np.frombuffer(created, dtype=np.float64).copy(),
+            np.frombuffer(completed_at, dtype=np.float64).copy(),
+            np.frombuffer(tag_offsets, dtype=np.int64).copy(),
+            np.array(tag_ids, dtype=np.int32),
+            list(tag_index),
+        )
+
+    @classmethod
+    def load(cls, path, revision):
+        """Cached columns for ``revision`` of the data, or None."""
+        try:
+            with _np.load(path, allow_pickle=False) as data:
+                if (int(data['version']) != CACHE_VERSION
+                        or json.loads(str(data['revision'])) != revision):
+                    return None
+                return cls(*(data[field] for field in cls.FIELDS), data['tag_names'].tolist())
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path, revision):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                _np.savez(f, version=CACHE_VERSION, revision=json.dumps(revision),
+                          tag_names=_np.array(self.tag_names, dtype=str),
+                          **{field: getattr(self, field) for field in self.FIELDS})
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def tag_rows(self):
+        """Task index of every entry in ``tag_ids``."""
+        return _np.repeat(_np.arange(len(self), dtype=_np.int64), _np.diff(self.tag_offsets))
+
+
+def load_columns(revision, tasks, cache_path):
+    """
+    Columns for the tasks at ``revision`` of the data (see the storage
+    backends), from the cache when it was built for that revision.
+
+    ``tasks`` is called to get the task records when the cache has to be
+    rebuilt.
+    """
+    columns = Columns.load(cache_path, revision)
+    if columns is None:
+        columns = Columns.from_tasks(tasks())
+        try:
+            columns.save(cache_path, revision)
+        except OSError:
+            pass  # only a cache; the report still works without it
+    return columns
+
+
+def weekly_report(columns, weeks=12):
+    """
+    Rows of (week start, created, completed, share of that week's tasks done)
+    for the last ``weeks`` weeks that saw any activity.
+    """
+    np = _np
+    created_week = _week_index(columns.created)
+    completed_week = _week_index(columns.completed_at)
+    known = created_week[created_week >= 0]
+    done = completed_week[completed_week >= 0]
+    if not len(known) and not len(done):
+        return []
+
+    active = np.union1d(known, done)[-weeks:]
+    first = active[0]
+    created_counts = np.bincount(known[known >= first] - first, minlength=active[-1] - first + 1)
+    completed_counts = np.bincount(done[done >= first] - first, minlength=active[-1] - first + 1)
+    finished = (created_week >= first) & columns.completed
+    finished_counts = np.bincount(created_week[finished] - first, minlength=active[-1] - first + 1)
+
+    rows = []
+    for week in active:
+        slot = week - first
+        created = int(created_counts[slot])
+        rate = finished_counts[slot] / created * 100 if created else None
+        start = _EPOCH + timedelta(seconds=float(week * _WEEK - _WEEK_OFFSET))
+        rows.append((start.date(), created, int(completed_counts[slot]), rate))
+    return rows
+
+
+def tag_report(columns, limit=10):
+    """
+    (tag rows, pair rows): per tag (name, tasks, completion %) for the most used
+    tags, and (tag, tag, tasks with both) for the most frequent pairs.
+    """
+    np = _np
+    if not len(columns.tag_ids):
+        return [], []
+    rows_of = columns.tag_rows()
+    counts = np.bincount(columns.tag_ids, minlength=len(columns.tag_names))
+    completed = np.bincount(columns.tag_ids, weights=columns.completed[rows_of],
+                            minlength=len(columns.tag_names))
+    top = np.argsort(-counts, kind='stable')[:limit]
+    tags = [(columns.tag_names[tag], int(counts[tag]), completed[tag] / counts[tag] * 100) for tag in top]
+
+    # Co-occurrence: pair every tag with each later tag on the same task
+    ends = columns.tag_offsets[1:][rows_of]
+    positions = np.arange(len(columns.tag_ids))
+    firsts, seconds = [], []
+    distance = 1
+    while True:
+        paired = positions[positions + distance < ends]
+        if not len(paired):
+            break
+        firsts.append(columns.tag_ids[paired])
+        seconds.append(columns.tag_ids[paired + distance])
+        distance += 1
+    if not firsts:
+        return tags, []
+    a, b = np.concatenate(firsts).astype(np.int64), np.concatenate(seconds).astype(np.int64)
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    keep = low != high
+    pairs, pair_counts = np.unique(low[keep] * len(columns.tag_names) + high[keep], return_counts=True)
+    order = np.argsort(-pair_counts, kind='stable')[:limit]
+    names = columns.tag_names
+    return tags, [(*sorted((names[pairs[i] // len(names)], names[pairs[i] % len(names)])), int(pair_counts[i]))
+                  for i in order]
+
+
+def priority_report(columns):
+    """Rows of (priority, tasks, completed, completion %, median seconds to complete or None)."""
+    np = _np
+    durations = columns.completed_at - columns.created
+    timed = columns.completed & ~np.isnan(durations) & (durations >= 0)
+    totals = np.bincount(columns.priority, minlength=len(PRIORITIES))
+    completed = np.bincount(columns.priority, weights=columns.completed, minlength=len(PRIORITIES))
+    rows = []
+    for code, name in enumerate(PRIORITIES):
+        if code == _OTHER and not totals[code]:
+            continue
+        total = int(totals[code])
+        selected = durations[timed & (columns.priority == code)]
+        median = float(np.median(selected)) if len(selected) else None
+        rows.append((name, total, int(completed[code]), completed[code] / total * 100 if total else None, median))
+    return rows
+
+
+def _week_index(seconds):
+    """Monday-based week number of each timestamp; -1 where it is unknown."""
+    np = _np
+    weeks = np.full(len(seconds), -1, dtype=np.int64)
+    known = ~np.isnan(seconds)
+    weeks[known] = np.floor((seconds[known] + _WEEK_OFFSET) / _WEEK).astype(np.int64)
+    return weeks
+
+
+def format_duration(seconds):
+    """Short human form of a duration: '3d 4h', '5h 12m', '12m'."""
+    if seconds is None:
+        return '-'
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
@@ -0,0 +1,164 @@
+"""
+Archive of completed tasks in compressed, append-only segment files.
+
+``archive`` moves tasks completed more than ARCHIVE_AFTER_DAYS days ago out of
+the task list, so loading, listing and saving only ever handle the recent
+tasks. Each run writes one new segment into a folder next to the task data
+(``tasks.json.archive/``, or ``tasks.db.archive/``):
+
+    segment-000001.ndjson.gz   the tasks, one JSON object per line (gzip, or
+                               zstd as ``.ndjson.zst`` when the zstandard
+                               package is installed)
+    manifest.json              every segment with its task count, completion
+                               dates and counts (see aggregates.py)
+
+Segments are never changed once written. The manifest lets ``stats
+--include-archive`` add the archived counts without opening a segment;
+``search --include-archive`` and the detailed reports stream the segments.
+"""
+
+import importlib
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .aggregates import Aggregates
+
+ARCHIVE_AFTER_DAYS = 90
+
+COMPRESSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+# Bumped whenever the manifest layout changes
+MANIFEST_VERSION = 1
+
+
+def compression_available(compression):
+    """Whether segments can be written and read with ``compression``."""
+    return compression == 'gzip' or _zstandard() is not None
+
+
+def _zstandard():
+    try:
+        return importlib.import_module('zstandard')
+    except ImportError:
+        return None
+
+
+def completed_before(task, cutoff):
+    """
+    Whether ``task`` was completed before ``cutoff`` (a naive datetime).
+    Tasks without a completion time are dated by their creation time.
+    """
+    if not task.get('completed', False):
+        return False
+    moment = task.get('completed_at') or task.get('created_at')
+    try:
+        return datetime.fromisoformat(moment) < cutoff
+    except (TypeError, ValueError):
+        return False
+
+
+def archive_cutoff(days, now=None):
+    return (now or datetime.now()) - timedelta(days=days)
+
+
+class Archive:
+    """The segment files of one task store and their manifest."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest_path = self.path / 'manifest.json'
+
+    def segments(self):
+        """Manifest entries of every segment, oldest first."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return []
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"{self.manifest_path} was written by another version of the app")
+        return manifest['segments']
+
+    def revision(self):
+        """Identifies the archived data, for caches built from it."""
+        segments = self.segments()
+        return [len(segments), segments[-1]['file'] if segments else None]
+
+    def aggregates(self):
+        """Counts over every archived task, from the manifest."""
+        aggregates = Aggregates()
+        for segment in self.segments():
+            aggregates.merge(Aggregates.from_dict(segment['aggregates']))
+        return aggregates
+
+    def iter_tasks(self):
+        """Yield every archived task, oldest segment first."""
+        for segment in self.segments():
+            with self._open(self.path / segment['file'], 'rt') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def append(self, tasks, compression='gzip'):
+        """
+        Write ``tasks`` (a list) as a new segment and add it to the manifest;
+        returns the manifest entry.
+        """
+        segments = self.segments()
+        number = int(segments[-1]['file'].split('-')[1].split('.')[0]) + 1 if segments else 1
+        name = f"segment-{number:06d}{COMPRESSIONS[compression]}"
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / f".{name}.{os.getpid()}.tmp"
+        archived_at = datetime.now().isoformat()
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        try:
+            with self._open(tmp_path, 'wt') as f:
+                for start in range(0, len(tasks), 1000):
+                    f.write(''.join(encode({**task, 'archived_at': archived_at}) + '\n'
+                                    for task in tasks[start:start + 1000]))
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path / name)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        completed = sorted(task.get('completed_at') or task.get('created_at') or '' for task in tasks)
+        entry = {
+            'file': name,
+            'count': len(tasks),
+            'archived_at': archived_at,
+            'first_completed': completed[0] if completed else None,
+            'last_completed': completed[-1] if completed else None,
+            'aggregates': Aggregates.from_tasks(tasks).to_dict(),
+        }
+        self._write_manifest(segments + [entry])
+        return entry
+
+    def remove(self, entry):
+        """Take a segment written by append() back out (when the task list could not be saved)."""
+        self._write_manifest([segment for segment in self.segments() if segment['file'] != entry['file']])
+        (self.path / entry['file']).unlink(missing_ok=True)
+
+    def _write_manifest(self, segments):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'segments': segments}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _open(self, path, mode):
+        if COMPRESSIONS['zstd'] in path.name:
+            zstandard = _zstandard()
+            if zstandard is None:
+                raise OSError(f"{path.name} is compressed with zstd; install it with: pip install zstandard")
+            return zstandard.open(path, mode, encoding='utf-8')
+        import gzip
+
+        return gzip.open(path, mode, encoding='utf-8')
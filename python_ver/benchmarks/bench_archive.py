@@ -0,0 +1,154 @@
+"""
+Benchmark and check of ``todo.py archive`` (archive.py).
+
+Writes a synthetic store of ``--tasks`` tasks (see synthetic.py) and archives
+the completed tasks older than the newest ``--keep`` fraction of them. Before
+and after archiving it times ``list``, ``stats``, ``search`` and ``complete``
+(which loads and saves the whole list) and reports the size of the store. It
+checks that:
+
+- ``stats --include-archive`` reports the same counts as ``stats`` did before;
+- ``search --include-archive`` finds the same tasks as ``search`` did before;
+- no task left in the list was completed before the cutoff, unless a task
+  left in the list depends on it.
+
+    python python_ver/benchmarks/bench_archive.py
+    python python_ver/benchmarks/bench_archive.py --tasks 1000000 --storage sqlite
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import write_store
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from python_ver import archive  # noqa: E402
+
+QUERY = 'invoice'
+
+
+def run(argv, env):
+    """Wall seconds and stdout of one CLI run."""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-m', 'python_ver.todo'] + argv, cwd=REPO_ROOT, env=env,
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{result.stdout}{result.stderr}")
+    return seconds, result.stdout
+
+
+def store_size(data_dir):
+    """Bytes of the task data, without the archive, caches and indexes."""
+    return sum(path.stat().st_size for path in data_dir.glob('tasks.*')
+               if path.is_file() and path.suffix in ('.json', '.journal', '.db'))
+
+
+def measure(env, last_number):
+    """Seconds of each timed command."""
+    times = {}
+    times['list'], _ = run(['list'], env)
+    times['stats'], _ = run(['stats'], env)
+    times['search'], _ = run(['search', QUERY], env)
+    # Toggled twice so the list ends as it started
+    first, _ = run(['complete', str(last_number)], env)
+    second, _ = run(['complete', str(last_number)], env)
+    times['complete'] = (first + second) / 2
+    return times
+
+
+def stats_counts(env, include_archive=False):
+    argv = ['stats', '--format', 'json'] + (['--include-archive'] if include_archive else [])
+    return json.loads(run(argv, env)[1])
+
+
+def search_texts(env, include_archive=False):
+    argv = ['search', QUERY, '--format', 'ndjson'] + (['--include-archive'] if include_archive else [])
+    return sorted(json.loads(line)['task'] for line in run(argv, env)[1].splitlines())
+
+
+def check_hot(env, cutoff):
+    """Problems with the tasks left in the list (empty if none)."""
+    tasks = [json.loads(line) for line in run(['list', '--format', 'ndjson'], env)[1].splitlines()]
+    prereqs = {prereq for task in tasks for prereq in task['depends_on']}
+    stale = [task for task in tasks if task['id'] not in prereqs and archive.completed_before(task, cutoff)]
+    return [f"{len(stale)} tasks completed before the cutoff are still in the list"] if stale else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark archiving old completed tasks')
+    parser.add_argument('--tasks', type=int, default=200000, help='Tasks in the store (default: 200000)')
+    parser.add_argument('--keep', type=float, default=0.1,
+                        help='Fraction of the completed tasks that are recent enough to stay (default: 0.1)')
+    parser.add_argument('--storage', default='json', help='Storage backend (default: json)')
+    args = parser.parse_args()
+
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        config = data_dir / 'config.json'
+        config.write_text(json.dumps({'require_auth': False}))
+        env = dict(os.environ, TODO_CONFIG_FILE=str(config), TODO_FILE=str(data_dir / 'tasks.json'),
+                   TODO_DB_FILE=str(data_dir / 'tasks.db'), TODO_DAEMON='off', TODO_STORAGE=args.storage)
+
+        tasks = write_store(data_dir / 'tasks.json', args.tasks)
+        completed_at = sorted(task['completed_at'] for task in tasks if task['completed'])
+        newest_old = datetime.fromisoformat(completed_at[int(len(completed_at) * (1 - args.keep))])
+        days = (datetime.now() - newest_old).days
+        del tasks, completed_at
+        if args.storage == 'sqlite':
+            run(['migrate'], env)
+            (data_dir / 'tasks.json').unlink()
+        # The first run builds the stored counts and the search index
+        run(['stats'], env)
+        run(['search', QUERY], env)
+
+        counts = stats_counts(env)
+        found = search_texts(env)
+        before_size = store_size(data_dir)
+        before = measure(env, args.tasks)
+
+        archive_seconds, output = run(['archive', '--older-than', str(days)], env)
+        cutoff = archive.archive_cutoff(days)
+        run(['search', QUERY], env)
+        after_size = store_size(data_dir)
+        after = measure(env, args.tasks)
+        archive_dir = next(data_dir.glob('tasks.*.archive'))
+        archive_bytes = sum(path.stat().st_size for path in archive_dir.iterdir())
+
+        archived_counts = stats_counts(env, include_archive=True)
+        if archived_counts != counts:
+            problems.append(f"stats --include-archive differs from stats before archiving: "
+                            f"{archived_counts} != {counts}")
+        if search_texts(env, include_archive=True) != found:
+            problems.append(f"search --include-archive does not find the same {len(found)} tasks as before")
+        problems += check_hot(env, cutoff)
+        times = {}
+        times['stats --include-archive'], _ = run(['stats', '--include-archive'], env)
+        times['search --include-archive'], _ = run(['search', QUERY, '--include-archive'], env)
+
+    print(f"{args.tasks} tasks ({args.storage}), archiving completed tasks older than {days} days")
+    print(f"  {output.strip().splitlines()[0]}")
+    print(f"  archive run        {archive_seconds:7.2f} s")
+    print(f"  store size         {before_size / 1e6:7.1f} MB -> {after_size / 1e6:7.1f} MB"
+          f"  (archive files {archive_bytes / 1e6:.1f} MB)")
+    for name in before:
+        print(f"  {name:<18} {before[name]:7.2f} s -> {after[name]:7.2f} s  ({before[name] / after[name]:.1f}x)")
+    for name, seconds in times.items():
+        print(f"  {name:<24} {seconds:7.2f} s")
+    for problem in problems:
+        print(f"  - {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
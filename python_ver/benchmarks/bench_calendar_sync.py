@@ -0,0 +1,91 @@
+"""
+Benchmark of the Google Calendar sync (plugins/google_calendar.py) against the
+local fake Calendar API server of the tests (python_ver/tests/fake_calendar.py),
+without network access or a Google account.
+
+The fake server waits ``--latency`` milliseconds per HTTP request to stand in
+for the round trip to Google. The script creates ``--events`` events the old
+way (new credentials check, client and request per event) and through
+CalendarSync. The behavior of the sync (retries, sync tokens) is checked by
+python_ver/tests/test_calendar_sync.py.
+
+    python python_ver/benchmarks/bench_calendar_sync.py
+    python python_ver/benchmarks/bench_calendar_sync.py --events 500 --latency 80
+"""
+
+import argparse
+import datetime
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / 'plugins'))
+sys.path.insert(0, str(REPO_ROOT / 'python_ver' / 'tests'))
+
+from fake_calendar import FakeCalendar, serve  # noqa: E402
+
+
+def insert_one_at_a_time(api_url, credentials, events):
+    """What add_to_calendar() used to do for every task: build a client, insert, repeat."""
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+
+    for event in events:
+        service = build('calendar', 'v3', http=AuthorizedHttp(credentials, http=httplib2.Http()),
+                        static_discovery=True, client_options={'api_endpoint': api_url + 'calendar/v3/'})
+        service.events().insert(calendarId='primary', body=event).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the calendar sync against a local fake server')
+    parser.add_argument('--events', type=int, default=300, help='Events to create (default: 300)')
+    parser.add_argument('--latency', type=float, default=50, help='Milliseconds per HTTP request (default: 50)')
+    args = parser.parse_args()
+
+    from google.auth.credentials import AnonymousCredentials
+
+    import google_calendar
+
+    calendar = FakeCalendar()
+    server = serve(calendar, args.latency / 1000)
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    credentials = AnonymousCredentials()
+    today = datetime.date.today()
+    events = [google_calendar.task_event(f"Task {i}", today + datetime.timedelta(days=i % 30))
+              for i in range(args.events)]
+    problems = []
+
+    started = time.perf_counter()
+    insert_one_at_a_time(api_url, credentials, events)
+    old_seconds, old_requests = time.perf_counter() - started, calendar.requests
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = google_calendar.CalendarSync(credentials=credentials, api_url=api_url,
+                                            state_file=str(Path(tmp) / 'calendar_sync.json'))
+        calendar.requests = 0
+        started = time.perf_counter()
+        results = sync.insert_events(events)
+        new_seconds, new_requests = time.perf_counter() - started, calendar.requests
+        failed = [result for result in results if not isinstance(result, dict)]
+        if failed:
+            problems.append(f"{len(failed)} inserts failed, e.g. {failed[0]}")
+        if [result.get('summary') for result in results if isinstance(result, dict)] != \
+                [event['summary'] for event in events]:
+            problems.append("created events don't line up with the requested ones")
+
+        print(f"{args.events} events, {args.latency:g} ms per request")
+        print(f"  one request per event  {old_seconds:8.2f} s   {old_requests:5} requests")
+        print(f"  CalendarSync           {new_seconds:8.2f} s   {new_requests:5} requests"
+              f"   ({old_seconds / new_seconds:.1f}x faster)")
+
+    server.shutdown()
+    for problem in problems:
+        print(f"  - {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Command latency benchmarks for the Python CLI.
+
+Generates synthetic stores (see synthetic.py), times the todo.py functions
+behind the everyday commands against them and appends the results to a JSON
+history file. Each result is compared with the best of the recent runs for the
+same backend and size; the script exits with code 1 if anything got slower
+than the allowed threshold.
+
+    python python_ver/benchmarks/bench_commands.py
+    python python_ver/benchmarks/bench_commands.py --sizes 1000,10000,100000,1000000
+    python python_ver/benchmarks/bench_commands.py --storage sqlite --threshold 0.5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import DEPENDENT_EVERY, write_store
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+HISTORY_FILE = Path(__file__).resolve().parent / 'history.json'
+
+# Results within this many milliseconds of the baseline are never regressions
+NOISE_FLOOR_MS = 1.0
+# How many earlier runs the baseline is taken from
+BASELINE_RUNS = 5
+
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault('TODO_DAEMON', 'off')
+
+
+def import_todo(data_dir):
+    config = data_dir / 'config.json'
+    config.write_text(json.dumps({'require_auth': False}))
+    os.environ['TODO_CONFIG_FILE'] = str(config)
+    from python_ver import todo
+    return todo
+
+
+def prepare_store(todo, data_dir, size, backend):
+    """Point todo.py at a fresh synthetic store of ``size`` tasks."""
+    if todo._storage is not None and hasattr(todo._storage, 'close'):
+        todo._storage.close()
+    for leftover in data_dir.glob('tasks*'):
+        leftover.unlink()
+    todo.TASKS_FILE = data_dir / 'tasks.json'
+    todo.DB_FILE = data_dir / 'tasks.db'
+    os.environ['TODO_STORAGE'] = backend
+    todo._storage = None
+
+    tasks = write_store(todo.TASKS_FILE, size)
+    if backend == 'sqlite':
+        todo.get_storage().save(tasks)
+        todo.TASKS_FILE.unlink()
+
+
+def benchmark_cases(todo, size):
+    """Map of benchmark name -> (setup, run); run(i, state) is the timed part."""
+    # Ids with no prerequisites, so completing them is never blocked
+    free_ids = [i for i in range(1, size, DEPENDENT_EVERY)]
+    # Dependent/prerequisite pairs that don't exist yet and can't form a cycle
+    new_edges = [(i, i - 2) for i in range(5, size, DEPENDENT_EVERY)]
+
+    def touched_list(i):
+        tasks = todo.load_tasks()
+        task_id = free_ids[i % len(free_ids)]
+        tasks.update(task_id, {'tags': tasks.get(task_id)['tags'] + ['bench']})
+        return tasks
+
+    return {
+        'load_tasks': (None, lambda i, state: todo.load_tasks()),
+        'save_tasks': (touched_list, lambda i, tasks: todo.save_tasks(tasks)),
+        'list_tasks': (None, lambda i, state: todo.list_tasks()),
+        'show_stats': (None, lambda i, state: todo.show_stats()),
+        'add_task': (None, lambda i, state: todo.add_task(f'benchmark task {i}', 'High', ['bench'])),
+        'complete_task': (None, lambda i, state: todo.complete_task(free_ids[i % len(free_ids)] + 1)),
+        'add_dependency': (None, lambda i, state: todo.add_dependency(
+            new_edges[i % len(new_edges)][0] + 1, new_edges[i % len(new_edges)][1] + 1)),
+    }
+
+
+def run_case(setup, run, repeats):
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(repeats):
+            state = setup(i) if setup else None
+            start = time.perf_counter()
+            run(i, state)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(timings), 3), 'median_ms': round(statistics.median(timings), 3)}
+
+
+def load_history(path):
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def baseline(history, backend, size, name):
+    """Best min_ms of the last BASELINE_RUNS recorded runs, or None."""
+    previous = [
+        run['results'][name]['min_ms'] for run in history
+        if run['backend'] == backend and run['size'] == size and name in run['results']
+    ]
+    return min(previous[-BASELINE_RUNS:]) if previous else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark todo.py commands on synthetic stores')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='Comma-separated store sizes (default: 1000,10000,100000)')
+    parser.add_argument('--storage', default='json',
+                        help='Comma-separated backends: json, journal, sqlite (default: json)')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per benchmark (default: 5)')
+    parser.add_argument('--only', help='Comma-separated benchmark names to run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline, as a fraction (default: 0.25)')
+    parser.add_argument('--history', default=str(HISTORY_FILE),
+                        help=f'History file (default: {HISTORY_FILE.name} next to this script)')
+    parser.add_argument('--no-record', action='store_true', help="Compare only; don't append to the history")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    backends = args.storage.split(',')
+    only = set(args.only.split(',')) if args.only else None
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    runs, regressions = [], []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        todo = import_todo(data_dir)
+        for backend in backends:
+            for size in sizes:
+                prepare_store(todo, data_dir, size, backend)
+                # Fewer repeats for the huge stores; they are slow and stable
+                repeats = max(1, args.repeats // 3) if size >= 1000000 else args.repeats
+                results = {}
+                print(f"\n{backend} / {size:,} tasks")
+                for name, (setup, run) in benchmark_cases(todo, size).items():
+                    if only and name not in only:
+                        continue
+                    results[name] = result = run_case(setup, run, repeats)
+                    previous = baseline(history, backend, size, name)
+                    line = f"  {name:<16} min {result['min_ms']:>10.2f} ms   median {result['median_ms']:>10.2f} ms"
+                    if previous is not None:
+                        change = (result['min_ms'] - previous) / previous if previous else 0.0
+                        line += f"   {change:+7.1%} vs {previous:.2f} ms"
+                        if (result['min_ms'] > previous * (1 + args.threshold)
+                                and result['min_ms'] - previous > NOISE_FLOOR_MS):
+                            line += "   REGRESSION"
+                            regressions.append(f"{backend}/{size}/{name}")
+                    print(line)
+                runs.append({
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'commit': git_commit(),
+                    'python': platform.python_version(),
+                    'backend': backend,
+                    'size': size,
+                    'repeats': repeats,
+                    'results': results,
+                })
+        if todo._storage is not None and hasattr(todo._storage, 'close'):
+            todo._storage.close()
+
+    if not args.no_record:
+        with open(history_path, 'w') as f:
+            json.dump(history + runs, f, indent=2)
+        print(f"\nRecorded {len(runs)} runs in {history_path}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark of ``list --format`` exports against scraping the coloured listing.
+
+For each size, writes a synthetic store (see synthetic.py), then runs
+``todo.py list`` (with colours, as the old scripts scraped it) and
+``todo.py list --format ndjson|csv|json`` with stdout going to a file. It
+reports the wall time, the output rate and the peak memory of each run, and
+checks that every export parses and holds every task once.
+
+    python python_ver/benchmarks/bench_export.py
+    python python_ver/benchmarks/bench_export.py --sizes 1000000 --storage sqlite
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_store
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+CASES = [('list (coloured)', []), ('ndjson', ['--format', 'ndjson']),
+         ('csv', ['--format', 'csv']), ('json', ['--format', 'json'])]
+
+
+def run(argv, env, output):
+    """Wall seconds and peak RSS (MiB) of one CLI run writing to ``output``."""
+    # ru_maxrss would include what this process used before the fork, so on
+    # Linux the child reports its own high-water mark (VmHWM)
+    code = ('import resource, runpy, sys; sys.argv = ["todo.py"] + sys.argv[1:]\n'
+            'try:\n    runpy.run_module("python_ver.todo", run_name="__main__")\n'
+            'finally:\n    sys.stdout.flush()\n'
+            '    try:\n'
+            '        peak = next(int(line.split()[1]) for line in open("/proc/self/status")'
+            ' if line.startswith("VmHWM:"))\n'
+            '    except OSError:\n'
+            '        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n'
+            '    print(peak, file=sys.stderr)')
+    with open(output, 'w') as out:
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code] + argv, cwd=REPO_ROOT, env=env,
+                                stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.PIPE, text=True)
+        seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    peak_kib = int(result.stderr.strip().splitlines()[-1])
+    return seconds, peak_kib / 1024
+
+
+def check(name, path, size):
+    """Problems with an export of ``size`` tasks (empty if none)."""
+    with open(path, encoding='utf-8') as f:
+        if name == 'ndjson':
+            ids = [json.loads(line)['id'] for line in f]
+        elif name == 'csv':
+            ids = [int(row['id']) for row in csv.DictReader(f)]
+        elif name == 'json':
+            ids = [record['id'] for record in json.load(f)]
+        else:
+            return []
+    if sorted(ids) != list(range(1, size + 1)):
+        return [f"{name}: {len(ids)} records, {len(set(ids))} distinct ids, expected {size}"]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark list --format exports')
+    parser.add_argument('--sizes', default='100000',
+                        help='Comma-separated numbers of tasks (default: 100000)')
+    parser.add_argument('--storage', default='json', help='Storage backend (default: json)')
+    args = parser.parse_args()
+
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        config = data_dir / 'config.json'
+        config.write_text(json.dumps({'require_auth': False}))
+        env = dict(os.environ, TODO_CONFIG_FILE=str(config), TODO_FILE=str(data_dir / 'tasks.json'),
+                   TODO_DB_FILE=str(data_dir / 'tasks.db'), TODO_DAEMON='off',
+                   TODO_STORAGE=args.storage, TODO_COLOR='always')
+
+        for size in (int(size) for size in args.sizes.split(',')):
+            for leftover in data_dir.glob('tasks*'):
+                leftover.unlink()
+            tasks = write_store(data_dir / 'tasks.json', size)
+            if args.storage == 'sqlite':
+                os.environ.update(env)
+                from python_ver import todo
+                todo._storage = None
+                todo.get_storage().save(tasks)
+                todo.get_storage().close()
+                todo._storage = None
+                (data_dir / 'tasks.json').unlink()
+            del tasks
+            output = data_dir / 'out'
+            # The first run builds the stored counts
+            run(['stats'], env, output)
+
+            print(f"{size} tasks ({args.storage})")
+            for name, argv in CASES:
+                seconds, peak_mib = run(['list'] + argv, env, output)
+                megabytes = output.stat().st_size / 1e6
+                print(f"  {name:<16} {seconds:7.2f} s  {megabytes:8.1f} MB  {megabytes / seconds:7.1f} MB/s"
+                      f"  peak {peak_mib:7.1f} MiB")
+                problems += check(name, output, size)
+
+    for problem in problems:
+        print(f"  - {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Micro-benchmark of the translation lookups in i18n.py.
+
+Builds a translations.json shaped like the real one but with ``--languages``
+languages of ``--keys`` strings each (a fifth with placeholders), then
+compares the compiled catalog with the implementation it replaced (parse the
+whole file, then two dict lookups and a str.replace per variable on every
+call):
+
+- cost of one t() call, for strings without and with placeholders;
+- startup cost: time from importing the module to the first translated string
+  in a fresh process, with and without a cached catalog.
+
+It also checks that both return the same text for every key and language.
+
+    python python_ver/benchmarks/bench_i18n.py
+    python python_ver/benchmarks/bench_i18n.py --languages 30 --keys 2000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+PLAIN_KEY = 'key_1'
+ONE_VAR_KEY = 'key_0'
+TWO_VAR_KEY = 'key_5'
+
+
+class LegacyI18n:
+    """The lookups as they were before the compiled catalog."""
+
+    def __init__(self, path, lang):
+        with open(path, 'r', encoding='utf-8') as f:
+            self.translations = json.load(f)
+        self.lang = lang if lang in self.translations else 'en'
+
+    def t(self, key, variables=None):
+        if variables is None:
+            variables = {}
+        message = self.translations.get(self.lang, {}).get(key)
+        if message is None:
+            message = self.translations.get('en', {}).get(key)
+        if message is None:
+            return f"MISSING_KEY: {key}"
+        for var_name, value in variables.items():
+            message = message.replace(f"{{{var_name}}}", str(value))
+        return message
+
+
+def write_translations(path, languages, keys):
+    """A translations file with ``languages`` x ``keys`` strings."""
+    catalog = {}
+    for number in range(languages):
+        lang = 'en' if number == 0 else f"l{number}"
+        messages = {}
+        for key in range(keys):
+            if key % 5 == 0:
+                text = f"[{lang}] Task {{task_id}} not found ({key}). Use 'list' to see {{count}} tasks."
+                if key % 10 == 0:
+                    text = f"[{lang}] Removed: \"{{task_name}}\" ({key})"
+            else:
+                text = f"[{lang}] Message number {key}, nothing to fill in."
+            # Other languages leave some strings to English
+            if lang == 'en' or key % 7:
+                messages[f"key_{key}"] = text
+        catalog[lang] = messages
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+    return catalog
+
+
+def child(mode, lang):
+    """Body of a startup measurement process: prints ms to the first string."""
+    # Imported by todo.py either way, so not part of the measurement
+    from python_ver import i18n
+
+    started = time.perf_counter()
+    if mode == 'legacy':
+        LegacyI18n(os.environ['TODO_TRANSLATIONS_FILE'], lang).t(ONE_VAR_KEY, {'task_id': 1, 'count': 2})
+    else:
+        i18n.set_language(lang)
+        i18n.t(ONE_VAR_KEY, {'task_id': 1, 'count': 2})
+    print((time.perf_counter() - started) * 1000)
+
+
+def startup_ms(mode, lang, runs, before_each=None):
+    timings = []
+    for _ in range(runs):
+        if before_each:
+            before_each()
+        output = subprocess.run([sys.executable, __file__, '--child', mode, lang],
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def per_call_ns(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark translation lookups')
+    parser.add_argument('--languages', type=int, default=12, help='Languages in the file (default: 12)')
+    parser.add_argument('--keys', type=int, default=500, help='Strings per language (default: 500)')
+    parser.add_argument('--runs', type=int, default=15, help='Processes per startup measurement (default: 15)')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'LANG'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'translations.json'
+        os.environ['TODO_TRANSLATIONS_FILE'] = str(path)
+        catalog = write_translations(path, args.languages, args.keys)
+        lang = 'l1'
+
+        from python_ver import i18n
+
+        problems = []
+        for code in catalog:
+            legacy = LegacyI18n(path, code)
+            i18n.set_language(code)
+            for key in list(catalog['en']) + ['missing']:
+                for variables in (None, {'task_id': 3}, {'task_id': 3, 'count': 9, 'task_name': 'x'}):
+                    if legacy.t(key, variables) != i18n.t(key, variables):
+                        problems.append(f"{code}/{key} with {variables}: "
+                                        f"{legacy.t(key, variables)!r} != {i18n.t(key, variables)!r}")
+
+        legacy = LegacyI18n(path, lang)
+        i18n.set_language(lang)
+        one, two = {'task_name': 'Buy milk'}, {'task_id': 42, 'count': 7}
+        print(f"{args.languages} languages x {args.keys} strings ({path.stat().st_size // 1024} KiB)")
+        print(f"{'t() per call':<34} {'before':>10} {'after':>10}")
+        for label, key, variables in (('no placeholders', PLAIN_KEY, None),
+                                      ('1 variable', ONE_VAR_KEY, one),
+                                      ('2 variables', TWO_VAR_KEY, two)):
+            before = per_call_ns(lambda: legacy.t(key, variables), 100000)
+            after = per_call_ns(lambda: i18n.t(key, variables), 100000)
+            print(f"  {label:<32} {before:7.0f} ns {after:7.0f} ns")
+
+        def drop_cache():
+            shutil.rmtree(path.parent / '__pycache__', ignore_errors=True)
+
+        print(f"{'startup to first string':<34} {'before':>10} {'after':>10}")
+        legacy_ms = startup_ms('legacy', lang, args.runs)
+        cold_ms = startup_ms('catalog', lang, args.runs, before_each=drop_cache)
+        warm_ms = startup_ms('catalog', lang, args.runs)
+        print(f"  {'no cached catalog':<32} {legacy_ms:7.2f} ms {cold_ms:7.2f} ms")
+        print(f"  {'cached catalog':<32} {legacy_ms:7.2f} ms {warm_ms:7.2f} ms")
+
+        for problem in problems[:10]:
+            print(f"  - {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
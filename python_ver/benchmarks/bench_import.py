@@ -0,0 +1,150 @@
+"""
+Benchmark and check of ``todo.py import`` (importer.py).
+
+Writes ``--tasks`` synthetic tasks (see synthetic.py) as CSV, JSON, NDJSON
+and todo.txt, with every 20th task repeated at the end of the file, and
+imports each file into a store that already holds ``--existing`` tasks. For
+comparison it also applies the same tasks as ``add`` lines with ``batch``,
+the fastest way to seed a store before import existed. It reports tasks
+imported per second and checks that:
+
+- every task in the file is stored once, with its text, priority, tags and
+  completion status;
+- the repeated tasks were skipped as duplicates.
+
+    python python_ver/benchmarks/bench_import.py
+    python python_ver/benchmarks/bench_import.py --tasks 1000000 --storage sqlite
+"""
+
+import argparse
+import io
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from synthetic import generate_tasks, write_store
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from python_ver import export  # noqa: E402
+
+DUPLICATE_EVERY = 20
+TODO_TXT_LETTERS = {'High': 'A', 'Medium': 'B', 'Low': 'C'}
+
+
+def write_file(path, fmt, tasks):
+    """Write ``tasks`` to ``path`` in an import format."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'todotxt':
+            for task in tasks:
+                letter = TODO_TXT_LETTERS[task['priority']]
+                if task['completed']:
+                    # Completed tasks keep their priority as pri:X
+                    words = ['x', task['completed_at'][:10], task['created_at'][:10], task['task'], f"pri:{letter}"]
+                else:
+                    words = [f"({letter})", task['created_at'][:10], task['task']]
+                f.write(' '.join(words + [f"+{tag}" for tag in task['tags']]) + '\n')
+        elif fmt == 'batch':
+            for task in tasks:
+                f.write(f"add {shlex.quote(task['task'])} -p {task['priority']}"
+                        + ''.join(f" -t {tag}" for tag in task['tags'])
+                        + (' --completed' if task['completed'] else '') + '\n')
+        else:
+            export.write_tasks(iter(tasks), fmt, f)
+
+
+def check(todo, tasks, existing):
+    """Problems with the store after importing ``tasks`` (empty if none)."""
+    stored = list(todo.load_tasks())
+    problems = []
+    if len(stored) != existing + len(tasks):
+        problems.append(f"{len(stored)} tasks stored, expected {existing + len(tasks)}")
+    # The stored tasks have the lower ids, and some of the same descriptions
+    imported = {task['task']: task for task in stored if task['id'] >= existing}
+    for task in tasks:
+        found = imported.get(task['task'])
+        if found is None:
+            problems.append(f"{task['task']!r} is missing")
+        elif (found['priority'], found['completed'], sorted(found['tags'])) != \
+                (task['priority'], task['completed'], sorted(task['tags'])):
+            problems.append(f"{task['task']!r} was stored with other values")
+        if len(problems) > 10:
+            break
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark importing a large file')
+    parser.add_argument('--tasks', type=int, default=100000, help='Tasks in the file (default: 100000)')
+    parser.add_argument('--existing', type=int, default=10000, help='Tasks already stored (default: 10000)')
+    parser.add_argument('--storage', default='json,journal,sqlite',
+                        help='Comma-separated backends (default: json,journal,sqlite)')
+    parser.add_argument('--formats', default='csv,json,ndjson,todotxt,batch',
+                        help="Comma-separated formats; 'batch' is add lines for the batch command")
+    args = parser.parse_args()
+
+    # Another seed, so the imported tasks are not copies of the stored ones
+    tasks = generate_tasks(args.tasks, seed=1)
+    rows = tasks + tasks[::DUPLICATE_EVERY]
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        config = data_dir / 'config.json'
+        config.write_text(json.dumps({'require_auth': False}))
+        os.environ.update({
+            'TODO_CONFIG_FILE': str(config),
+            'TODO_FILE': str(data_dir / 'tasks.json'),
+            'TODO_DB_FILE': str(data_dir / 'tasks.db'),
+            'TODO_DAEMON': 'off',
+        })
+        from python_ver import todo
+
+        for fmt in args.formats.split(','):
+            source = data_dir / f"import.{fmt}"
+            write_file(source, fmt, rows)
+            for backend in args.storage.split(','):
+                for leftover in data_dir.glob('tasks*'):
+                    leftover.unlink()
+                if todo._storage is not None and hasattr(todo._storage, 'close'):
+                    todo._storage.close()
+                todo._storage = None
+                os.environ['TODO_STORAGE'] = backend
+                stored = write_store(data_dir / 'tasks.json', args.existing)
+                if backend == 'sqlite':
+                    todo.get_storage().save(stored)
+                    (data_dir / 'tasks.json').unlink()
+
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    started = time.perf_counter()
+                    if fmt == 'batch':
+                        ok = todo.run_batch(str(source))
+                    else:
+                        ok = todo.import_tasks(str(source), fmt)
+                    elapsed = time.perf_counter() - started
+                problems = [] if ok else [f"import failed:\n{output.getvalue().strip()}"]
+                skipped = f"{len(rows) - len(tasks)} duplicates skipped"
+                if fmt != 'batch' and skipped not in output.getvalue():
+                    problems.append(f"expected {skipped}: {output.getvalue().strip()}")
+                if fmt != 'batch':
+                    problems += check(todo, tasks, args.existing)
+
+                status = 'OK' if not problems else f"FAILED ({len(problems)} problems)"
+                print(f"{fmt:<8} {backend:<8} {len(rows)} rows onto {args.existing} tasks  {elapsed:6.2f} s"
+                      f"  {len(rows) / elapsed:9.0f} tasks/s   {status}")
+                for problem in problems:
+                    print(f"  - {problem}")
+                failed = failed or bool(problems)
+        if todo._storage is not None and hasattr(todo._storage, 'close'):
+            todo._storage.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
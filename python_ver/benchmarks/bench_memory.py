@@ -0,0 +1,65 @@
+"""
+Memory benchmark for the in-memory task representation.
+
+Compares the memory held by a TaskList of plain dicts (what one-shot commands
+use) with the same tasks stored as compact Task objects (TaskList(compact=True),
+used by the daemon and batch mode), and checks that every task converts back
+to exactly the record it came from.
+
+    python python_ver/benchmarks/bench_memory.py
+    python python_ver/benchmarks/bench_memory.py --sizes 100000,1000000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+from synthetic import generate_tasks
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from python_ver.tasklist import TaskList  # noqa: E402
+
+
+def measure(build):
+    """Bytes still allocated by the object ``build()`` returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dict and Task memory use')
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='Comma-separated numbers of tasks (default: 10000,100000)')
+    args = parser.parse_args()
+
+    for size in (int(size) for size in args.sizes.split(',')):
+        text = json.dumps(generate_tasks(size))
+
+        dict_bytes, dict_list = measure(lambda: TaskList(json.loads(text)))
+        del dict_list
+        task_bytes, task_list = measure(lambda: TaskList(json.loads(text), compact=True))
+        mismatches = sum(1 for record, task in zip(json.loads(text), sorted(task_list, key=lambda t: t['id']))
+                         if task.to_dict() != record)
+        del task_list
+
+        print(f"{size:,} tasks")
+        print(f"  TaskList of dicts      {dict_bytes / 2**20:9.1f} MiB   {dict_bytes / size:7.0f} B/task")
+        print(f"  TaskList of Tasks      {task_bytes / 2**20:9.1f} MiB   {task_bytes / size:7.0f} B/task"
+              f"   ({1 - task_bytes / dict_bytes:.0%} less)")
+        print(f"  round trip             {'OK' if not mismatches else f'{mismatches} tasks differ'}")
+        if mismatches:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Benchmark and check of the offline queue replay (offline_queue.py).
+
+Writes an offline_queue.json of ``--ops`` operations in the format the apps
+record (adds with full task_data and history, then edits, completions and
+deletes, a slice of them logged out of timestamp order) on top of a synthetic
+store, replays it with ``todo.py replay-queue`` and checks the result against
+the operations applied one by one in timestamp order:
+
+- every surviving task is stored once, with its newest values and none of
+  the other fields of the queued records;
+- tasks deleted in the queue are gone;
+- every operation is marked ``synced`` and a second replay changes nothing.
+
+    python python_ver/benchmarks/bench_queue_replay.py
+    python python_ver/benchmarks/bench_queue_replay.py --ops 1000000 --storage sqlite
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from synthetic import PRIORITIES, TAGS, write_store
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+START = 1760000000.0
+
+TASK_FIELDS = ('task', 'priority', 'completed', 'tags')
+
+
+def generate_queue(count, seed=0):
+    """``count`` queued operations, in the order they are written to the file."""
+    rng = random.Random(seed)
+    operations, live = [], []
+    clock = START
+    for _ in range(count):
+        clock += 1.0
+        if not live or rng.random() < 0.2:
+            task_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            data = {
+                'id': task_id, 'task': f"queued task {len(operations)}",
+                'priority': rng.choice(PRIORITIES), 'tags': rng.sample(TAGS, rng.randint(0, 2)),
+                'due_date': None, 'completed': False, 'synced': False, 'shared_with': [],
+                'history': [{'timestamp': clock, 'change': 'created', 'data': {}}],
+            }
+            operations.append({'timestamp': clock, 'operation': 'add', 'task_id': task_id, 'task_data': data})
+            live.append(task_id)
+            continue
+        task_id = rng.choice(live)
+        roll = rng.random()
+        if roll < 0.6:
+            data = rng.choice([{'priority': rng.choice(PRIORITIES)}, {'task': f"renamed at {clock:.0f}"},
+                               {'tags': rng.sample(TAGS, rng.randint(0, 3))}])
+            operations.append({'timestamp': clock, 'operation': 'edit', 'task_id': task_id, 'task_data': data})
+        elif roll < 0.9:
+            operations.append({'timestamp': clock, 'operation': rng.choice(['complete', 'uncomplete']),
+                               'task_id': task_id})
+        else:
+            operations.append({'timestamp': clock, 'operation': 'delete', 'task_id': task_id})
+            live.remove(task_id)
+    # Devices that sync late append older operations after newer ones
+    for i in range(0, len(operations) - 1, 50):
+        if operations[i]['task_id'] != operations[i + 1]['task_id']:
+            operations[i], operations[i + 1] = operations[i + 1], operations[i]
+    return operations
+
+
+def expected_tasks(operations):
+    """Final {task_id: fields} from applying the operations one at a time, oldest first."""
+    tasks = {}
+    for operation in sorted(operations, key=lambda op: op['timestamp']):
+        task_id, kind = operation['task_id'], operation['operation']
+        if kind == 'add':
+            # Only the task fields are stored; history and the like stay in the queue
+            tasks[task_id] = {k: v for k, v in operation['task_data'].items() if k in TASK_FIELDS}
+        elif task_id not in tasks:
+            continue
+        elif kind == 'edit':
+            tasks[task_id].update(operation['task_data'])
+        elif kind == 'delete':
+            del tasks[task_id]
+        else:
+            tasks[task_id]['completed'] = kind == 'complete'
+    return tasks
+
+
+def check(todo, operations, queue_file, existing):
+    """Problems found after the replay (empty if none)."""
+    problems = []
+    expected = expected_tasks(operations)
+    tasks = todo.load_tasks()
+    by_sync_id = {}
+    for task in tasks:
+        if task.get('sync_id') is not None:
+            if task['sync_id'] in by_sync_id:
+                problems.append(f"queued task {task['sync_id']} stored twice")
+            by_sync_id[task['sync_id']] = task
+    if len(tasks) != existing + len(expected):
+        problems.append(f"{len(tasks)} tasks stored, expected {existing + len(expected)}")
+    for task_id, fields in expected.items():
+        task = by_sync_id.get(task_id)
+        if task is None:
+            problems.append(f"queued task {task_id} is missing")
+        elif any(task.get(name) != value for name, value in fields.items()):
+            problems.append(f"queued task {task_id} has stale values")
+        elif 'history' in task:
+            problems.append(f"queued task {task_id} kept the queue's history")
+        if len(problems) > 10:
+            break
+    with open(queue_file, encoding='utf-8') as f:
+        queued = json.load(f)
+    if len(queued) != len(operations) or not all(op.get('synced') for op in queued):
+        problems.append("not every operation was marked synced")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark replaying a large offline queue')
+    parser.add_argument('--ops', type=int, default=100000, help='Queued operations (default: 100000)')
+    parser.add_argument('--tasks', type=int, default=10000, help='Tasks already stored (default: 10000)')
+    parser.add_argument('--storage', default='json,journal,sqlite',
+                        help='Comma-separated backends (default: json,journal,sqlite)')
+    args = parser.parse_args()
+
+    operations = generate_queue(args.ops)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        config = data_dir / 'config.json'
+        config.write_text(json.dumps({'require_auth': False}))
+        queue_file = data_dir / 'offline_queue.json'
+        os.environ.update({
+            'TODO_CONFIG_FILE': str(config),
+            'TODO_FILE': str(data_dir / 'tasks.json'),
+            'TODO_DB_FILE': str(data_dir / 'tasks.db'),
+            'TODO_DAEMON': 'off',
+        })
+        from python_ver import todo
+
+        for backend in args.storage.split(','):
+            for leftover in data_dir.glob('tasks*'):
+                leftover.unlink()
+            if todo._storage is not None and hasattr(todo._storage, 'close'):
+                todo._storage.close()
+            todo._storage = None
+            os.environ['TODO_STORAGE'] = backend
+            stored = write_store(data_dir / 'tasks.json', args.tasks)
+            if backend == 'sqlite':
+                todo.get_storage().save(stored)
+                (data_dir / 'tasks.json').unlink()
+            with open(queue_file, 'w', encoding='utf-8') as f:
+                json.dump(operations, f, indent=2)
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                started = time.perf_counter()
+                ok = todo.replay_queue(str(queue_file))
+                elapsed = time.perf_counter() - started
+                again = todo.replay_queue(str(queue_file))
+            problems = [] if ok and again else [f"replay failed:\n{output.getvalue().strip()}"]
+            if 'Nothing to replay' not in output.getvalue():
+                problems.append("the second replay found operations to apply")
+            problems += check(todo, operations, queue_file, args.tasks)
+
+            status = 'OK' if not problems else f"FAILED ({len(problems)} problems)"
+            print(f"{backend:<8} {args.ops} ops onto {args.tasks} tasks   {elapsed:6.2f} s   {status}")
+            for problem in problems:
+                print(f"  - {problem}")
+            failed = failed or bool(problems)
+        if todo._storage is not None and hasattr(todo._storage, 'close'):
+            todo._storage.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
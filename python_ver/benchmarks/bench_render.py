@@ -0,0 +1,136 @@
+"""
+Benchmark of the list rendering (render.py) against the row formatting it
+replaced.
+
+Renders ``--rows`` synthetic tasks (see synthetic.py) under the usual
+Pending/Completed headings, once with the old per-row f-strings and once with
+RowRenderer, with colours and without. The script exits with code 1 if the
+coloured output is not byte-for-byte the old output, or if the plain output
+is anything other than the old output with its escape codes removed.
+
+    python python_ver/benchmarks/bench_render.py
+    python python_ver/benchmarks/bench_render.py --rows 200000
+"""
+
+import argparse
+import io
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from synthetic import generate_tasks
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from python_ver import render  # noqa: E402
+from python_ver.render import Colors, OutputBuffer  # noqa: E402
+from python_ver.tasklist import sort_key  # noqa: E402
+
+ANSI = re.compile('\033\\[[0-9;]*m')
+
+
+def legacy_create_progress_bar(percentage, width=30):
+    filled_length = round((width * percentage) / 100)
+    empty_length = width - filled_length
+    filled = '█' * filled_length
+    empty = '░' * empty_length
+    return f"{Colors.GREEN}{filled}{Colors.GRAY}{empty}{Colors.RESET}"
+
+
+def legacy_format_task(task, checkbox, blocked_count=0):
+    """format_task() as it was before render.py."""
+    task_id = task.get('id', 0)
+    priority = task.get('priority', 'Medium')
+    completed = task.get('completed', False)
+    tags = task.get('tags', [])
+    priority_colors = {
+        'High': Colors.RED,
+        'Medium': Colors.BLUE,
+        'Low': Colors.GRAY
+    }
+    priority_color = priority_colors.get(priority, Colors.RESET)
+    task_text = task['task']
+    if completed:
+        task_text = f"{Colors.GRAY}{Colors.STRIKETHROUGH}{task_text}{Colors.RESET}"
+    tags_str = ""
+    if tags:
+        tags_str = f" {Colors.CYAN}[{', '.join(tags)}]{Colors.RESET}"
+    dependency_str = ""
+    if not completed:
+        if blocked_count > 0:
+            dependency_str = f" {Colors.RED}🔗 ({blocked_count} blocked){Colors.RESET}"
+        elif task.get('depends_on'):
+            dependency_str = f" {Colors.GREEN}🔗{Colors.RESET}"
+    return (f"  {Colors.YELLOW}{checkbox}{Colors.RESET} {Colors.CYAN}{task_id + 1}.{Colors.RESET} {task_text} "
+            f"{priority_color}({priority}){Colors.RESET}{tags_str}{dependency_str}")
+
+
+def legacy_write_task_rows(out, rows, blocked_count=None):
+    section = None
+    for task in rows:
+        completed = task.get('completed', False)
+        if completed != section:
+            if section is not None:
+                out.line()
+            section = completed
+            if section:
+                out.line(f"{Colors.GREEN}{Colors.BOLD}Completed tasks:{Colors.RESET}")
+            else:
+                out.line(f"{Colors.CYAN}{Colors.BOLD}Pending tasks:{Colors.RESET}")
+        if section:
+            out.line(legacy_format_task(task, '●'))
+        else:
+            out.line(legacy_format_task(task, '○', blocked_count(task) if blocked_count else 0))
+    if section is not None:
+        out.line()
+
+
+def render_listing(rows, write_rows, progress_bar):
+    """The rows and a progress bar as `list` prints them; returns (output, seconds)."""
+    output = io.StringIO()
+    started = time.perf_counter()
+    with redirect_stdout(output), OutputBuffer() as out:
+        out.line(progress_bar(40.0))
+        write_rows(out, rows, lambda task: task['id'] % 3)
+    return output.getvalue(), time.perf_counter() - started
+
+
+def best_of(runs, rows, write_rows, progress_bar):
+    results = [render_listing(rows, write_rows, progress_bar) for _ in range(runs)]
+    return results[0][0], min(seconds for _, seconds in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark list rendering against the old row formatting')
+    parser.add_argument('--rows', type=int, default=50000, help='Tasks to render (default: 50000)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per case, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    rows = sorted(generate_tasks(args.rows), key=lambda task: (sort_key(task), task['id']))
+    problems = []
+    print(f"{args.rows} rows{'':<14} {'before':>10} {'after':>10}")
+    for label, color in (('colour', True), ('no colour', False)):
+        render.set_color(True)
+        old, old_seconds = best_of(args.runs, rows, legacy_write_task_rows, legacy_create_progress_bar)
+        render.set_color(color)
+        new, new_seconds = best_of(args.runs, rows, render.write_task_rows,
+                                   lambda percentage: render.renderer().progress_bar(percentage))
+        expected = old if color else ANSI.sub('', old)
+        if new != expected:
+            line = next(i for i, (a, b) in enumerate(zip(new.splitlines(), expected.splitlines())) if a != b)
+            problems.append(f"{label}: output differs from line {line + 1}: "
+                            f"{new.splitlines()[line]!r} != {expected.splitlines()[line]!r}")
+        print(f"  {label:<20} {old_seconds * 1000:7.1f} ms {new_seconds * 1000:7.1f} ms"
+              f"   ({old_seconds / new_seconds:.1f}x)   {'identical' if new == expected else 'DIFFERENT'}")
+    render.set_color(True)
+
+    for problem in problems:
+        print(f"  - {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
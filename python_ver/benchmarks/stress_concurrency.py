@@ -0,0 +1,173 @@
+"""
+Concurrency stress test for the storage backends.
+
+Starts dozens of writer processes against one store at the same moment. Each
+writer adds its own tasks one command at a time (load, change, save), adds one
+more task and removes it again (often the newest task in the store), adds a
+replacement, then in a single save completes its first task and tags a task
+that every writer edits. Afterwards the script checks that nothing was lost:
+
+- every added task is stored exactly once, under a unique id;
+- removed tasks are gone, and their ids were not given to other tasks;
+- every writer's completion and tag were kept;
+- the stored counts match the tasks.
+
+It exits with code 1 if any check fails.
+
+    python python_ver/benchmarks/stress_concurrency.py
+    python python_ver/benchmarks/stress_concurrency.py --writers 48 --tasks 10 --storage sqlite
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+SHARED_TASK = 'shared'
+
+
+def run_writer(writer, count, start_at):
+    """Body of one writer process; prints what todo.py printed."""
+    from python_ver import todo
+
+    output = io.StringIO()
+    # Line up every writer on the same instant to maximise overlap
+    time.sleep(max(0.0, start_at - time.time()))
+    with redirect_stdout(output):
+        for number in range(count):
+            todo.add_task(f"w{writer}-t{number}", tags=[f"w{writer}"])
+        todo.add_task(f"w{writer}-removed")
+        tasks = todo.load_tasks()
+        removed = next((task for task in tasks if task['task'] == f"w{writer}-removed"), None)
+        if removed is None:
+            print("Error: tasks added earlier are missing")
+            return
+        todo.apply_remove(tasks, removed['id'] + 1)
+        todo.save_tasks(tasks)
+        # Gets a new id; the removed one must not be handed out again
+        todo.add_task(f"w{writer}-replacement")
+        tasks = todo.load_tasks()
+        own = next((task for task in tasks if task['task'] == f"w{writer}-t0"), None)
+        shared = next((task for task in tasks if task['task'] == SHARED_TASK), None)
+        if own is None or shared is None:
+            print("Error: tasks added earlier are missing")
+            return
+        todo.apply_complete(tasks, own['id'] + 1)
+        tasks.update(shared['id'], {'tags': shared['tags'] + [f"w{writer}"]})
+        todo.save_tasks(tasks)
+    print(output.getvalue())
+    print(f"removed id {removed['id']}")
+
+
+def check_store(todo, writers, count, removed_ids):
+    """Problems found in the store after a run (empty if none)."""
+    records = todo.get_storage().load()
+    problems = []
+    ids = Counter(record['id'] for record in records)
+    problems += [f"id {task_id} stored {times} times" for task_id, times in ids.items() if times > 1]
+    reused = sorted(set(ids) & set(removed_ids))
+    if reused:
+        problems.append(f"ids of removed tasks were reused: {', '.join(map(str, reused))}")
+
+    by_text = Counter(record['task'] for record in records)
+    for writer in range(writers):
+        expected = {f"w{writer}-t{number}": 1 for number in range(count)}
+        expected.update({f"w{writer}-removed": 0, f"w{writer}-replacement": 1})
+        for text, times in expected.items():
+            if by_text[text] != times:
+                problems.append(f"'{text}' stored {by_text[text]} times")
+    tasks = {record['task']: record for record in records}
+    for writer in range(writers):
+        if not tasks.get(f"w{writer}-t0", {}).get('completed'):
+            problems.append(f"completion of 'w{writer}-t0' was lost")
+    shared_tags = set(tasks.get(SHARED_TASK, {}).get('tags', []))
+    missing = [f"w{writer}" for writer in range(writers) if f"w{writer}" not in shared_tags]
+    if missing:
+        problems.append(f"tags lost from '{SHARED_TASK}': {', '.join(missing)}")
+
+    stored = todo.get_storage().load_aggregates()
+    actual = todo.Aggregates.from_tasks(todo.normalize_tasks(records))
+    if stored is None or todo.Aggregates.from_dict(stored).differences(actual):
+        problems.append("stored counts don't match the tasks")
+    return problems
+
+
+def stress(todo, data_dir, backend, writers, count):
+    """Run one round against a fresh store; returns (problems, seconds)."""
+    for leftover in data_dir.glob('tasks*'):
+        leftover.unlink()
+    if todo._storage is not None and hasattr(todo._storage, 'close'):
+        todo._storage.close()
+    todo._storage = None
+    os.environ['TODO_STORAGE'] = backend
+    with redirect_stdout(io.StringIO()):
+        todo.add_task(SHARED_TASK)
+
+    start_at = time.time() + 1.0
+    processes = [
+        subprocess.Popen([sys.executable, __file__, '--worker', str(writer), str(count), str(start_at)],
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for writer in range(writers)
+    ]
+    problems, removed_ids = [], []
+    for writer, process in enumerate(processes):
+        output, _ = process.communicate()
+        if process.returncode != 0 or 'Error' in output:
+            problems.append(f"writer {writer} failed:\n{output.strip()}")
+        removed_ids += [int(line.split()[-1]) for line in output.splitlines() if line.startswith('removed id ')]
+    elapsed = time.time() - start_at
+    return problems + check_store(todo, writers, count, removed_ids), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many concurrent writers and check no task is lost')
+    parser.add_argument('--writers', type=int, default=32, help='Parallel writer processes (default: 32)')
+    parser.add_argument('--tasks', type=int, default=5, help='Tasks each writer adds (default: 5)')
+    parser.add_argument('--storage', default='json,journal,sqlite',
+                        help='Comma-separated backends (default: json,journal,sqlite)')
+    parser.add_argument('--worker', nargs=3, metavar=('WRITER', 'TASKS', 'START'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        writer, count, start_at = args.worker
+        run_writer(int(writer), int(count), float(start_at))
+        return 0
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        config = data_dir / 'config.json'
+        config.write_text(json.dumps({'require_auth': False}))
+        # Read by the writer processes as well as by this one
+        os.environ.update({
+            'TODO_CONFIG_FILE': str(config),
+            'TODO_FILE': str(data_dir / 'tasks.json'),
+            'TODO_DB_FILE': str(data_dir / 'tasks.db'),
+            'TODO_DAEMON': 'off',
+        })
+        from python_ver import todo
+
+        for backend in args.storage.split(','):
+            problems, elapsed = stress(todo, data_dir, backend, args.writers, args.tasks)
+            status = 'OK' if not problems else f"FAILED ({len(problems)} problems)"
+            print(f"{backend:<8} {args.writers} writers x {args.tasks} tasks   {elapsed:6.2f} s   {status}")
+            for problem in problems:
+                print(f"  - {problem}")
+            failed = failed or bool(problems)
+        if todo._storage is not None and hasattr(todo._storage, 'close'):
+            todo._storage.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Synthetic task stores for benchmarks.
+
+Generates deterministic task lists with the same shape as real data: tags,
+priorities, a mix of pending and completed tasks (with completion times) and
+``depends_on`` edges. Edges always point at an earlier id, so the graph is
+acyclic.
+
+    python python_ver/benchmarks/synthetic.py 100000 -o /tmp/tasks.json
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TAGS = [
+    'work', 'home', 'urgent', 'backend', 'frontend', 'testing', 'docs', 'ops',
+    'bug', 'feature', 'review', 'meeting', 'errand', 'finance', 'health', 'study',
+] + [f'project-{n}' for n in range(32)]
+PRIORITIES = ['High', 'Medium', 'Medium', 'Low']
+WORDS = ['write', 'fix', 'review', 'call', 'plan', 'update', 'deploy', 'buy', 'read',
+         'report', 'tests', 'docs', 'server', 'groceries', 'invoice', 'release', 'notes']
+
+# Every 10th task depends on one or two earlier tasks; the benchmarks rely on
+# the other ids having no prerequisites.
+DEPENDENT_EVERY = 10
+
+
+def generate_tasks(count, seed=0):
+    """Return ``count`` task dicts in the format stored in tasks.json."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    tasks = []
+    for task_id in range(count):
+        depends_on = []
+        if task_id and task_id % DEPENDENT_EVERY == 0:
+            window = max(0, task_id - 1000)
+            depends_on = sorted(set(rng.randrange(window, task_id) for _ in range(rng.randint(1, 2))))
+        created_at = start + timedelta(minutes=7 * task_id)
+        task = {
+            'id': task_id,
+            'task': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f' #{task_id}',
+            'priority': rng.choice(PRIORITIES),
+            'completed': rng.random() < 0.4,
+            'tags': rng.sample(TAGS, rng.randint(0, 3)),
+            'created_at': created_at.isoformat(),
+            'depends_on': depends_on,
+        }
+        if task['completed']:
+            # Derived from the id so the random sequence (and the rest of the data) is unchanged
+            task['completed_at'] = (created_at + timedelta(minutes=(task_id * 7919) % 20000 + 5)).isoformat()
+        tasks.append(task)
+    return tasks
+
+
+def write_store(path, count, seed=0):
+    """Write a synthetic tasks.json with ``count`` tasks and return the tasks."""
+    tasks = generate_tasks(count, seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(tasks, f, indent=2)
+    return tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic tasks.json')
+    parser.add_argument('count', type=int, help='Number of tasks')
+    parser.add_argument('-o', '--output', default='tasks.json', help='Output file (default: tasks.json)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+    write_store(args.output, args.count, args.seed)
+    print(f"Wrote {args.count} tasks to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Optional background server for the Python todo app.
+
+``todo.py serve`` starts a process that keeps the task list, dependency graph
+and translations in memory and answers requests on a Unix domain socket.
+Regular commands look for the socket first and, when a server is listening,
+send it their arguments instead of loading everything themselves.
+
+The protocol is JSON-RPC 2.0 with one JSON object per line:
+
+    -> {"jsonrpc": "2.0", "id": 1, "method": "run", "params": {"argv": ["list"], "lang": "en", "color": true,
+        "store": {"backend": "json", "path": "/home/me/tasks.json"}}}
+    <- {"jsonrpc": "2.0", "id": 1, "result": {"output": "...", "exit_code": 0}}
+
+Methods: ``run`` (execute a CLI command and return what it printed),
+``ping`` and ``shutdown``.
+
+``store`` names the task store the client would use. A server serving another
+store (the socket is shared by every store in a folder) refuses the request
+with WRONG_STORE before running anything, and the client runs the command
+itself.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+from pathlib import Path
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Server-defined: the request is for a store this server does not serve
+WRONG_STORE = -32001
+
+
+class DaemonUnavailable(Exception):
+    """No server is listening on the socket; the caller should do the work itself."""
+
+
+class DaemonError(Exception):
+    """The server accepted a request but it failed."""
+
+
+# --- Client ---
+
+def call(socket_path, method, params=None, timeout=30):
+    """Send one request and return its result."""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        raise DaemonUnavailable(f"no socket at {socket_path}")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path))
+        except OSError as e:
+            raise DaemonUnavailable(str(e))
+
+        # From here on the request may already be running, so never fall back
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or {}}
+        try:
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            reply = sock.makefile('rb').readline()
+        except OSError as e:
+            raise DaemonError(f"lost connection to the server: {e}")
+    finally:
+        sock.close()
+
+    if not reply:
+        raise DaemonError("the server closed the connection without replying")
+    response = json.loads(reply)
+    if 'error' in response:
+        if response['error'].get('code') == WRONG_STORE:
+            # Refused before running, so the caller can safely do the work itself
+            raise DaemonUnavailable(response['error'].get('message', 'another store'))
+        raise DaemonError(response['error'].get('message', 'unknown error'))
+    return response['result']
+
+
+def run(socket_path, argv, lang=None, color=True, store=None):
+    """
+    Run a CLI command on the server; returns (output, exit_code). Raises
+    DaemonUnavailable if the server serves another ``store``.
+    """
+    result = call(socket_path, 'run', {'argv': list(argv), 'lang': lang, 'color': color, 'store': store})
+    return result['output'], result['exit_code']
+
+
+# --- Server ---
+
+class TodoServer:
+    """
+    Serves JSON-RPC requests on a Unix domain socket.
+
+    ``run_command(argv, lang, color)`` executes one CLI command and returns
+    its exit code; everything it prints is sent back to the client. Requests
+    are handled one at a time on the event loop, so commands never run
+    concurrently. ``run`` requests for a store other than ``store`` are
+    refused.
+    """
+
+    def __init__(self, socket_path, run_command, store=None):
+        self.socket_path = Path(socket_path)
+        self.run_command = run_command
+        self.store = store
+        self._stopped = None
+        self._stopping = False
+
+    async def serve_forever(self):
+        # asyncio is slow to import and only the server needs it; CLI
+        # commands use this module just for the small blocking client above
+        import asyncio
+
+        self._stopped = asyncio.Event()
+        self._clear_stale_socket()
+        # Create the socket as 0600 so other local users cannot talk to it
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle_client, path=str(self.socket_path))
+        finally:
+            os.umask(umask)
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+    def _clear_stale_socket(self):
+        if not self.socket_path.exists():
+            return
+        try:
+            call(self.socket_path, 'ping', timeout=2)
+        except (DaemonUnavailable, DaemonError, ValueError):
+            self.socket_path.unlink()
+            return
+        raise RuntimeError(f"A server is already listening on {self.socket_path}")
+
+    async def _handle_client(self, reader, writer):
+        from asyncio import CancelledError
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = self._dispatch(line)
+                if response is not None:
+                    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                    await writer.drain()
+                if self._stopping:
+                    # Reply first, then let serve_forever() close the socket
+                    self._stopped.set()
+                    break
+        except (ConnectionError, CancelledError):
+            # Client went away, or the server is shutting down under an idle connection
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return _error(None, PARSE_ERROR, "Parse error")
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error(None, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get('id')
+        params = request.get('params') or {}
+        method = request['method']
+        if method == 'ping':
+            response = _result(request_id, {'pid': os.getpid()})
+        elif method == 'shutdown':
+            self._stopping = True
+            response = _result(request_id, {'stopping': True})
+        elif method == 'run':
+            response = self._run(request_id, params)
+        else:
+            response = _error(request_id, METHOD_NOT_FOUND, f"Unknown method '{method}'")
+        # Requests without an id are notifications and get no reply
+        return response if 'id' in request else None
+
+    def _run(self, request_id, params):
+        argv = params.get('argv') if isinstance(params, dict) else None
+        if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+            return _error(request_id, INVALID_PARAMS, "'argv' must be a list of strings")
+        if params.get('store') != self.store:
+            return _error(request_id, WRONG_STORE, f"this server serves {self.store}")
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                exit_code = self.run_command(argv, params.get('lang'), params.get('color') is not False)
+        except Exception as e:
+            return _error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        return _result(request_id, {'output': output.getvalue(), 'exit_code': exit_code})
+
+
+def _result(request_id, result):
+    return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+
+def _error(request_id, code, message):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
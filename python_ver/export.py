@@ -0,0 +1,139 @@
+"""
+Machine-readable output for scripts: ``--format ndjson|csv|json`` on list,
+stats and search.
+
+The writers take an iterator of tasks (or report rows) and write each record
+as soon as it is read, in chunks of CHUNK_ROWS, so an export of any size uses
+about as much memory as one chunk and never builds coloured strings.
+
+- ndjson: one JSON object per line;
+- csv: a header line, then one line per record; list fields (tags,
+  depends_on) are joined with ';';
+- json: a single array, one object per line.
+
+Task ids are the numbers the other commands take (the ones list shows), and
+so are the ids in depends_on. Archived tasks (``search --include-archive``)
+have no number any more: their id is null (empty in CSV).
+"""
+
+import csv
+import json
+import sys
+from itertools import islice
+
+FORMATS = ('ndjson', 'csv', 'json')
+
+TASK_FIELDS = ('id', 'task', 'priority', 'completed', 'tags', 'depends_on', 'created_at', 'completed_at')
+
+# Records written per write() call
+CHUNK_ROWS = 1000
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _display_id(task):
+    number = task.get('id', 0)
+    return None if number is None else number + 1
+
+
+def task_records(tasks):
+    """TASK_FIELDS dicts for ``tasks``."""
+    for task in tasks:
+        yield {
+            'id': _display_id(task),
+            'task': task['task'],
+            'priority': task.get('priority', 'Medium'),
+            'completed': bool(task.get('completed', False)),
+            'tags': list(task.get('tags') or ()),
+            'depends_on': [prereq + 1 for prereq in task.get('depends_on') or ()],
+            'created_at': task.get('created_at'),
+            'completed_at': task.get('completed_at'),
+        }
+
+
+def task_rows(tasks):
+    """TASK_FIELDS tuples for ``tasks``, with the list fields joined for CSV."""
+    for task in tasks:
+        yield (
+            _display_id(task),
+            task['task'],
+            task.get('priority', 'Medium'),
+            bool(task.get('completed', False)),
+            ';'.join(task.get('tags') or ()),
+            ';'.join(str(prereq + 1) for prereq in task.get('depends_on') or ()),
+            task.get('created_at'),
+            task.get('completed_at'),
+        )
+
+
+def write_tasks(tasks, fmt, out=None):
+    """Write ``tasks`` (an iterator, read once) in format ``fmt``; returns how many were written."""
+    if fmt == 'csv':
+        return write_rows(TASK_FIELDS, task_rows(tasks), fmt, out)
+    return write_objects(task_records(tasks), fmt, out)
+
+
+def write_rows(fields, rows, fmt, out=None):
+    """Write ``rows`` (tuples of values in ``fields`` order); returns how many were written."""
+    if fmt != 'csv':
+        return write_objects((dict(zip(fields, row)) for row in rows), fmt, out)
+    out = out or sys.stdout
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(fields)
+    count = 0
+    while True:
+        chunk = list(islice(rows, CHUNK_ROWS))
+        if not chunk:
+            return count
+        writer.writerows(chunk)
+        count += len(chunk)
+
+
+def write_objects(records, fmt, out=None):
+    """Write dicts as NDJSON or as a JSON array; returns how many were written."""
+    out = out or sys.stdout
+    array = fmt == 'json'
+    if array:
+        out.write('[')
+    count = 0
+    lines = []
+    for record in records:
+        lines.append(_encode(record))
+        if len(lines) >= CHUNK_ROWS:
+            count = _write_lines(out, lines, count, array)
+            lines = []
+    count = _write_lines(out, lines, count, array)
+    if array:
+        out.write('\n]\n' if count else ']\n')
+    return count
+
+
+def _write_lines(out, lines, count, array):
+    if lines:
+        if array:
+            out.write(('\n' if not count else ',\n') + ',\n'.join(lines))
+        else:
+            out.write('\n'.join(lines) + '\n')
+    return count + len(lines)
+
+
+def write_object(record, fmt, out=None):
+    """
+    Write one summary record: as a single JSON object (one line for ndjson),
+    or for CSV as name,value lines with nested keys joined by '.'.
+    """
+    out = out or sys.stdout
+    if fmt == 'json':
+        out.write(json.dumps(record, ensure_ascii=False, indent=2) + '\n')
+    elif fmt == 'ndjson':
+        out.write(_encode(record) + '\n')
+    else:
+        write_rows(('name', 'value'), _flatten(record), 'csv', out)
+
+
+def _flatten(record, prefix=''):
+    for name, value in record.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{name}.")
+        else:
+            yield f"{prefix}{name}", value
@@ -0,0 +1,204 @@
+"""
+Dependency graph for tasks.
+
+Edges point from a prerequisite to the task that depends on it. Besides the
+forward/reverse adjacency sets the graph keeps, for every task, the number of
+prerequisites that are still incomplete, so "is this task blocked?" and "which
+tasks are ready?" never need to walk the graph.
+
+Cycle detection is incremental: the graph maintains a topological order and
+only reorders the affected region when an edge is added (Pearce & Kelly,
+"A dynamic topological sort algorithm for directed acyclic graphs"). Adding an
+edge that already agrees with the order costs O(1).
+"""
+
+
+class DependencyGraph:
+    """Prerequisite graph keyed by task id."""
+
+    def __init__(self):
+        self.prereqs = {}      # task -> set of tasks it depends on
+        self.dependents = {}   # task -> set of tasks that depend on it
+        self.completed = {}    # task -> completion flag
+        self.blocked = {}      # task -> number of incomplete prerequisites
+        self._ready = set()    # pending tasks with no incomplete prerequisites
+        self._ord = None       # task -> position in topological order (built lazily)
+        self._next_ord = 0
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Build the graph from task dicts in O(tasks + edges)."""
+        graph = cls()
+        for task in tasks:
+            graph.add_node(task['id'], task.get('completed', False))
+        for task in tasks:
+            for prereq in task.get('depends_on', []):
+                if prereq in graph.completed and prereq != task['id']:
+                    graph._link(prereq, task['id'])
+        return graph
+
+    def __contains__(self, node):
+        return node in self.completed
+
+    def add_node(self, node, completed=False):
+        self.prereqs[node] = set()
+        self.dependents[node] = set()
+        self.completed[node] = bool(completed)
+        self.blocked[node] = 0
+        if not completed:
+            self._ready.add(node)
+        if self._ord is not None:
+            self._ord[node] = self._next_ord
+            self._next_ord += 1
+
+    def remove_node(self, node):
+        for prereq in list(self.prereqs[node]):
+            self.remove_edge(node, prereq)
+        for dependent in list(self.dependents[node]):
+            self.remove_edge(dependent, node)
+        for index in (self.prereqs, self.dependents, self.completed, self.blocked):
+            del index[node]
+        self._ready.discard(node)
+        if self._ord is not None:
+            del self._ord[node]
+
+    def add_edge(self, task, prereq):
+        """
+        Make ``task`` depend on ``prereq``.
+
+        Returns False (and leaves the graph unchanged) if the edge would create
+        a cycle.
+        """
+        if task == prereq:
+            return False
+        if prereq in self.prereqs[task]:
+            return True
+        order = self._order()
+        if order[prereq] > order[task] and not self._reorder(prereq, task):
+            return False
+        self._link(prereq, task)
+        return True
+
+    def remove_edge(self, task, prereq):
+        if prereq not in self.prereqs[task]:
+            return
+        self.prereqs[task].discard(prereq)
+        self.dependents[prereq].discard(task)
+        if not self.completed[prereq]:
+            self._adjust_blocked(task, -1)
+
+    def set_completed(self, node, completed):
+        """Update the completion flag and the blocked counters of dependents."""
+        completed = bool(completed)
+        if self.completed[node] == completed:
+            return
+        self.completed[node] = completed
+        if completed:
+            self._ready.discard(node)
+        elif self.blocked[node] == 0:
+            self._ready.add(node)
+        delta = -1 if completed else 1
+        for dependent in self.dependents[node]:
+            self._adjust_blocked(dependent, delta)
+
+    def incomplete_prereqs(self, node):
+        return [p for p in self.prereqs[node] if not self.completed[p]]
+
+    def ready(self):
+        """Pending tasks whose prerequisites are all complete."""
+        return set(self._ready)
+
+    def chain(self, node):
+        """All transitive prerequisites of ``node``, in topological order."""
+        seen = set()
+        stack = list(self.prereqs[node])
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.prereqs[current] - seen)
+        order = self._order()
+        return sorted(seen, key=order.__getitem__)
+
+    def topological_order(self):
+        """Every task, prerequisites before the tasks that depend on them."""
+        order = self._order()
+        return sorted(order, key=order.__getitem__)
+
+    def _link(self, prereq, task):
+        self.prereqs[task].add(prereq)
+        self.dependents[prereq].add(task)
+        if not self.completed[prereq]:
+            self._adjust_blocked(task, 1)
+
+    def _adjust_blocked(self, node, delta):
+        self.blocked[node] += delta
+        if self.completed[node]:
+            return
+        if self.blocked[node] == 0:
+            self._ready.add(node)
+        else:
+            self._ready.discard(node)
+
+    def _order(self):
+        """Return the topological order, computing it with Kahn's algorithm on first use."""
+        if self._ord is not None:
+            return self._ord
+        indegree = {node: len(prereqs) for node, prereqs in self.prereqs.items()}
+        queue = [node for node, degree in indegree.items() if degree == 0]
+        order = {}
+        while queue:
+            node = queue.pop()
+            order[node] = len(order)
+            for dependent in self.dependents[node]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+        # Stored data may already contain a cycle; keep those tasks at the end
+        for node in self.prereqs:
+            if node not in order:
+                order[node] = len(order)
+        self._ord = order
+        self._next_ord = len(order)
+        return order
+
+    def _reorder(self, prereq, task):
+        """
+        Restore the topological order before adding prereq -> task, where
+        prereq currently sorts after task. Returns False on a cycle.
+        """
+        order = self._ord
+        lower, upper = order[task], order[prereq]
+
+        # Tasks reachable from `task` that sort no later than `prereq`
+        forward, stack = [], [task]
+        seen = {task}
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            for dependent in self.dependents[node]:
+                if dependent == prereq:
+                    return False
+                if dependent not in seen and order[dependent] < upper:
+                    seen.add(dependent)
+                    stack.append(dependent)
+
+        # Tasks that reach `prereq` and sort no earlier than `task`
+        backward, stack = [], [prereq]
+        seen = {prereq}
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for parent in self.prereqs[node]:
+                if parent not in seen and order[parent] > lower:
+                    seen.add(parent)
+                    stack.append(parent)
+
+        # Reuse the same slots: everything reaching `prereq` moves in front
+        forward.sort(key=order.__getitem__)
+        backward.sort(key=order.__getitem__)
+        slots = sorted(order[node] for node in backward + forward)
+        for node, slot in zip(backward + forward, slots):
+            order[node] = slot
+        return True
@@ -1,71 +1,184 @@
 import json
+import marshal
 import os
+import re
 import sys
 
+# Where the translations live; TODO_TRANSLATIONS_FILE points at another file.
+TRANSLATIONS_FILE = os.environ.get(
+    'TODO_TRANSLATIONS_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'translations.json'))
+
+# Bump when the layout of the cached catalogs changes
+CATALOG_VERSION = 1
+
+# "{name}" placeholders
+_PLACEHOLDER = re.compile(r'\{([A-Za-z_]\w*)\}')
+
 # These are our "global" variables, just like in the JS file.
-_translations = {}
+# Nothing is read until the first string is needed, so commands that never
+# print a translated message don't pay for it. Then only the compiled
+# catalog of the active language is loaded (see _load_catalog()).
+_translations = None
+_catalog = None
+_catalogs = {}  # language -> catalog, for the languages used so far
 _current_lang = 'en'  # This is the default language
 _DEFAULT_LANG = 'en'
 
 def load_translations():
     """Loads the translation file from the project root."""
-    
+
     # This 'global' keyword lets us modify the _translations variable
     global _translations
-    
+    _translations = {}
+
     try:
-        # Get the absolute path to *this* file (i18n.py)
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Build a safe path from this file up to the root
-        file_path = os.path.join(base_dir, '..', 'translations.json')
-        
         # Open the file for reading with 'utf-8' encoding
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(TRANSLATIONS_FILE, 'r', encoding='utf-8') as f:
             _translations = json.load(f)
-            
+
     except Exception as e:
         # If anything goes wrong (file not found, bad JSON),
         print(f"[i18n] WARNING: Could not load translations.json. Error: {e}", file=sys.stderr)
 
 def set_language(lang_code: str):
     """Sets the active language for the session."""
-    
-    global _current_lang
-    
-    # Check if the lang_code is valid AND exists in our dictionary
-    if lang_code and lang_code in _translations:
-        _current_lang = lang_code
-    else:
-        _current_lang = _DEFAULT_LANG
+
+    global _current_lang, _catalog
+
+    # Unknown codes fall back to English when the catalog is loaded
+    _current_lang = lang_code or _DEFAULT_LANG
+    _catalog = _catalogs.get(_current_lang)
 
 def t(key: str, variables: dict = None) -> str:
     """
     Gets the translated string, replacing placeholders with variables.
     e.g., t('greeting', {'name': 'User'})
     """
-    
-    if variables is None:
-        variables = {}
-
-    # 1. Try to find the key in the current language
-    message = _translations.get(_current_lang, {}).get(key)
-    
-    # 2. If not found, fall back to English
-    if message is None:
-        message = _translations.get(_DEFAULT_LANG, {}).get(key)
-        
-    # 3. If still not found, return a warning
+
+    catalog = _catalog if _catalog is not None else _load_catalog()
+
+    # English strings are already merged into every catalog
+    message = catalog.get(key)
     if message is None:
         return f"MISSING_KEY: {key}"
-        
-    # --- THIS IS THE NEW PART ---
-    # 4. Loop through all variables and replace placeholders
-    # It will find "{command}" and replace it with the value of variables['command']
-    for var_name, value in variables.items():
-        message = message.replace(f"{{{var_name}}}", str(value))
-    
-    return message
 
+    # Strings without placeholders are stored as they are
+    if type(message) is str:
+        return message
+
+    # Otherwise (text, %-style template): fill every slot in one pass
+    text, template = message
+    if not variables:
+        return text
+    try:
+        return template % variables
+    except KeyError:
+        # Some placeholder has no variable: leave it as it is
+        for var_name, value in variables.items():
+            text = text.replace(f"{{{var_name}}}", str(value))
+        return text
+
+
+def compile_messages(messages):
+    """
+    Catalog entries for ``messages`` (key -> text): the text itself if it has
+    no placeholders, else (text, template with a %(name)s slot for each).
+    """
+    catalog = {}
+    for key, text in messages.items():
+        if not isinstance(text, str):
+            continue
+        if not _PLACEHOLDER.search(text):
+            catalog[key] = text
+            continue
+        parts = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(text):
+            parts.append(text[pos:match.start()].replace('%', '%%'))
+            parts.append(f"%({match.group(1)})s")
+            pos = match.end()
+        parts.append(text[pos:].replace('%', '%%'))
+        catalog[key] = (text, ''.join(parts))
+    return catalog
 
-load_translations()
\ No newline at end of file
+
+def catalog_path(lang):
+    """Where the compiled catalog of ``lang`` is cached (like .pyc files)."""
+    directory, name = os.path.split(os.path.abspath(TRANSLATIONS_FILE))
+    return os.path.join(directory, '__pycache__', f"{name}.{lang}.catalog")
+
+
+def _source_stamp():
+    """Identifies the current contents of the translations file, or None if it is missing."""
+    try:
+        stat = os.stat(TRANSLATIONS_FILE)
+    except OSError:
+        return None
+    return [CATALOG_VERSION, os.path.abspath(TRANSLATIONS_FILE), stat.st_mtime_ns, stat.st_size]
+
+
+def _read_catalog(lang, stamp):
+    """(languages, catalog) cached for ``lang``, or None if missing or stale."""
+    try:
+        with open(catalog_path(lang), 'rb') as f:
+            cached = marshal.loads(f.read())
+        if cached['stamp'] != stamp:
+            return None
+        return cached['languages'], cached['messages']
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        return None
+
+
+def compile_catalogs(stamp):
+    """
+    Parse the translations file once and cache a compiled catalog for every
+    language in it (English merged under each). Returns {lang: catalog}.
+    """
+    load_translations()
+    languages = sorted(lang for lang, messages in _translations.items() if isinstance(messages, dict))
+    default = _translations.get(_DEFAULT_LANG, {})
+    catalogs = {lang: compile_messages({**default, **_translations[lang]}) for lang in languages}
+    if stamp is not None:
+        for lang, messages in catalogs.items():
+            try:
+                _write_catalog(catalog_path(lang), {'stamp': stamp, 'languages': languages,
+                                                    'messages': messages})
+            except OSError:
+                pass  # only a cache; the strings still work without it
+    return catalogs
+
+
+def _write_catalog(path, cached):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(marshal.dumps(cached))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_catalog():
+    """Load (or compile) the catalog of the active language and make it current."""
+    global _catalog, _current_lang
+    stamp = _source_stamp()
+    cached = _read_catalog(_current_lang, stamp) if stamp is not None else None
+    if cached is None and _current_lang != _DEFAULT_LANG and stamp is not None:
+        # An unknown language has no catalog of its own; English tells which exist
+        cached = _read_catalog(_DEFAULT_LANG, stamp)
+        if cached is not None and _current_lang in cached[0]:
+            cached = None  # the language exists, only its cache is stale or missing
+    if cached is not None:
+        languages, catalog = cached
+        if _current_lang not in languages:
+            _current_lang = _DEFAULT_LANG
+    else:
+        catalogs = compile_catalogs(stamp)
+        if _current_lang not in catalogs:
+            _current_lang = _DEFAULT_LANG
+        catalog = catalogs.get(_current_lang, {})
+    _catalog = _catalogs[_current_lang] = catalog
+    return catalog
@@ -0,0 +1,202 @@
+"""
+Bulk import of tasks from CSV, JSON, NDJSON and todo.txt files.
+
+read_records() streams the file and yields one record per task as it is
+read; new_task() turns a record into a task dict, raising ValueError with a
+user-facing message when a value can't be used. The caller validates the
+task with the same rules as ``add``, skips duplicates and saves everything
+at once.
+
+- csv: a header line naming the columns. ``task`` (or ``description``) is
+  required; ``priority``, ``completed``, ``tags`` (joined with ';'),
+  ``created_at`` and ``completed_at`` are optional. Files written by
+  ``list --format csv`` import as they are.
+- json: an array of objects with the same fields (``tags`` a list), or one
+  object per line (ndjson).
+- todotxt: the todo.txt format. ``x`` marks a completed task, ``(A)`` is High,
+  ``(B)`` Medium and ``(C)``-``(Z)`` Low, the dates become created_at and
+  completed_at, and ``+project`` and ``@context`` words become tags.
+
+Ids and depends_on in the file are ignored: imported tasks get new ids, and
+ids in the file refer to the list the file came from.
+"""
+
+import csv
+import json
+import re
+from datetime import datetime
+
+from .storage import iter_json_array
+
+FORMATS = ('csv', 'json', 'ndjson', 'todotxt')
+
+_SUFFIXES = {'.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.txt': 'todotxt'}
+
+_BOOLEANS = {**dict.fromkeys(['true', 'yes', 'y', '1', 'x', 'done'], True),
+             **dict.fromkeys(['false', 'no', 'n', '0', ''], False)}
+
+_TODO_TXT_PRIORITIES = {'A': 'High', 'B': 'Medium'}
+_TODO_TXT_START = re.compile(r'(x )?(?:\(([A-Z])\) )?(?:(\d{4}-\d{2}-\d{2}) )?(?:(\d{4}-\d{2}-\d{2}) )?')
+
+
+def detect_format(path):
+    """Format of ``path`` from its extension, or None."""
+    for suffix, fmt in _SUFFIXES.items():
+        if str(path).lower().endswith(suffix):
+            return fmt
+    return None
+
+
+def read_records(f, fmt):
+    """
+    Yield (where, record) for each task in text file ``f``: ``where`` is the
+    line or array entry it came from (for messages), ``record`` a dict of
+    field name to raw value.
+
+    Raises ValueError (json.JSONDecodeError for JSON) if the file as a whole
+    can't be read as ``fmt``.
+    """
+    if fmt == 'csv':
+        return _read_csv(f)
+    if fmt == 'todotxt':
+        return _read_todo_txt(f)
+    if fmt == 'json':
+        # A .json file may hold one object per line rather than an array
+        if f.seekable() and not _is_array(f):
+            return _read_ndjson(f)
+        return _read_json_array(f)
+    return _read_ndjson(f)
+
+
+def _is_array(f):
+    """Whether the file starts with '[' (the position is put back to the start)."""
+    first = f.read(1)
+    while first.isspace():
+        first = f.read(1)
+    f.seek(0)
+    return first == '['
+
+
+def _read_csv(f):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [name.strip().lower() for name in header]
+    if 'task' not in fields and 'description' not in fields:
+        raise ValueError("the CSV header has no 'task' or 'description' column")
+    try:
+        for row in reader:
+            if row:
+                yield f"line {reader.line_num}", dict(zip(fields, row))
+    except csv.Error as e:
+        raise ValueError(f"line {reader.line_num}: {e}") from None
+
+
+def _read_json_array(f):
+    for number, record in enumerate(iter_json_array(f), start=1):
+        yield f"entry {number}", record
+
+
+def _read_ndjson(f):
+    for number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = ValueError(f"Error: Invalid JSON ({e})")
+            yield f"line {number}", record
+
+
+def _read_todo_txt(f):
+    for number, line in enumerate(f, start=1):
+        line = line.strip()
+        if line:
+            yield f"line {number}", parse_todo_txt(line)
+
+
+def parse_todo_txt(line):
+    """The record for one todo.txt line."""
+    start = _TODO_TXT_START.match(line)
+    completed, letter, first_date, second_date = start.groups()
+    record = {'completed': completed is not None}
+    # A completed task lists its completion date first, then its creation date
+    if completed:
+        record['completed_at'], record['created_at'] = first_date, second_date
+    else:
+        record['created_at'] = first_date
+    words, tags = [], []
+    for word in line[start.end():].split():
+        if len(word) > 1 and word[0] in '+@':
+            tags.append(word[1:])
+        elif letter is None and word.startswith('pri:') and len(word) == 5 and word[4].isupper():
+            # Kept by some clients when a prioritised task is completed
+            letter = word[4]
+        else:
+            words.append(word)
+    record['task'] = ' '.join(words)
+    record['priority'] = _TODO_TXT_PRIORITIES.get(letter, 'Low') if letter else 'Medium'
+    record['tags'] = tags
+    return record
+
+
+def new_task(record, now):
+    """
+    The task for an imported record (not yet validated as a new task):
+    ``now`` is the created_at of records that have none.
+    """
+    if isinstance(record, ValueError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("Error: Expected an object with a 'task' field")
+    description = record.get('task')
+    if description is None:
+        description = record.get('description')
+    if not isinstance(description, str):
+        raise ValueError("Error: Task description cannot be empty")
+
+    priority = record.get('priority') or 'Medium'
+    completed = record.get('completed', False)
+    if completed is not True and completed is not False:
+        completed = _boolean(completed)
+    tags = record.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tag for tag in map(str.strip, tags.split(';')) if tag]
+    elif not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("Error: Tags must be a list of strings")
+
+    created_at = _timestamp(record.get('created_at'), 'created_at') or now
+    task = {
+        'task': description,
+        'priority': priority,
+        'completed': completed,
+        'tags': tags,
+        'created_at': created_at,
+        'depends_on': [],
+    }
+    if completed:
+        task['completed_at'] = _timestamp(record.get('completed_at'), 'completed_at') or created_at
+    return task
+
+
+def _boolean(value):
+    completed = _BOOLEANS.get(str(value).strip().lower())
+    if completed is not None:
+        return completed
+    raise ValueError(f"Error: Invalid completed value '{value}'. Use true or false")
+
+
+def _timestamp(value, name):
+    """An ISO timestamp as the app stores them, or None if ``value`` is empty."""
+    if value is None or value == '':
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Error: Invalid {name} '{value}'. Use an ISO date such as 2024-05-31") from None
+    # Most files hold timestamps exactly as isoformat() writes them, and
+    # formatting one again costs more than parsing it
+    if len(value) in (19, 26) and value[4] == '-' and value[7] == '-' and value[10] == 'T' \
+            and value[19:20] in ('', '.'):
+        return value
+    return parsed.isoformat()
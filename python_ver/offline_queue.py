@@ -0,0 +1,226 @@
+"""
+Replay of the offline operation queue (``offline_queue.json``).
+
+The queue is a JSON array of operations recorded while the tasks could not be
+saved, each with a ``timestamp``, an ``operation`` (add, edit/update,
+complete/uncomplete, delete/remove), the ``task_id`` it applies to and, for
+add and edit, the ``task_data``. Queued task ids are UUIDs from the device
+that recorded them; a replayed task keeps its UUID in its ``sync_id`` field,
+so replaying the same operations again updates it instead of adding a copy.
+
+The queue is streamed and the operations are coalesced per task while they
+are read: every field keeps only the value from its newest operation, so an
+add followed by edits and a completion ends up as a single upsert, and a task
+added and deleted within the queue is never written at all. Timestamps decide
+which value wins, so operations logged out of order still replay correctly.
+The result is applied to a loaded TaskList and saved once by the caller.
+
+Each upsert is checked like an imported record (importer.new_task() and the
+rules of ``add``) before it is applied, and only the task fields in
+TASK_FIELDS are stored: the rest of a queued record (history, sharing, due
+dates) belongs to the app that recorded it.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from .importer import new_task
+from .storage import iter_json_array
+
+ADD_OPERATIONS = {'add', 'create'}
+EDIT_OPERATIONS = {'edit', 'update'}
+DELETE_OPERATIONS = {'delete', 'remove'}
+# Operations that set the completion status, and the status they set
+COMPLETE_OPERATIONS = {'complete': True, 'uncomplete': False}
+
+# task_data keys that describe the queued record rather than the task
+_QUEUE_FIELDS = {'id', 'synced'}
+
+# Fields a replayed task takes from the queue (queued depends_on refer to task
+# ids on another device)
+TASK_FIELDS = ('task', 'priority', 'completed', 'tags', 'created_at', 'completed_at')
+
+
+class CoalescedTask:
+    """Net effect of every queued operation on one task."""
+
+    __slots__ = ('fields', 'added', 'added_at', 'deleted_at', 'created_at')
+
+    def __init__(self):
+        self.fields = {}  # name -> (timestamp, value)
+        self.added = False
+        self.added_at = None  # newest add
+        self.deleted_at = None
+        self.created_at = None
+
+    def add(self, timestamp, data):
+        if self.deleted_at is not None and timestamp < self.deleted_at:
+            return
+        self.deleted_at = None
+        self.added = True
+        self.added_at = timestamp if self.added_at is None else max(self.added_at, timestamp)
+        self.created_at = timestamp if self.created_at is None else min(self.created_at, timestamp)
+        # An add carries the whole task: older values of fields it lacks are gone
+        self.fields = {name: field for name, field in self.fields.items() if field[0] > timestamp}
+        self.set(timestamp, data)
+
+    def set(self, timestamp, data):
+        if self.deleted_at is not None:
+            return
+        for name, value in data.items():
+            if name in _QUEUE_FIELDS:
+                continue
+            current = self.fields.get(name)
+            if current is None or current[0] <= timestamp:
+                self.fields[name] = (timestamp, value)
+
+    def delete(self, timestamp):
+        # Logged out of order: the task was added again after this delete
+        if self.added_at is not None and timestamp < self.added_at:
+            return
+        if self.deleted_at is None or timestamp > self.deleted_at:
+            self.deleted_at = timestamp
+        self.fields = {name: field for name, field in self.fields.items() if field[0] > timestamp}
+
+    def values(self):
+        return {name: value for name, (_, value) in self.fields.items()}
+
+
+class QueueReplay:
+    """Result of reading the queue: what to apply and how much of the file was read."""
+
+    def __init__(self):
+        self.tasks = {}  # task_id -> CoalescedTask
+        self.read = 0  # array entries read, synced or not
+        self.used = 0
+        self.skipped = 0
+
+
+def read_queue(path):
+    """
+    Stream the queue at ``path`` and coalesce its unsynced operations.
+
+    Raises OSError or json.JSONDecodeError if the file can't be read.
+    """
+    replay = QueueReplay()
+    with open(path, 'r', encoding='utf-8') as f:
+        for operation in iter_json_array(f):
+            replay.read += 1
+            if isinstance(operation, dict) and operation.get('synced'):
+                continue
+            parsed = _parse(operation)
+            if parsed is None:
+                replay.skipped += 1
+                continue
+            kind, task_id, timestamp, data = parsed
+            entry = replay.tasks.get(task_id)
+            if entry is None:
+                entry = replay.tasks[task_id] = CoalescedTask()
+            if kind in ADD_OPERATIONS:
+                entry.add(timestamp, data)
+            elif kind in EDIT_OPERATIONS:
+                entry.set(timestamp, data)
+            elif kind in COMPLETE_OPERATIONS:
+                completed = COMPLETE_OPERATIONS[kind]
+                entry.set(timestamp, {**data, 'completed': completed,
+                                      'completed_at': datetime.fromtimestamp(timestamp).isoformat()
+                                      if completed else None})
+            else:
+                entry.delete(timestamp)
+            replay.used += 1
+    return replay
+
+
+def _parse(operation):
+    """(operation, task_id, timestamp, task data) of a queued operation, or None if it is malformed."""
+    if not isinstance(operation, dict):
+        return None
+    kind = str(operation.get('operation', '')).lower()
+    task_id = operation.get('task_id')
+    timestamp = operation.get('timestamp')
+    data = operation.get('task_data') or operation.get('changes') or {}
+    known = kind in ADD_OPERATIONS or kind in EDIT_OPERATIONS or kind in COMPLETE_OPERATIONS \
+        or kind in DELETE_OPERATIONS
+    if not known or task_id is None or not isinstance(data, dict) \
+            or not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        return None
+    return kind, task_id, timestamp, data
+
+
+def apply_queue(tasks, coalesced, check):
+    """
+    Apply coalesced operations to a TaskList (without saving). ``check(description,
+    priority)`` raises ValueError for a task ``add`` would refuse.
+
+    Returns (added, updated, removed, unknown, rejected): ``unknown`` counts
+    edits of tasks that neither exist nor were added in the queue, and
+    ``rejected`` lists a message for each task whose queued values were
+    refused (the task is left as it was).
+    """
+    by_sync_id = {task['sync_id']: task['id'] for task in tasks if task.get('sync_id') is not None}
+    added = updated = removed = unknown = 0
+    rejected = []
+    for sync_id, entry in coalesced.items():
+        task_id = by_sync_id.get(sync_id)
+        if entry.deleted_at is not None:
+            if task_id is not None:
+                for dependent_id in list(tasks.graph.dependents[task_id]):
+                    depends_on = tasks.get(dependent_id)['depends_on']
+                    tasks.update(dependent_id, {'depends_on': [p for p in depends_on if p != task_id]})
+                tasks.remove(task_id)
+                removed += 1
+            continue
+
+        values = entry.values()
+        if task_id is None and not (entry.added and values.get('task')):
+            unknown += 1
+            continue
+        task = tasks.get(task_id) if task_id is not None else None
+        created_at = datetime.fromtimestamp(entry.created_at).isoformat() if entry.created_at else None
+        record = {name: task.get(name) for name in TASK_FIELDS} if task is not None else {}
+        record.update((name, values[name]) for name in TASK_FIELDS if name in values)
+        try:
+            result = new_task(record, created_at or datetime.now().isoformat())
+            check(result['task'], result['priority'])
+        except ValueError as e:
+            rejected.append(f"{sync_id}: {e}")
+            continue
+        result['task'] = result['task'].strip()
+
+        if task is None:
+            result['sync_id'] = sync_id
+            tasks.add(result)
+            added += 1
+            continue
+        result.setdefault('completed_at', None)
+        changes = {name: result[name] for name in TASK_FIELDS if task.get(name) != result[name]}
+        if changes:
+            tasks.update(task_id, changes)
+            updated += 1
+    return added, updated, removed, unknown, rejected
+
+
+def mark_synced(path, count):
+    """
+    Rewrite the queue with the well-formed operations among its first
+    ``count`` entries (the ones read_queue() read) marked ``synced``.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(path, 'r', encoding='utf-8') as source, open(tmp_path, 'w', encoding='utf-8') as target:
+            target.write('[')
+            i = None
+            for i, operation in enumerate(iter_json_array(source)):
+                if i < count and _parse(operation) is not None:
+                    operation['synced'] = True
+                target.write(',\n  ' if i else '\n  ')
+                target.write(json.dumps(operation, indent=2).replace('\n', '\n  '))
+            # Same layout as json.dump(queue, f, indent=2)
+            target.write('\n]' if i is not None else ']')
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
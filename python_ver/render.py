@@ -0,0 +1,228 @@
+"""
+Rendering of task rows and progress bars.
+
+Every row of a listing is built from the same few coloured fragments: the
+checkbox, the priority, the tag group and the dependency marker. RowRenderer
+builds them once (for the colours in use) and keeps tag groups it has
+already rendered, so a row is one join of ready-made strings instead of a
+dozen nested f-strings. Rows go into an OutputBuffer, which writes them to the
+terminal in large chunks.
+
+Colours are left out when stdout is not a terminal, when NO_COLOR is set or
+with TODO_COLOR=never; TODO_COLOR=always keeps them (see color_wanted()).
+"""
+
+import os
+import sys
+
+
+# Colors for terminal output (fallback when rich not available)
+class Colors:
+    RESET = '\033[0m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    BLUE = '\033[34m'
+    CYAN = '\033[36m'
+    GRAY = '\033[90m'
+    RED = '\033[31m'
+    BOLD = '\033[1m'
+    STRIKETHROUGH = '\033[9m'
+
+
+_CODES = {name: code for name, code in vars(Colors).items() if name.isupper()}
+_renderer = None
+
+
+def color_wanted(stream=None):
+    """Whether output to ``stream`` (stdout by default) should be coloured."""
+    setting = os.environ.get('TODO_COLOR', 'auto').lower()
+    if setting in ('always', 'on', '1', 'yes'):
+        return True
+    if setting in ('never', 'off', '0', 'no') or 'NO_COLOR' in os.environ:
+        return False
+    stream = stream or sys.stdout
+    return hasattr(stream, 'isatty') and stream.isatty()
+
+
+def set_color(enabled):
+    """Turn colours on or off for everything printed from now on."""
+    global _renderer
+    for name, code in _CODES.items():
+        setattr(Colors, name, code if enabled else '')
+    _renderer = None
+
+
+def color_enabled():
+    return Colors.RESET != ''
+
+
+def renderer():
+    """The RowRenderer for the current colour setting."""
+    global _renderer
+    if _renderer is None:
+        _renderer = RowRenderer()
+    return _renderer
+
+
+class OutputBuffer:
+    """
+    Collects output lines and writes them in large chunks, instead of one
+    print (and one write to the terminal) per task row.
+    """
+
+    def __init__(self, flush_every=1000):
+        self.lines = []
+        self.flush_every = flush_every
+
+    def line(self, text=''):
+        self.lines.append(text)
+        if len(self.lines) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            sys.stdout.write('\n'.join(self.lines) + '\n')
+            self.lines = []
+        sys.stdout.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+class RowRenderer:
+    """Task rows and progress bars from fragments prepared for the current colours."""
+
+    # Distinct tag groups kept; listings rarely have more than a few hundred
+    TAG_CACHE_SIZE = 4096
+
+    def __init__(self):
+        c = Colors
+        self.color = color_enabled()
+        self.pending_heading = f"{c.CYAN}{c.BOLD}Pending tasks:{c.RESET}"
+        self.completed_heading = f"{c.GREEN}{c.BOLD}Completed tasks:{c.RESET}"
+        self._checkboxes = {}
+        self._id_end = f".{c.RESET} "
+        self._done_start = f"{c.GRAY}{c.STRIKETHROUGH}"
+        self._priorities = {priority: f" {color}({priority}){c.RESET}"
+                            for priority, color in (('High', c.RED), ('Medium', c.BLUE), ('Low', c.GRAY))}
+        self._tags = {}
+        self._blocked = {}
+        self._linked = f" {c.GREEN}🔗{c.RESET}"
+        self._bars = {}
+
+    def row(self, task, checkbox, blocked_count=0):
+        """
+        A single task row. blocked_count is the number of incomplete
+        prerequisites, precomputed by the caller.
+        """
+        completed = task.get('completed', False)
+        text = task['task']
+        if completed and self.color:
+            text = self._done_start + text + Colors.RESET
+
+        priority = task.get('priority', 'Medium')
+        priority_str = self._priorities.get(priority) or self._priority(priority)
+        tags = task.get('tags')
+        tags_str = self.tag_group(tags) if tags else ''
+
+        dependency_str = ''
+        if not completed:
+            if blocked_count > 0:
+                dependency_str = self._blocked_marker(blocked_count)
+            elif task.get('depends_on'):
+                dependency_str = self._linked
+
+        return (f"{self._checkbox(checkbox)}{task.get('id', 0) + 1}{self._id_end}"
+                f"{text}{priority_str}{tags_str}{dependency_str}")
+
+    def _checkbox(self, checkbox):
+        prefix = self._checkboxes.get(checkbox)
+        if prefix is None:
+            prefix = self._checkboxes[checkbox] = f"  {Colors.YELLOW}{checkbox}{Colors.RESET} {Colors.CYAN}"
+        return prefix
+
+    def _priority(self, priority):
+        # Priorities other than High/Medium/Low are shown without a colour
+        self._priorities[priority] = f" {Colors.RESET}({priority}){Colors.RESET}"
+        return self._priorities[priority]
+
+    def _blocked_marker(self, count):
+        marker = self._blocked.get(count)
+        if marker is None:
+            marker = self._blocked[count] = f" {Colors.RED}🔗 ({count} blocked){Colors.RESET}"
+        return marker
+
+    def write_rows(self, out, rows, blocked_count=None):
+        """write_task_rows() with row() inlined: this loop runs once per listed task."""
+        c = Colors
+        pending, completed_box = self._checkbox('○'), self._checkbox('●')
+        id_end, done_start, done_end = self._id_end, self._done_start, c.RESET if self.color else ''
+        priorities, tags_cache, tag_group = self._priorities, self._tags, self.tag_group
+        linked = self._linked
+        lines, flush_every = out.lines, out.flush_every
+        section = None
+        shown = 0
+        for task in rows:
+            completed = task.get('completed', False)
+            if completed != section:
+                if section is not None:
+                    out.line()
+                section = completed
+                out.line(self.completed_heading if section else self.pending_heading)
+                lines = out.lines
+
+            priority = task.get('priority', 'Medium')
+            priority_str = priorities.get(priority) or self._priority(priority)
+            tags = task.get('tags')
+            tags_str = (tags_cache.get(tuple(tags)) or tag_group(tags)) if tags else ''
+            if section:
+                lines.append(f"{completed_box}{task.get('id', 0) + 1}{id_end}"
+                             f"{done_start}{task['task']}{done_end}{priority_str}{tags_str}")
+            else:
+                count = blocked_count(task) if blocked_count else 0
+                if count > 0:
+                    dependency_str = self._blocked_marker(count)
+                elif task.get('depends_on'):
+                    dependency_str = linked
+                else:
+                    dependency_str = ''
+                lines.append(f"{pending}{task.get('id', 0) + 1}{id_end}"
+                             f"{task['task']}{priority_str}{tags_str}{dependency_str}")
+            shown += 1
+            if len(lines) >= flush_every:
+                out.flush()
+                lines = out.lines
+        if section is not None:
+            out.line()
+        return shown
+
+    def tag_group(self, tags):
+        """The " [tag, tag]" part of a row."""
+        key = tuple(tags)
+        tags_str = self._tags.get(key)
+        if tags_str is None:
+            if len(self._tags) >= self.TAG_CACHE_SIZE:
+                self._tags.clear()
+            tags_str = self._tags[key] = f" {Colors.CYAN}[{', '.join(tags)}]{Colors.RESET}"
+        return tags_str
+
+    def progress_bar(self, percentage, width=30):
+        """A visual progress bar."""
+        filled_length = round((width * percentage) / 100)
+        bar = self._bars.get((filled_length, width))
+        if bar is None:
+            bar = self._bars[(filled_length, width)] = \
+                f"{Colors.GREEN}{'█' * filled_length}{Colors.GRAY}{'░' * (width - filled_length)}{Colors.RESET}"
+        return bar
+
+
+def write_task_rows(out, rows, blocked_count=None):
+    """
+    Write tasks (in display order) under Pending/Completed headings and return
+    how many were written. ``blocked_count(task)`` gives the number of
+    unfinished prerequisites of a pending task.
+    """
+    return renderer().write_rows(out, rows, blocked_count)
@@ -0,0 +1,231 @@
+"""
+Full-text search over task descriptions and tags.
+
+The inverted index is a small SQLite file next to the task data
+(``tasks.json.search``, or ``tasks.db.search``) with two tables:
+
+    postings(token, task_id)   one row per distinct token of a task, clustered
+                               on the token, so looking up a token or a token
+                               prefix is a B-tree range scan (plus an index on
+                               task_id for updates)
+    docs(task_id, ...)         the task fields results are shown and filtered by
+
+A query only reads the postings of its terms and the docs that match, so it
+doesn't get slower as the task list grows. save_tasks() applies every change
+set to the index. The index records the storage revision it reflects and is
+rebuilt from the tasks whenever that no longer matches (first search, edits by
+other tools, migrate, ...).
+
+Query syntax: words are AND-ed, ``OR`` separates alternatives (AND binds
+tighter), and a trailing ``*`` matches any token starting with the word:
+
+    fix deploy            tasks with both "fix" and "deploy"
+    report OR invoice     tasks with either
+    dep* OR bug urgent    tokens starting with "dep", or both "bug" and "urgent"
+"""
+
+import json
+import re
+from pathlib import Path
+
+from .storage import PRIORITY_RANK
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Distinct lower-case word tokens of ``text``, in order of appearance."""
+    return list(dict.fromkeys(_TOKEN.findall(text.casefold())))
+
+
+def task_tokens(task):
+    """Tokens a task is found by: the words of its description and its tags."""
+    words = [task.get('task', '')]
+    words.extend(tag for tag in task.get('tags', []) if isinstance(tag, str))
+    return tokenize(' '.join(words))
+
+
+def parse_query(query):
+    """
+    Split a query into OR-ed groups of AND-ed (token, is_prefix) terms.
+
+    Raises ValueError if the query has no words to search for.
+    """
+    groups, terms = [], []
+    for word in query.split():
+        if word == 'OR':
+            if terms:
+                groups.append(terms)
+            terms = []
+            continue
+        if word == 'AND':
+            continue
+        tokens = tokenize(word)
+        # "project-3*" is "project" and a prefix "3*"; only the last part is a prefix
+        prefix = word.endswith('*')
+        terms.extend((token, prefix and i == len(tokens) - 1) for i, token in enumerate(tokens))
+    if terms:
+        groups.append(terms)
+    if not groups:
+        raise ValueError("Error: Search query is empty. Give at least one word to search for.")
+    return groups
+
+
+def query_matcher(query):
+    """
+    A function telling whether a task matches ``query``, for tasks that are
+    not in the index (the archive). Raises ValueError like parse_query().
+    """
+    groups = parse_query(query)
+
+    def matches(task):
+        tokens = task_tokens(task)
+        present = set(tokens)
+        return any(all(any(token.startswith(term) for token in tokens) if prefix else term in present
+                       for term, prefix in terms)
+                   for terms in groups)
+    return matches
+
+
+class SearchIndex:
+    """Token -> task id postings kept in a SQLite file."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS postings (
+            token TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            PRIMARY KEY (token, task_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_postings_task ON postings (task_id);
+        CREATE TABLE IF NOT EXISTS docs (
+            task_id INTEGER PRIMARY KEY,
+            task TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            priority_rank INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            tags TEXT NOT NULL,
+            depends_on TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3
+
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            # The index can always be rebuilt, so it doesn't need to survive a power cut
+            self._conn.execute('PRAGMA synchronous = NORMAL')
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def exists(self):
+        return self._conn is not None or self.path.exists()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def revision(self):
+        """Storage revision the index was last brought up to date with, or None."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rebuild(self, tasks, revision, chunk_size=10000):
+        """Index ``tasks`` from scratch."""
+        with self.conn:
+            self.conn.execute('DELETE FROM postings')
+            self.conn.execute('DELETE FROM docs')
+            # Building the task_id index once at the end is faster than keeping it up to date
+            self.conn.execute('DROP INDEX IF EXISTS idx_postings_task')
+            chunk = []
+            for task in tasks:
+                chunk.append(task)
+                if len(chunk) == chunk_size:
+                    self._insert_many(chunk)
+                    chunk = []
+            self._insert_many(chunk)
+            self.conn.execute('CREATE INDEX idx_postings_task ON postings (task_id)')
+            self._set_revision(revision)
+
+    def apply(self, added, updated, removed, revision):
+        """Bring the index in line with a saved change set."""
+        with self.conn:
+            for task in removed:
+                self._delete(task['id'])
+            for task in updated:
+                self._delete(task['id'])
+            self._insert_many(updated)
+            self._insert_many(added)
+            self._set_revision(revision)
+
+    def search(self, query, priority=None, completed=None):
+        """
+        Tasks matching ``query`` in display order, optionally only those with
+        the given priority and/or completion status.
+        """
+        groups, params = [], []
+        for terms in parse_query(query):
+            selects = []
+            for token, prefix in terms:
+                if prefix:
+                    # Every token that starts with ``token`` sorts in [token, token + U+10FFFF)
+                    selects.append('SELECT task_id FROM postings WHERE token >= ? AND token < ?')
+                    params.extend((token, token + '\U0010ffff'))
+                else:
+                    selects.append('SELECT task_id FROM postings WHERE token = ?')
+                    params.append(token)
+            groups.append('SELECT task_id FROM (' + ' INTERSECT '.join(selects) + ')')
+
+        sql = ('SELECT task_id, task, priority, completed, tags, depends_on FROM docs '
+               'WHERE task_id IN (' + ' UNION '.join(groups) + ')')
+        if priority is not None:
+            sql += ' AND priority = ?'
+            params.append(priority)
+        if completed is not None:
+            sql += ' AND completed = ?'
+            params.append(int(completed))
+        sql += ' ORDER BY completed, priority_rank, task_id'
+
+        return [
+            {'id': task_id, 'task': text, 'priority': task_priority, 'completed': bool(done),
+             'tags': json.loads(tags), 'depends_on': json.loads(depends_on)}
+            for task_id, text, task_priority, done, tags, depends_on in self.conn.execute(sql, params)
+        ]
+
+    def _insert_many(self, tasks):
+        docs, postings = [], []
+        for task in tasks:
+            priority = task.get('priority', 'Medium')
+            docs.append((task['id'], task.get('task', ''), priority, PRIORITY_RANK.get(priority, 1),
+                         int(bool(task.get('completed', False))), _json_list(task.get('tags', [])),
+                         _json_list(task.get('depends_on', []))))
+            postings.extend((token, task['id']) for token in task_tokens(task))
+        # Inserting in key order keeps the postings B-tree appends cheap
+        postings.sort()
+        self.conn.executemany(
+            'INSERT INTO docs (task_id, task, priority, priority_rank, completed, tags, depends_on) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', docs)
+        self.conn.executemany('INSERT INTO postings (token, task_id) VALUES (?, ?)', postings)
+
+    def _delete(self, task_id):
+        self.conn.execute('DELETE FROM docs WHERE task_id = ?', (task_id,))
+        self.conn.execute('DELETE FROM postings WHERE task_id = ?', (task_id,))
+
+    def _set_revision(self, revision):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)",
+                          (json.dumps(revision),))
+
+
+def _json_list(values):
+    return json.dumps(values) if values else '[]'
@@ -0,0 +1,693 @@
+"""
+Storage backends for the Python todo app.
+
+Every backend exposes the same two calls used by todo.py:
+
+    load()                                   -> list of raw task dicts
+    save(tasks, added=(), updated=(), removed=())
+
+``stamp()`` returns a cheap fingerprint of the stored data that changes when
+another process writes it, so a long-running process can tell whether the
+tasks it holds in memory are still current. ``revision()`` identifies the
+stored data across processes (the file stamps, or a counter SQLite bumps on
+every save), for caches derived from the tasks and kept on disk.
+
+Tasks handed to ``save`` may be any mapping (todo.py passes compact Task
+objects); they are written out as plain JSON objects.
+
+``save`` always receives the full in-memory list. Backends that can persist
+individual rows (SQLite) or changes (the journal) only write the tasks listed
+in ``added``, ``updated`` and ``removed``; when no change set is given they
+rewrite everything.
+
+``iter_tasks()`` yields the same records one at a time without holding the
+whole list in memory. ``iter_tasks(tags=[...], priority=..., ids=...)`` yields
+only the tasks that have every one of the tags (and the priority, and one of
+the ids); SQLite answers that from its indexes, the file backends filter while
+streaming. ``can_stream_in_order()`` tells whether that stream
+comes in display order (pending before completed, then priority, then id), so
+read-only commands can print rows as they arrive.
+
+Backends also keep the task counts (see aggregates.py) next to the tasks:
+``save(..., aggregates=...)`` stores them together with the change and
+``load_aggregates()`` returns them, or None when they are missing or were not
+written by the last save, so ``stats`` can skip loading the tasks.
+
+Several processes may use the same store (cron jobs next to an interactive
+shell). ``locked()`` holds an advisory lock on a ``.lock`` file next to the
+data: shared while loading, exclusive while saving. ``version()`` is a counter
+every save increments (the SQLite revision; the file backends keep it in the
+lock file), so a process can tell at save time whether someone else saved
+since it loaded and merge instead of overwriting (see TaskList.rebase).
+
+``next_id()`` is the lowest id never handed out in this store, saved with
+every change (``save(..., next_id=...)``) in the same place as the version.
+Ids of removed or archived tasks are therefore never reused, even when the
+task with the highest id is the one that went. 0 means the store predates the
+counter; TaskList then starts after the highest stored id.
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the version check still applies
+    fcntl = None
+
+PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
+# Columns with a dedicated place in the SQLite schema. Anything else a task
+# carries (due dates, sharing info, ...) is kept in the ``extra`` JSON column.
+_CORE_FIELDS = ('id', 'task', 'priority', 'completed', 'tags', 'created_at', 'depends_on')
+
+
+class JSONStorage:
+    """Stores the whole task list in a single JSON file (the original format)."""
+
+    name = 'json'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.aggregates_path = Path(str(self.path) + '.stats')
+        self.lock_path = Path(str(self.path) + '.lock')
+
+    def locked(self, shared=False):
+        return _file_lock(self.lock_path, shared)
+
+    def version(self):
+        return self._lock_record()[0]
+
+    def next_id(self):
+        return self._lock_record()[1]
+
+    def _lock_record(self):
+        """(version, next id) from the lock file: "<version> <next id>"."""
+        try:
+            with open(self.lock_path, 'r') as f:
+                fields = f.read().split()
+        except FileNotFoundError:
+            return 0, 0
+        try:
+            # Files written before the id counter hold only the version
+            return int(fields[0]) if fields else 0, int(fields[1]) if len(fields) > 1 else 0
+        except ValueError:
+            return -1, 0  # torn write; matches no version anyone loaded
+
+    def _bump_version(self, next_id=None):
+        # Counted before the data is written: a crash in between only causes
+        # a needless merge (and skips some ids), never a missed one
+        version, stored_next_id = self._lock_record()
+        next_id = max(next_id or 0, stored_next_id)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        with os.fdopen(fd, 'r+') as f:
+            # Rewritten in place; replacing the file would break the lock
+            f.truncate()
+            f.write(f"{max(version, 0) + 1} {next_id}")
+
+    def load(self):
+        if not self.path.exists():
+            return []
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def iter_tasks(self, tags=(), priority=None, ids=None):
+        if tags or priority is not None or ids is not None:
+            ids = set(ids) if ids is not None else None
+            return (task for task in self._stream() if _matches(task, tags, priority, ids))
+        return self._stream()
+
+    def _stream(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            yield from iter_json_array(f)
+
+    def can_stream_in_order(self):
+        # save() writes tasks in display order; current counts mean nothing
+        # else has rewritten the file since
+        return self.load_aggregates() is not None
+
+    def save(self, tasks, added=(), updated=(), removed=(), aggregates=None, next_id=None):
+        self._bump_version(next_id)
+        _atomic_write_json(self.path, [_record(task) for task in tasks])
+        self.save_aggregates(aggregates)
+
+    def stamp(self):
+        return _file_stamp(self.path)
+
+    def revision(self):
+        return self.stamp()
+
+    def load_aggregates(self):
+        try:
+            with open(self.aggregates_path, 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Only trust counts written for exactly the data that is on disk now
+        if not isinstance(record, dict) or record.get('stamp') != self.stamp():
+            return None
+        return record.get('aggregates')
+
+    def save_aggregates(self, aggregates):
+        """Store the counts for the data currently on disk (None removes them)."""
+        if aggregates is None:
+            if self.aggregates_path.exists():
+                self.aggregates_path.unlink()
+            return
+        _atomic_write_json(self.aggregates_path, {'stamp': self.stamp(), 'aggregates': aggregates})
+
+
+class JournalStorage(JSONStorage):
+    """
+    tasks.json snapshot plus an append-only journal of changes.
+
+    Each save appends one small JSON line per changed task to ``<file>.journal``
+    and fsyncs it, so write cost follows the size of the change rather than the
+    number of tasks. Once the journal holds ``compact_threshold`` records it is
+    folded into a fresh snapshot. Loading replays the journal on top of the
+    snapshot; a torn last line from a crash is ignored instead of losing data,
+    and the next save compacts rather than appending after it (records glued
+    onto the torn line, or written under the header of an outdated journal,
+    would be ignored by every later load).
+
+    Records refer to tasks by their stable id: ``put`` stores the task's new
+    state and ``delete`` drops it.
+    """
+
+    name = 'journal'
+
+    def __init__(self, path, compact_threshold=1000):
+        super().__init__(path)
+        self.journal_path = Path(str(self.path) + '.journal')
+        self.compact_threshold = compact_threshold
+        self._journal_records = 0
+        # Set when the journal can't be appended to (see _read_records())
+        self._journal_damaged = False
+
+    def load(self):
+        tasks = super().load()
+        records = self._read_records()
+        self._journal_records = len(records)
+        if not records:
+            return tasks
+
+        positions = {task['id']: i for i, task in enumerate(tasks) if isinstance(task, dict) and 'id' in task}
+        for record in records:
+            _apply_record(tasks, positions, record)
+        return [task for task in tasks if task is not None]
+
+    def _stream(self):
+        # The journal is small next to the snapshot, so collect each task's
+        # final state from it first and apply it while streaming the snapshot
+        changes = {}
+        for record in self._read_records():
+            if record.get('op') == 'put':
+                changes[record['task']['id']] = record['task']
+            elif record.get('op') == 'delete':
+                changes[record.get('id')] = None
+        for task in super()._stream():
+            if isinstance(task, dict) and task.get('id') in changes:
+                task = changes.pop(task['id'])
+                if task is None:
+                    continue
+            yield task
+        # Tasks added since the snapshot, in the order they were added
+        yield from (task for task in changes.values() if task is not None)
+
+    def can_stream_in_order(self):
+        # Replayed changes can move tasks around, so only a clean snapshot qualifies
+        return not self._read_records() and super().can_stream_in_order()
+
+    def _read_records(self):
+        """
+        Journal records that apply to the current snapshot. Notes in
+        ``_journal_damaged`` whether the journal is outdated or ends in a torn
+        line, so save() rewrites it instead of appending.
+        """
+        self._journal_damaged = False
+        if not self.journal_path.exists():
+            return []
+        with open(self.journal_path, 'r') as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return []
+        try:
+            header = json.loads(lines[0])
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get('base') != self._snapshot_stamp():
+            # Journal predates the current snapshot (compaction finished but the
+            # journal was not truncated yet) - its changes are already folded in.
+            self._journal_damaged = True
+            return []
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn write at the tail; everything before it is intact
+                self._journal_damaged = True
+                break
+        return records
+
+    def save(self, tasks, added=(), updated=(), removed=(), aggregates=None, next_id=None):
+        self._bump_version(next_id)
+        records = _journal_records(tasks, added, updated, removed)
+        if not records or self._journal_damaged or self._torn_tail() \
+                or self._journal_records + len(records) >= self.compact_threshold:
+            self.compact(tasks)
+            self.save_aggregates(aggregates)
+            return
+
+        new_journal = not self.journal_path.exists() or self.journal_path.stat().st_size == 0
+        with open(self.journal_path, 'a') as f:
+            if new_journal:
+                f.write(json.dumps({'base': self._snapshot_stamp()}) + '\n')
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_records += len(records)
+        self.save_aggregates(aggregates)
+
+    def _torn_tail(self):
+        """Whether the journal ends in a partial line (a crash since this process last read it)."""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except FileNotFoundError:
+            return False
+
+    def compact(self, tasks):
+        """Write ``tasks`` as the new snapshot and start an empty journal."""
+        _atomic_write_json(self.path, [_record(task) for task in tasks])
+        with open(self.journal_path, 'w') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_records = 0
+        self._journal_damaged = False
+
+    def stamp(self):
+        return [_file_stamp(self.path), _file_stamp(self.journal_path)]
+
+    def _snapshot_stamp(self):
+        return _file_stamp(self.path)
+
+
+def _file_stamp(path):
+    """[size, mtime] of a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+@contextmanager
+def _file_lock(path, shared=False):
+    """Hold an advisory lock on ``path`` (created if missing) for the duration of the block."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def _matches(task, tags, priority, ids=None):
+    """Whether a stored record has all of ``tags``, the given priority and one of ``ids``."""
+    if not isinstance(task, dict):
+        return False
+    if ids is not None and task.get('id') not in ids:
+        return False
+    if priority is not None and task.get('priority', 'Medium') != priority:
+        return False
+    task_tags = task.get('tags', [])
+    return all(tag in task_tags for tag in tags)
+
+
+def _record(task):
+    """Plain dict for a task mapping (Task objects convert themselves faster)."""
+    return task.to_dict() if hasattr(task, 'to_dict') else dict(task)
+
+
+def _journal_records(tasks, added, updated, removed):
+    """Turn a change set into journal records."""
+    records = [{'op': 'delete', 'id': task['id']} for task in removed]
+    records.extend({'op': 'put', 'task': _record(task)} for task in added)
+    records.extend({'op': 'put', 'task': _record(task)} for task in updated)
+    return records
+
+
+def _apply_record(tasks, positions, record):
+    """Replay one journal record on top of the snapshot list."""
+    op = record.get('op')
+    if op == 'put':
+        task = record['task']
+        position = positions.get(task['id'])
+        if position is None:
+            positions[task['id']] = len(tasks)
+            tasks.append(task)
+        else:
+            tasks[position] = task
+    elif op == 'delete':
+        position = positions.pop(record.get('id'), None)
+        if position is not None:
+            # Leave a hole so the other recorded positions stay valid
+            tasks[position] = None
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """
+    Yield the elements of the JSON array in file ``f`` one at a time.
+
+    The file is read in chunks and each element is decoded as soon as it is
+    complete, so memory use is bounded by the chunk size and the largest
+    element rather than by the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        # Drop what has been consumed and read the next chunk
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise json.JSONDecodeError("Expecting a JSON array", buffer, pos)
+    pos += 1
+
+    skip_whitespace()
+    if buffer.startswith(']', pos):
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # A number cut off by the chunk boundary ("12" of "125") still
+            # decodes, so only trust it once a delimiter follows
+            complete = eof or (end < len(buffer) and (
+                buffer[end] in ' \t\n\r,]' or not isinstance(value, (int, float))))
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            fill()
+            continue
+        pos = end
+        yield value
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        pos += 1
+        skip_whitespace()
+
+
+def _atomic_write_json(path, data):
+    """Write JSON to a temp file next to ``path`` and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A pid-named temp file avoids importing tempfile on every save
+    tmp_path = str(path.with_name(f'.{path.name}-{os.getpid()}.tmp'))
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        # Keep the permissions of the file being replaced
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SQLiteStorage:
+    """Stores one row per task so single-task changes only touch that row."""
+
+    name = 'sqlite'
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            task TEXT NOT NULL,
+            priority TEXT NOT NULL DEFAULT 'Medium',
+            priority_rank INTEGER NOT NULL DEFAULT 1,
+            completed INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            depends_on TEXT NOT NULL DEFAULT '[]',
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS task_tags (
+            task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (task_id, position)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_order ON tasks (completed, priority_rank, id);
+        CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+        CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+        CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag);
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = Path(str(self.path) + '.lock')
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.execute('PRAGMA foreign_keys = ON')
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stamp(self):
+        # data_version only changes when *another* connection commits, which is
+        # exactly when tasks held in memory by this process go stale
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def iter_tasks(self, tags=(), priority=None, ids=None):
+        # Tag filters intersect the ids from the task_tags index instead of
+        # scanning the tasks
+        conditions, params = [], []
+        if ids is not None:
+            conditions.append('id IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(ids)))
+        if tags:
+            conditions.append('id IN (' + ' INTERSECT '.join(
+                ['SELECT task_id FROM task_tags WHERE tag = ?'] * len(tags)) + ')')
+            params.extend(tags)
+        if priority is not None:
+            conditions.append('priority = ?')
+            params.append(priority)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        # A separate cursor per stream, with tags gathered per row by SQLite
+        rows = self.conn.execute(
+            'SELECT id, task, priority, completed, created_at, depends_on, extra, '
+            '(SELECT json_group_array(tag) FROM '
+            '  (SELECT tag FROM task_tags WHERE task_id = tasks.id ORDER BY position)) '
+            'FROM tasks' + where + ' ORDER BY completed, priority_rank, id', params)
+        for row_id, text, priority, completed, created_at, depends_on, extra, tags in rows:
+            task = {
+                'id': row_id,
+                'task': text,
+                'priority': priority,
+                'completed': bool(completed),
+                'tags': json.loads(tags),
+                'created_at': created_at,
+                'depends_on': json.loads(depends_on),
+            }
+            task.update(json.loads(extra))
+            yield task
+
+    def can_stream_in_order(self):
+        return True
+
+    def load(self):
+        tags_by_row = {}
+        for row_id, tag in self.conn.execute(
+                'SELECT task_id, tag FROM task_tags ORDER BY task_id, position'):
+            tags_by_row.setdefault(row_id, []).append(tag)
+
+        tasks = []
+        rows = self.conn.execute(
+            'SELECT id, task, priority, completed, created_at, depends_on, extra '
+            'FROM tasks ORDER BY completed, priority_rank, id')
+        for row_id, text, priority, completed, created_at, depends_on, extra in rows:
+            task = {
+                'id': row_id,
+                'task': text,
+                'priority': priority,
+                'completed': bool(completed),
+                'tags': tags_by_row.get(row_id, []),
+                'created_at': created_at,
+                'depends_on': json.loads(depends_on),
+            }
+            task.update(json.loads(extra))
+            tasks.append(task)
+        return tasks
+
+    def revision(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def locked(self, shared=False):
+        return _file_lock(self.lock_path, shared)
+
+    def version(self):
+        # Every save bumps the revision in its transaction
+        return self.revision()
+
+    def next_id(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        return int(row[0]) if row else 0
+
+    def load_aggregates(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'aggregates'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_aggregates(self, aggregates):
+        with self.conn:
+            self._write_aggregates(aggregates)
+
+    def _write_aggregates(self, aggregates):
+        if aggregates is None:
+            self.conn.execute("DELETE FROM meta WHERE key = 'aggregates'")
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('aggregates', ?)",
+                              (json.dumps(aggregates),))
+
+    def save(self, tasks, added=(), updated=(), removed=(), aggregates=None, next_id=None):
+        with self.conn:
+            # Written in the same transaction, so the counts always match the rows
+            self._write_aggregates(aggregates)
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('revision', 1) "
+                              "ON CONFLICT (key) DO UPDATE SET value = value + 1")
+            if next_id is not None:
+                # Never lowered: the counter only moves forward
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('next_id', ?) ON CONFLICT (key) "
+                                  "DO UPDATE SET value = MAX(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER))",
+                                  (next_id,))
+            if not (added or updated or removed):
+                self.conn.execute('DELETE FROM tasks')
+                added = tasks
+            for task in removed:
+                self.conn.execute('DELETE FROM tasks WHERE id = ?', (task['id'],))
+            for task in updated:
+                cursor = self.conn.execute(
+                    'UPDATE tasks SET task = ?, priority = ?, priority_rank = ?, completed = ?, '
+                    'created_at = ?, depends_on = ?, extra = ? WHERE id = ?',
+                    self._row_values(task) + (task['id'],))
+                if cursor.rowcount == 0:
+                    self._insert(task)
+                else:
+                    self._write_tags(task)
+            self._insert_many(added)
+
+    def _insert(self, task):
+        self.conn.execute(
+            'INSERT INTO tasks (task, priority, priority_rank, completed, '
+            'created_at, depends_on, extra, id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            self._row_values(task) + (task['id'],))
+        self._write_tags(task)
+
+    def _insert_many(self, tasks):
+        """_insert() for many tasks at once (imports add 100k+), one executemany per statement."""
+        tasks = list(tasks)
+        self.conn.executemany(
+            'INSERT INTO tasks (task, priority, priority_rank, completed, '
+            'created_at, depends_on, extra, id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [self._row_values(task) + (task['id'],) for task in tasks])
+        self.conn.executemany('DELETE FROM task_tags WHERE task_id = ?', [(task['id'],) for task in tasks])
+        self.conn.executemany(
+            'INSERT INTO task_tags (task_id, position, tag) VALUES (?, ?, ?)',
+            [(task['id'], i, tag) for task in tasks for i, tag in enumerate(task.get('tags', []))])
+
+    def _row_values(self, task):
+        priority = task.get('priority', 'Medium')
+        extra = {k: v for k, v in task.items() if k not in _CORE_FIELDS and not k.startswith('_')}
+        depends_on = task.get('depends_on')
+        return (
+            task.get('task', ''),
+            priority,
+            PRIORITY_RANK.get(priority, 1),
+            int(bool(task.get('completed', False))),
+            task.get('created_at'),
+            # Most tasks have neither; skipping the encoder matters for bulk inserts
+            json.dumps(depends_on) if depends_on else '[]',
+            json.dumps(extra) if extra else '{}',
+        )
+
+    def _write_tags(self, task):
+        self.conn.execute('DELETE FROM task_tags WHERE task_id = ?', (task['id'],))
+        self.conn.executemany(
+            'INSERT INTO task_tags (task_id, position, tag) VALUES (?, ?, ?)',
+            [(task['id'], i, tag) for i, tag in enumerate(task.get('tags', []))])
+
+
+BACKENDS = {
+    'json': JSONStorage,
+    'journal': JournalStorage,
+    'sqlite': SQLiteStorage,
+}
+
+
+def open_storage(backend, tasks_file, db_file):
+    """Create the storage backend selected by name ('json', 'journal' or 'sqlite')."""
+    backend = (backend or 'json').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+    if backend == 'sqlite':
+        return SQLiteStorage(db_file)
+    return BACKENDS[backend](tasks_file)
@@ -0,0 +1,255 @@
+"""
+Compact in-memory task record.
+
+Long-lived task lists (``TaskList(compact=True)``, used by the daemon and
+batch mode) store ``Task`` objects instead of plain dicts. A Task uses ``__slots__`` and keeps its fields in compact form:
+
+- priority as a small ``Priority`` int enum (shared singletons),
+- tags as a tuple of interned tag ids (each tag string is stored once),
+- ``created_at`` and ``completed_at`` as float seconds instead of ISO strings,
+- ``depends_on`` as a tuple of ids.
+
+It still behaves like the dict it was created from (``task['tags']``,
+``task.get('completed')``, ``task.update(...)``, ``dict(task)``) and converts
+back to exactly the same JSON, so todo.py and the storage backends don't need
+to know the difference. Values that don't fit the compact form (unknown
+priorities, timestamps with a time zone, ...) are kept as they are.
+"""
+
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Task priority; the value is the sort rank (High first)."""
+
+    HIGH = 0
+    MEDIUM = 1
+    LOW = 2
+
+    @property
+    def label(self):
+        return _PRIORITY_LABELS[self]
+
+
+_PRIORITY_LABELS = {priority: priority.name.capitalize() for priority in Priority}
+_PRIORITY_BY_LABEL = {label: priority for priority, label in _PRIORITY_LABELS.items()}
+
+# Interned tags: every distinct tag string is stored once and tasks refer to
+# it by its position in this table.
+_tag_names = []
+_tag_ids = {}
+
+
+def tag_id(name):
+    """Id of a tag, allocating one the first time the tag is seen."""
+    tag = _tag_ids.get(name)
+    if tag is None:
+        tag = _tag_ids[name] = len(_tag_names)
+        _tag_names.append(name)
+    return tag
+
+
+def tag_name(tag):
+    return _tag_names[tag]
+
+
+# Timestamps are naive wall-clock times (datetime.now().isoformat()), so they
+# are stored as seconds since this naive epoch rather than converted via a
+# time zone, which keeps the round trip exact.
+_EPOCH = datetime(1970, 1, 1)
+
+
+# Below 2**32 seconds (the year 2106) a float64 is finer than a microsecond,
+# so a timestamp rounds back to the same microsecond; beyond that it may not
+_MAX_SECONDS = 2 ** 32
+
+
+def _encode_timestamp(value):
+    # Only the exact form isoformat() writes ("YYYY-MM-DDTHH:MM:SS[.ffffff]")
+    # is converted, so decoding gives back the same string
+    if type(value) is not str or len(value) not in (19, 26) or value[10:11] != 'T' or value.endswith('.000000'):
+        return value
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.tzinfo is not None:
+        return value
+    seconds = (moment - _EPOCH).total_seconds()
+    return seconds if -_MAX_SECONDS < seconds < _MAX_SECONDS else value
+
+
+def _decode_timestamp(value):
+    if isinstance(value, float):
+        return (_EPOCH + timedelta(seconds=value)).isoformat()
+    return value
+
+
+_MISSING = object()
+
+
+class Task(MutableMapping):
+    """A task stored in compact form that reads and writes like its JSON dict."""
+
+    __slots__ = ('id', 'text', 'priority', 'completed', 'tags', 'created_at', 'depends_on', 'completed_at',
+                 'extra')
+
+    def __init__(self):
+        self.id = self.text = self.priority = self.completed = _MISSING
+        self.tags = self.created_at = self.depends_on = self.completed_at = _MISSING
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        task = cls.__new__(cls)
+        get = data.get
+        task.text = get('task', _MISSING)
+        task.priority = _encode_priority(get('priority', _MISSING))
+        task.completed = get('completed', _MISSING)
+        task.tags = _encode_tags(get('tags', _MISSING))
+        task.created_at = _encode_timestamp(get('created_at', _MISSING))
+        task.depends_on = _encode_ids(get('depends_on', _MISSING))
+        task.id = get('id', _MISSING)
+        task.completed_at = _encode_timestamp(get('completed_at', _MISSING))
+        extra_keys = data.keys() - _FIELDS.keys()
+        task.extra = {key: data[key] for key in data if key in extra_keys} if extra_keys else None
+        return task
+
+    def to_dict(self):
+        data = {}
+        if self.text is not _MISSING:
+            data['task'] = self.text
+        if self.priority is not _MISSING:
+            data['priority'] = _decode_priority(self.priority)
+        if self.completed is not _MISSING:
+            data['completed'] = self.completed
+        if self.tags is not _MISSING:
+            data['tags'] = _decode_tags(self.tags)
+        if self.created_at is not _MISSING:
+            data['created_at'] = _decode_timestamp(self.created_at)
+        if self.depends_on is not _MISSING:
+            data['depends_on'] = _decode_ids(self.depends_on)
+        if self.id is not _MISSING:
+            data['id'] = self.id
+        if self.completed_at is not _MISSING:
+            data['completed_at'] = _decode_timestamp(self.completed_at)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    # --- Mapping interface, in the key order tasks are saved with ---
+
+    def __getitem__(self, key):
+        field = _FIELDS.get(key)
+        if field is not None:
+            value = getattr(self, field[0])
+            if value is _MISSING:
+                raise KeyError(key)
+            return field[1](value)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        field = _FIELDS.get(key)
+        if field is not None:
+            setattr(self, field[0], field[2](value))
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        field = _FIELDS.get(key)
+        if field is not None:
+            if getattr(self, field[0]) is _MISSING:
+                raise KeyError(key)
+            setattr(self, field[0], _MISSING)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, field in _FIELDS.items():
+            if getattr(self, field[0]) is not _MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        field = _FIELDS.get(key)
+        if field is not None:
+            return getattr(self, field[0]) is not _MISSING
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        # Mapping.get goes through exception handling; this is on hot paths
+        field = _FIELDS.get(key)
+        if field is not None:
+            value = getattr(self, field[0])
+            return default if value is _MISSING else field[1](value)
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+
+def _same(value):
+    return value
+
+
+def _encode_priority(value):
+    return _PRIORITY_BY_LABEL.get(value, value) if type(value) is str else value
+
+
+def _decode_priority(value):
+    return _PRIORITY_LABELS.get(value, value) if type(value) is Priority else value
+
+
+def _encode_tags(value):
+    if type(value) is list:
+        ids = _tag_ids
+        try:
+            return tuple([ids[tag] for tag in value])
+        except (KeyError, TypeError):
+            if all(isinstance(tag, str) for tag in value):
+                return tuple([tag_id(tag) for tag in value])
+    return value
+
+
+def _decode_tags(value):
+    if type(value) is tuple:
+        return [_tag_names[tag] for tag in value]
+    return value
+
+
+def _encode_ids(value):
+    return tuple(value) if type(value) is list else value
+
+
+def _decode_ids(value):
+    return list(value) if type(value) is tuple else value
+
+
+# JSON key -> (slot, decode, encode). The order is the key order of saved tasks.
+_FIELDS = {
+    'task': ('text', _same, _same),
+    'priority': ('priority', _decode_priority, _encode_priority),
+    'completed': ('completed', _same, _same),
+    'tags': ('tags', _decode_tags, _encode_tags),
+    'created_at': ('created_at', _decode_timestamp, _encode_timestamp),
+    'depends_on': ('depends_on', _decode_ids, _encode_ids),
+    'id': ('id', _same, _same),
+    'completed_at': ('completed_at', _decode_timestamp, _encode_timestamp),
+}
@@ -0,0 +1,352 @@
+"""
+In-memory task collection used by the commands in todo.py.
+
+Task ids are stable: they are allocated once when a task is added and never
+change, so ``depends_on`` edges keep pointing at the same tasks no matter how
+the list is ordered. The CLI shows ``id + 1`` as the task number. Ids are not
+reused either: ``next_id`` (the store's high-water mark, see storage.py) is
+kept across loads, so removing the newest task does not free its id.
+
+Display order is pending before completed, then High/Medium/Low, then id.
+Instead of re-sorting the whole list, tasks are kept in one bucket per
+(completed, priority) pair; each bucket is a sorted list of ids. New tasks get
+the highest id so adding one is an append, and moving a task between buckets
+is a binary search.
+
+A TaskList created with ``compact=True`` holds its records as Task objects
+(see task.py), which take well under half the memory of dicts but cost a
+conversion on load. It is meant for long-lived lists (the daemon, batch mode);
+one-shot commands keep the plain dicts they loaded.
+
+A TaskList also remembers which tasks were added, updated or removed since it
+was loaded, so save_tasks() can hand storage backends just the changes, and it
+keeps the dependency graph and the tag index (once something has asked for
+them) and the status/priority/tag counts in step with every change.
+
+When another process saved in the meantime, rebase() replays those changes
+on top of the tasks it wrote, so concurrent commands don't overwrite each
+other; only changes to the same field of the same task conflict.
+"""
+
+from bisect import bisect_left, insort
+
+from .aggregates import Aggregates, aggregate_fields
+from .graph import DependencyGraph
+from .storage import PRIORITY_RANK
+from .task import Task
+
+
+# Fields holding lists that concurrent changes are merged into as sets
+_SET_FIELDS = ('tags', 'depends_on')
+
+
+class ConflictError(Exception):
+    """Unsaved changes clash with changes another process saved first."""
+
+
+def sort_key(task):
+    """Bucket of a task: pending before completed, then by priority."""
+    return (bool(task.get('completed', False)), PRIORITY_RANK.get(task.get('priority', 'Medium'), 1))
+
+
+def _copy(task):
+    """A record with the same fields that shares nothing mutable with ``task``."""
+    if isinstance(task, Task):
+        return Task.from_dict(task.to_dict())
+    return {key: list(value) if isinstance(value, list) else value for key, value in task.items()}
+
+
+class TaskList:
+    """Tasks in display order plus a hash index from task id to record."""
+
+    def __init__(self, tasks=(), compact=False, next_id=0):
+        self.compact = compact
+        self.by_id = {}
+        self._buckets = {}
+        self.aggregates = Aggregates()
+        for task in tasks:
+            # Index while the record is still a dict; reading it is cheaper
+            self._buckets.setdefault(sort_key(task), []).append(task['id'])
+            self.aggregates.add(task)
+            if compact and not isinstance(task, Task):
+                task = Task.from_dict(task)
+            self.by_id[task['id']] = task
+        for ids in self._buckets.values():
+            # Stored data is normally already in order; only sort when it isn't
+            if any(ids[i] > ids[i + 1] for i in range(len(ids) - 1)):
+                ids.sort()
+        self._next_id = max(max(self.by_id, default=-1) + 1, next_id or 0)
+        # Storage version the tasks were loaded at (set by load_tasks())
+        self.version = None
+        self._graph = None
+        self._tag_index = None
+        self.mark_saved()
+
+    def __iter__(self):
+        for key in sorted(self._buckets):
+            for task_id in self._buckets[key]:
+                yield self.by_id[task_id]
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, task_id):
+        return task_id in self.by_id
+
+    def get(self, task_id):
+        """Return the task with the given id, or None."""
+        return self.by_id.get(task_id)
+
+    def next_id(self):
+        return self._next_id
+
+    @property
+    def graph(self):
+        """Dependency graph of these tasks, built on first use and kept up to date."""
+        if self._graph is None:
+            self._graph = DependencyGraph.from_tasks(self)
+        return self._graph
+
+    @property
+    def tag_index(self):
+        """Tag -> set of ids of the tasks with that tag, built on first use and kept up to date."""
+        if self._tag_index is None:
+            self._tag_index = {}
+            for task_id, task in self.by_id.items():
+                self._index_tags(task_id, task.get('tags', []))
+        return self._tag_index
+
+    def window(self, offset=0, limit=None):
+        """Yield ``limit`` tasks starting at position ``offset`` in display order."""
+        for key in sorted(self._buckets):
+            ids = self._buckets[key]
+            # Whole buckets before the window are skipped without touching their tasks
+            if offset >= len(ids):
+                offset -= len(ids)
+                continue
+            end = len(ids) if limit is None else min(len(ids), offset + limit)
+            for task_id in ids[offset:end]:
+                yield self.by_id[task_id]
+            if limit is not None:
+                limit -= end - offset
+                if limit <= 0:
+                    return
+            offset = 0
+
+    def filter(self, tags=(), priority=None):
+        """Tasks that have every tag in ``tags`` (and ``priority``, if given), in display order."""
+        if not tags:
+            if priority is None:
+                return list(self)
+            rank = PRIORITY_RANK.get(priority, 1)
+            return [task for key in sorted(self._buckets) if key[1] == rank
+                    for task in (self.by_id[task_id] for task_id in self._buckets[key])
+                    if task.get('priority', 'Medium') == priority]
+
+        # Intersect starting from the rarest tag, so the work is bounded by its postings
+        postings = sorted((self.tag_index.get(tag, set()) for tag in tags), key=len)
+        ids = postings[0].intersection(*postings[1:])
+        matches = [self.by_id[task_id] for task_id in ids]
+        if priority is not None:
+            matches = [task for task in matches if task.get('priority', 'Medium') == priority]
+        matches.sort(key=lambda task: (sort_key(task), task['id']))
+        return matches
+
+    def changes(self):
+        """Return (added, updated, removed) task lists since load or the last save."""
+        return list(self._added.values()), list(self._updated.values()), list(self._removed.values())
+
+    def mark_saved(self):
+        self._added, self._updated, self._removed = {}, {}, {}
+        # Value of every updated field before its first change, for rebase()
+        self._original = {}
+
+    def rebase(self, fresh):
+        """
+        Replay the unsaved changes of this list on top of ``fresh`` (the tasks
+        as another process has saved them since) and take over the result, so
+        the next save writes both.
+
+        Added tasks get new ids if the other process used theirs, and tags and
+        dependencies are merged as sets. Raises ConflictError if both sides
+        changed the same field of a task, or one removed a task the other
+        changed, or the merged dependencies would form a cycle.
+        """
+        added, updated, removed = self.changes()
+        # Clashing edits are found before ``fresh`` is touched
+        merged = {task['id']: self._merge_fields(task, fresh.get(task['id'])) for task in updated}
+        for task in removed:
+            theirs = fresh.get(task['id'])
+            if theirs is None:
+                continue
+            base = {**dict(task), **self._original.get(task['id'], {})}
+            if any(theirs.get(key) != base.get(key) for key in base.keys() | theirs.keys()):
+                raise ConflictError(f"Task {task['id'] + 1} was changed by another process")
+
+        # New tasks go after the ones the other process added; references to
+        # them from this change set follow the new ids. Copies are added, so
+        # a conflict found below leaves this list's own tasks as they were.
+        remap, copies = {}, []
+        for task in sorted(added, key=lambda task: task['id']):
+            copy = fresh.add(_copy(task))
+            copies.append(copy)
+            if copy['id'] != task['id']:
+                remap[task['id']] = copy['id']
+        if remap:
+            for task in copies:
+                if any(prereq in remap for prereq in task.get('depends_on', [])):
+                    fresh.update(task['id'], {'depends_on': [remap.get(p, p) for p in task['depends_on']]})
+            for changes in merged.values():
+                if 'depends_on' in changes:
+                    changes['depends_on'] = [remap.get(p, p) for p in changes['depends_on']]
+
+        for task_id, changes in merged.items():
+            if 'depends_on' in changes:
+                for prereq in set(changes['depends_on']) - set(fresh.get(task_id).get('depends_on', [])):
+                    if prereq in fresh and not fresh.graph.add_edge(task_id, prereq):
+                        raise ConflictError(f"Task {task_id + 1} would be part of a circular dependency")
+            fresh.update(task_id, changes)
+        for task in removed:
+            if task['id'] in fresh:
+                # Drop edges the other process added to the removed task
+                for dependent_id in list(fresh.graph.dependents[task['id']]):
+                    depends_on = fresh.get(dependent_id)['depends_on']
+                    fresh.update(dependent_id, {'depends_on': [p for p in depends_on if p != task['id']]})
+                fresh.remove(task['id'])
+
+        vars(self).update(vars(fresh))
+
+    def _merge_fields(self, ours, theirs):
+        """Changes that apply this list's edits of a task to ``theirs``."""
+        if theirs is None:
+            raise ConflictError(f"Task {ours['id'] + 1} was removed by another process")
+        changes = {}
+        for key, base in self._original.get(ours['id'], {}).items():
+            value, current = ours.get(key), theirs.get(key)
+            if key in _SET_FIELDS:
+                base, value, current = base or [], value or [], current or []
+                dropped = set(base) - set(value)
+                merged = [item for item in current if item not in dropped]
+                changes[key] = merged + [item for item in value if item not in base and item not in merged]
+            elif current == base or current == value:
+                changes[key] = value
+            else:
+                raise ConflictError(f"Task {ours['id'] + 1} was changed by another process")
+        return changes
+
+    def pending(self):
+        """Yield pending tasks in display order."""
+        return self._section(False)
+
+    def completed(self):
+        """Yield completed tasks in display order."""
+        return self._section(True)
+
+    def count(self, completed):
+        return sum(len(ids) for key, ids in self._buckets.items() if key[0] == completed)
+
+    def add(self, task):
+        """Assign the next free id to ``task`` and insert it in display order."""
+        if self.compact and not isinstance(task, Task):
+            task = Task.from_dict(task)
+        task['id'] = self._next_id
+        self._next_id += 1
+        self.by_id[task['id']] = task
+        self._insert(task)
+        self.aggregates.add(task)
+        self._added[task['id']] = task
+        if self._tag_index is not None:
+            self._index_tags(task['id'], task.get('tags', []))
+        if self._graph is not None:
+            self._graph.add_node(task['id'], task.get('completed', False))
+            for prereq in task.get('depends_on', []):
+                self._graph.add_edge(task['id'], prereq)
+        return task
+
+    def remove(self, task_id):
+        """Remove and return the task with the given id."""
+        task = self.by_id.pop(task_id)
+        self._discard(task)
+        self.aggregates.remove(task)
+        self._updated.pop(task_id, None)
+        if self._added.pop(task_id, None) is None:
+            self._removed[task_id] = task
+        if self._graph is not None:
+            self._graph.remove_node(task_id)
+        if self._tag_index is not None:
+            self._unindex_tags(task_id, task.get('tags', []))
+        return task
+
+    def update(self, task_id, changes):
+        """
+        Apply ``changes`` to a task, moving it if its position in the order changes.
+
+        Pass new lists for ``tags`` and ``depends_on`` rather than editing the
+        task's lists in place, so the old values can be taken out of the indexes.
+        """
+        task = self.by_id[task_id]
+        old_key = sort_key(task)
+        old_depends = set(task.get('depends_on', []))
+        old_fields = aggregate_fields(task)
+        if task_id not in self._added:
+            original = self._original.setdefault(task_id, {})
+            for key in changes:
+                original.setdefault(key, task.get(key))
+        task.update(changes)
+        if sort_key(task) != old_key:
+            self._discard(task, old_key)
+            self._insert(task)
+        self.aggregates.replace(old_fields, task)
+        if task_id not in self._added:
+            self._updated[task_id] = task
+        if self._graph is not None:
+            self._sync_graph(task, old_depends)
+        if self._tag_index is not None:
+            # aggregate_fields() holds the tags as they were before the update
+            old_tags, new_tags = set(old_fields[2]), set(task.get('tags', []))
+            self._unindex_tags(task_id, old_tags - new_tags)
+            self._index_tags(task_id, new_tags - old_tags)
+        return task
+
+    def _sync_graph(self, task, old_depends):
+        graph = self._graph
+        graph.set_completed(task['id'], task.get('completed', False))
+        new_depends = set(task.get('depends_on', []))
+        for prereq in old_depends - new_depends:
+            if prereq in graph:
+                graph.remove_edge(task['id'], prereq)
+        for prereq in new_depends - old_depends:
+            if prereq in graph:
+                graph.add_edge(task['id'], prereq)
+
+    def _index_tags(self, task_id, tags):
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(task_id)
+
+    def _unindex_tags(self, task_id, tags):
+        for tag in tags:
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self._tag_index[tag]
+
+    def _section(self, completed):
+        for key in sorted(self._buckets):
+            if key[0] == completed:
+                for task_id in self._buckets[key]:
+                    yield self.by_id[task_id]
+
+    def _insert(self, task):
+        ids = self._buckets.setdefault(sort_key(task), [])
+        if not ids or ids[-1] < task['id']:
+            ids.append(task['id'])
+        else:
+            insort(ids, task['id'])
+
+    def _discard(self, task, key=None):
+        key = sort_key(task) if key is None else key
+        ids = self._buckets[key]
+        del ids[bisect_left(ids, task['id'])]
+        if not ids:
+            del self._buckets[key]
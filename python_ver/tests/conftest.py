@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the python_ver tests.
+
+Run from the repository root:
+
+    python -m pytest python_ver/tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def cli_env(tmp_path):
+    """Environment for running ``python -m python_ver.todo`` against a throwaway data directory."""
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'require_auth': False}))
+    env = dict(os.environ)
+    env.update({
+        'TODO_FILE': str(tmp_path / 'tasks.json'),
+        'TODO_CONFIG_FILE': str(config),
+        'TODO_DB_FILE': str(tmp_path / 'tasks.db'),
+        'TODO_SOCKET': str(tmp_path / 'todo.sock'),
+        'TODO_DAEMON': 'off',
+    })
+    env.pop('TODO_STORAGE', None)
+    return env
+
+
+@pytest.fixture
+def todo(cli_env):
+    """Run the CLI with ``cli_env``; returns the CompletedProcess."""
+    def run(*argv):
+        return subprocess.run([sys.executable, '-m', 'python_ver.todo', *argv], cwd=REPO_ROOT, env=cli_env,
+                              stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    return run
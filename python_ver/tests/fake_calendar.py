@@ -0,0 +1,165 @@
+"""
+Local fake of the parts of the Google Calendar v3 REST API that
+plugins/google_calendar.py uses (events insert/get/list, sync and page tokens,
+the multipart batch endpoint), for tests and benchmarks without network access
+or a Google account.
+
+Failures can be injected: ``fail_after_insert`` answers that many inserts
+with 503 after storing them, and ``drop_batches`` closes the connection
+without an answer for that many batch requests (after running them), as when
+a response is lost on the way back.
+"""
+
+import email.parser
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+EVENTS_PATH = '/calendar/v3/calendars/primary/events'
+BATCH_PATH = '/batch/calendar/v3'
+
+
+def _error(status, message):
+    return status, {'error': {'code': status, 'message': message}}
+
+
+class FakeCalendar:
+    """In-memory calendar: events plus a change log that sync tokens index into."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {}
+        self.changes = []  # event ids in the order they changed
+        self.expired_before = 0  # sync tokens older than this get 410 Gone
+        self.requests = 0
+        self.fail_after_insert = 0
+        self.drop_batches = 0
+
+    def handle(self, method, target, body):
+        """Serve one API call; returns (status, JSON body)."""
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == EVENTS_PATH:
+            if method == 'POST':
+                return self.insert(json.loads(body))
+            return self.list(query)
+        if url.path.startswith(EVENTS_PATH + '/') and method == 'GET':
+            return self.get(url.path[len(EVENTS_PATH) + 1:])
+        return _error(404, 'Not Found')
+
+    def insert(self, event):
+        with self.lock:
+            event_id = event.get('id') or f"evt{len(self.events)}"
+            if event_id in self.events:
+                return _error(409, 'The requested identifier already exists.')
+            event = dict(event, id=event_id, status='confirmed',
+                         htmlLink=f"https://calendar.example/event?eid={event_id}")
+            self.events[event_id] = event
+            self.changes.append(event_id)
+            if self.fail_after_insert:
+                self.fail_after_insert -= 1
+                return _error(503, 'Backend Error')
+            return 200, event
+
+    def get(self, event_id):
+        with self.lock:
+            if event_id not in self.events:
+                return _error(404, 'Not Found')
+            return 200, self.events[event_id]
+
+    def list(self, query):
+        with self.lock:
+            if 'syncToken' in query:
+                since = int(query['syncToken'])
+                if since < self.expired_before:
+                    return _error(410, 'Sync token is no longer valid')
+                ids = list(dict.fromkeys(self.changes[since:]))
+            else:
+                ids = list(self.events)
+            items = [self.events[event_id] for event_id in ids]
+            if 'timeMin' in query:
+                items = sorted((item for item in items if item['start']['date'] >= query['timeMin'][:10]),
+                               key=lambda item: item['start']['date'])
+            start = int(query.get('pageToken', 0))
+            end = start + int(query.get('maxResults', 250))
+            page = {'kind': 'calendar#events', 'items': items[start:end]}
+            if end < len(items):
+                page['nextPageToken'] = str(end)
+            else:
+                page['nextSyncToken'] = str(len(self.changes))
+            return 200, page
+
+    def batch(self, content_type, body):
+        """Answer a multipart/mixed batch request with a multipart/mixed response."""
+        message = email.parser.BytesParser().parsebytes(
+            b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+        boundary = 'batch_fake_boundary'
+        parts = []
+        for part in message.get_payload():
+            request = part.get_payload(decode=False)
+            head, _, request_body = request.partition('\r\n\r\n') if '\r\n\r\n' in request else request.partition('\n\n')
+            method, target = head.splitlines()[0].split(' ')[:2]
+            status, payload = self.handle(method, target, request_body)
+            content_id = part['Content-ID'].strip('<>')
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n")
+        return f"multipart/mixed; boundary={boundary}", ''.join(parts) + f"--{boundary}--\r\n"
+
+
+def serve(calendar, latency=0):
+    """Start the fake API on a free local port, waiting ``latency`` seconds per request; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.respond()
+
+        def do_POST(self):
+            self.respond()
+
+        def respond(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with calendar.lock:
+                calendar.requests += 1
+            time.sleep(latency)
+            if self.path.startswith(BATCH_PATH):
+                content_type, text = calendar.batch(self.headers['Content-Type'], body)
+                with calendar.lock:
+                    drop, calendar.drop_batches = calendar.drop_batches > 0, max(calendar.drop_batches - 1, 0)
+                if drop:
+                    self.close_connection = True
+                    return
+            else:
+                status, payload = calendar.handle(self.command, self.path, body.decode())
+                content_type, text = 'application/json; charset=UTF-8', json.dumps(payload)
+                if status != 200:
+                    self.send_error_json(status, text)
+                    return
+            data = text.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_error_json(self, status, text):
+            data = text.encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,86 @@
+"""Archive: segment files, the manifest and the cutoff."""
+
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from python_ver import archive
+from python_ver.aggregates import Aggregates
+
+
+def make_task(task_id, completed_at, **fields):
+    return {'id': task_id, 'task': f"task {task_id}", 'priority': 'Medium', 'completed': True, 'tags': ['x'],
+            'created_at': '2024-01-01T09:00:00', 'depends_on': [], 'completed_at': completed_at, **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return archive.Archive(tmp_path / 'tasks.json.archive')
+
+
+def test_empty_archive(store):
+    assert store.segments() == []
+    assert list(store.iter_tasks()) == []
+    assert store.revision() == [0, None]
+
+
+def test_segments_are_appended_with_their_counts(store):
+    first = [make_task(0, '2024-02-01T10:00:00'), make_task(1, '2024-01-15T10:00:00')]
+    second = [make_task(2, '2024-03-01T10:00:00', priority='High')]
+    store.append(first)
+    entry = store.append(second)
+    assert entry['file'] == 'segment-000002.ndjson.gz'
+    segments = store.segments()
+    assert [segment['count'] for segment in segments] == [2, 1]
+    assert (segments[0]['first_completed'], segments[0]['last_completed']) == \
+        ('2024-01-15T10:00:00', '2024-02-01T10:00:00')
+    assert store.aggregates() == Aggregates.from_tasks(first + second)
+    archived = list(store.iter_tasks())
+    assert [task['id'] for task in archived] == [0, 1, 2]
+    assert all('archived_at' in task for task in archived)
+
+
+def test_segments_are_gzipped_ndjson(store):
+    entry = store.append([make_task(0, '2024-02-01T10:00:00')])
+    with gzip.open(store.path / entry['file'], 'rt', encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == [0]
+
+
+def test_remove_takes_a_segment_back_out(store):
+    kept = store.append([make_task(0, '2024-02-01T10:00:00')])
+    dropped = store.append([make_task(1, '2024-02-02T10:00:00')])
+    store.remove(dropped)
+    assert store.segments() == [kept]
+    assert not (store.path / dropped['file']).exists()
+    # The next segment does not reuse a file name still in the manifest
+    assert store.append([make_task(2, '2024-02-03T10:00:00')])['file'] == 'segment-000002.ndjson.gz'
+
+
+def test_manifest_of_another_version_is_refused(store):
+    store.append([make_task(0, '2024-02-01T10:00:00')])
+    store.manifest_path.write_text(json.dumps({'version': archive.MANIFEST_VERSION + 1, 'segments': []}))
+    with pytest.raises(ValueError):
+        store.segments()
+
+
+def test_zstd_needs_zstandard(monkeypatch):
+    monkeypatch.setattr(archive, '_zstandard', lambda: None)
+    assert archive.compression_available('gzip')
+    assert not archive.compression_available('zstd')
+
+
+@pytest.mark.parametrize('task, expected', [
+    (make_task(0, '2024-01-31T23:59:59'), True),
+    (make_task(0, '2024-02-01T00:00:00'), False),
+    (make_task(0, None), True),  # dated by created_at
+    (make_task(0, '2024-01-01T00:00:00', completed=False), False),
+    (make_task(0, 'not a date'), False),
+])
+def test_completed_before(task, expected):
+    assert archive.completed_before(task, datetime(2024, 2, 1)) is expected
+
+
+def test_archive_cutoff():
+    assert archive.archive_cutoff(90, now=datetime(2024, 5, 1)) == datetime(2024, 2, 1)
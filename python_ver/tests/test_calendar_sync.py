@@ -0,0 +1,90 @@
+"""CalendarSync (plugins/google_calendar.py) against the local fake Calendar API in fake_calendar.py."""
+
+import datetime
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT
+from fake_calendar import FakeCalendar, serve
+
+pytest.importorskip('googleapiclient')
+pytest.importorskip('google_auth_httplib2')
+sys.path.insert(0, str(REPO_ROOT / 'plugins'))
+
+import google_calendar  # noqa: E402
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+from googleapiclient.errors import HttpError  # noqa: E402
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    monkeypatch.setattr(google_calendar, 'RETRY_DELAY', 0)
+    calendar = FakeCalendar()
+    server = serve(calendar)
+    calendar.api_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield calendar
+    server.shutdown()
+
+
+@pytest.fixture
+def sync(calendar, tmp_path):
+    return google_calendar.CalendarSync(credentials=AnonymousCredentials(), api_url=calendar.api_url,
+                                        batch_size=10, state_file=str(tmp_path / 'calendar_sync.json'))
+
+
+def make_events(count):
+    today = datetime.date.today()
+    return [google_calendar.task_event(f"Task {i}", today + datetime.timedelta(days=i % 30)) for i in range(count)]
+
+
+def summaries(results):
+    return [result['summary'] for result in results]
+
+
+def test_insert_events_returns_created_events_in_order(calendar, sync):
+    events = make_events(35)
+    results = sync.insert_events(events)
+    assert summaries(results) == [event['summary'] for event in events]
+    assert all(result['htmlLink'] for result in results)
+    assert len(calendar.events) == 35
+    # 4 batches of at most 10 inserts
+    assert calendar.requests == 4
+
+
+def test_server_errors_are_retried_without_duplicates(calendar, sync):
+    events = make_events(20)
+    # The first 5 inserts are stored, but answered with 503
+    calendar.fail_after_insert = 5
+    results = sync.insert_events(events)
+    assert summaries(results) == [event['summary'] for event in events]
+    assert len(calendar.events) == 20
+
+
+def test_dropped_connection_is_retried_without_duplicates(calendar, sync):
+    events = make_events(5)
+    # More drops than httplib2 retries by itself, so the batch fails
+    calendar.drop_batches = 2
+    results = sync.insert_events(events)
+    assert summaries(results) == [event['summary'] for event in events]
+    assert len(calendar.events) == 5
+
+
+def test_conflict_on_first_attempt_is_an_error(calendar, sync):
+    first = sync.insert_events(make_events(1))[0]
+    duplicate = dict(make_events(1)[0], id=first['id'])
+    result = sync.insert_events([duplicate])[0]
+    assert isinstance(result, HttpError) and result.resp.status == 409
+    assert len(calendar.events) == 1
+
+
+def test_fetch_changes_uses_sync_tokens(calendar, sync):
+    events = make_events(30)
+    sync.insert_events(events)
+    assert len(sync.fetch_changes()) == 30
+    sync.insert_events(events[:5])
+    assert len(sync.fetch_changes()) == 5
+    assert sync.fetch_changes() == []
+    # An expired sync token falls back to a full sync
+    calendar.expired_before = len(calendar.changes) + 1
+    assert len(sync.fetch_changes()) == 35
@@ -0,0 +1,46 @@
+"""Writer processes adding tasks to one store at the same time lose none of them."""
+
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import pytest
+
+from conftest import REPO_ROOT
+from python_ver.storage import open_storage
+
+WRITERS = 4
+TASKS_PER_WRITER = 20
+
+# Each writer waits for the same start time, then adds its tasks one command at a time
+WRITER = '''
+import contextlib, os, sys, time
+from python_ver import todo
+
+writer, start_at = sys.argv[1], float(sys.argv[2])
+time.sleep(max(0.0, start_at - time.time()))
+with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    for number in range({count}):
+        todo.add_task(f"w{{writer}}-t{{number}}")
+'''.format(count=TASKS_PER_WRITER)
+
+
+@pytest.mark.parametrize('backend', ['json', 'journal'])
+def test_concurrent_adds_are_all_kept(backend, cli_env, tmp_path):
+    env = dict(cli_env, TODO_STORAGE=backend)
+    start_at = time.time() + 1.0
+    writers = [subprocess.Popen([sys.executable, '-c', WRITER, str(writer), str(start_at)], cwd=REPO_ROOT,
+                                env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+               for writer in range(WRITERS)]
+    for process in writers:
+        out, err = process.communicate(timeout=120)
+        assert process.returncode == 0, out + err
+
+    records = open_storage(backend, tmp_path / 'tasks.json', tmp_path / 'tasks.db').load()
+    texts = Counter(record['task'] for record in records)
+    expected = {f"w{writer}-t{number}" for writer in range(WRITERS) for number in range(TASKS_PER_WRITER)}
+    assert set(texts) == expected
+    assert all(times == 1 for times in texts.values())
+    assert len({record['id'] for record in records}) == len(records)
@@ -0,0 +1,69 @@
+"""Export: tasks written with --format csv/json/ndjson import back as the same tasks."""
+
+import io
+import json
+
+import pytest
+
+from python_ver import export, importer
+
+TASKS = [
+    {'id': 0, 'task': 'Plan, then "ship"', 'priority': 'High', 'completed': False, 'tags': ['work', 'q2'],
+     'depends_on': [], 'created_at': '2024-05-01T09:00:00', 'completed_at': None},
+    {'id': 1, 'task': 'Café ☕ run', 'priority': 'Low', 'completed': True, 'tags': [],
+     'depends_on': [0], 'created_at': '2024-05-01T09:30:00', 'completed_at': '2024-05-02T08:00:00.123456'},
+    {'id': 4, 'task': 'Multi\nline', 'priority': 'Medium', 'completed': False, 'tags': ['x'],
+     'depends_on': [0, 1], 'created_at': '2024-05-03T10:00:00', 'completed_at': None},
+]
+
+IMPORTED_FIELDS = ('task', 'priority', 'completed', 'tags', 'created_at', 'completed_at')
+
+
+def exported(fmt, tasks=TASKS):
+    out = io.StringIO()
+    assert export.write_tasks(iter(tasks), fmt, out) == len(tasks)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('fmt', export.FORMATS)
+def test_export_imports_back(fmt):
+    out = io.StringIO(exported(fmt))
+    tasks = [importer.new_task(record, 'unused') for _, record in importer.read_records(out, fmt)]
+    expected = [{name: task[name] for name in IMPORTED_FIELDS if task[name] is not None} for task in TASKS]
+    assert [{name: task[name] for name in IMPORTED_FIELDS if task.get(name) is not None} for task in tasks] == \
+        expected
+
+
+@pytest.mark.parametrize('fmt', ['json', 'ndjson'])
+def test_ids_are_the_displayed_numbers(fmt):
+    text = exported(fmt)
+    records = json.loads(text) if fmt == 'json' else [json.loads(line) for line in text.splitlines()]
+    assert [(record['id'], record['depends_on']) for record in records] == [(1, []), (2, [1]), (5, [1, 2])]
+
+
+def test_csv_joins_list_fields():
+    lines = exported('csv').splitlines()
+    assert lines[0] == ','.join(export.TASK_FIELDS)
+    assert lines[1] == '1,"Plan, then ""ship""",High,False,work;q2,,2024-05-01T09:00:00,'
+
+
+@pytest.mark.parametrize('fmt', export.FORMATS)
+def test_empty_export(fmt):
+    text = exported(fmt, [])
+    if fmt == 'json':
+        assert json.loads(text) == []
+    elif fmt == 'csv':
+        assert text == ','.join(export.TASK_FIELDS) + '\n'
+    else:
+        assert text == ''
+
+
+def test_exports_larger_than_a_chunk(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 2)
+    tasks = [dict(TASKS[0], id=i) for i in range(5)]
+    assert [record['id'] for record in json.loads(exported('json', tasks))] == [1, 2, 3, 4, 5]
+    assert len(exported('csv', tasks).splitlines()) == 6
+
+
+def test_archived_tasks_have_no_id():
+    assert json.loads(exported('ndjson', [dict(TASKS[0], id=None)]))['id'] is None
@@ -0,0 +1,60 @@
+"""DependencyGraph: cycle rejection and the blocked/ready bookkeeping."""
+
+from python_ver.graph import DependencyGraph
+
+
+def chain_graph(size):
+    """Tasks 0..size-1 where each task depends on the one before it."""
+    graph = DependencyGraph()
+    for node in range(size):
+        graph.add_node(node)
+    for node in range(1, size):
+        assert graph.add_edge(node, node - 1)
+    return graph
+
+
+def test_self_dependency_is_rejected():
+    graph = chain_graph(1)
+    assert not graph.add_edge(0, 0)
+    assert graph.prereqs[0] == set()
+
+
+def test_edge_closing_a_cycle_is_rejected():
+    graph = chain_graph(5)
+    assert not graph.add_edge(0, 4)
+    assert graph.prereqs[0] == set()
+    assert graph.dependents[4] == set()
+    assert graph.topological_order() == [0, 1, 2, 3, 4]
+
+
+def test_edges_against_the_current_order_are_accepted():
+    graph = DependencyGraph()
+    for node in range(4):
+        graph.add_node(node)
+    # Added last-to-first, so every edge needs a reorder
+    assert graph.add_edge(0, 1) and graph.add_edge(1, 2) and graph.add_edge(2, 3)
+    assert graph.topological_order() == [3, 2, 1, 0]
+    assert not graph.add_edge(3, 0)
+    assert graph.chain(0) == [3, 2, 1]
+
+
+def test_from_tasks_skips_missing_prereqs_and_self_edges():
+    graph = DependencyGraph.from_tasks([{'id': 0, 'depends_on': [0, 7]}, {'id': 1, 'depends_on': [0]}])
+    assert graph.prereqs == {0: set(), 1: {0}}
+
+
+def test_completion_unblocks_dependents():
+    graph = chain_graph(3)
+    assert graph.ready() == {0}
+    graph.set_completed(0, True)
+    assert graph.ready() == {1}
+    assert graph.incomplete_prereqs(2) == [1]
+    graph.set_completed(0, False)
+    assert graph.ready() == {0}
+
+
+def test_removing_a_node_drops_its_edges():
+    graph = chain_graph(3)
+    graph.remove_node(1)
+    assert graph.prereqs[2] == set()
+    assert graph.ready() == {0, 2}
@@ -0,0 +1,99 @@
+"""Import: reading CSV/JSON/NDJSON/todo.txt files and validating their records."""
+
+import io
+
+import pytest
+
+from python_ver import importer
+from python_ver.todo import check_new_task
+
+NOW = '2024-05-01T09:00:00'
+
+
+def records(text, fmt):
+    return [record for _, record in importer.read_records(io.StringIO(text), fmt)]
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Call mom', {'task': 'Call mom', 'priority': 'Medium', 'completed': False, 'created_at': None, 'tags': []}),
+    ('(A) 2024-04-30 Pay rent +home @phone',
+     {'task': 'Pay rent', 'priority': 'High', 'completed': False, 'created_at': '2024-04-30',
+      'tags': ['home', 'phone']}),
+    ('(D) Someday maybe', {'task': 'Someday maybe', 'priority': 'Low', 'completed': False, 'created_at': None,
+                           'tags': []}),
+    ('x 2024-05-02 2024-04-30 File taxes pri:B',
+     {'task': 'File taxes', 'priority': 'Medium', 'completed': True, 'completed_at': '2024-05-02',
+      'created_at': '2024-04-30', 'tags': []}),
+    # "+" or "@" alone, or inside a word, is text
+    ('Buy milk + eggs a@b', {'task': 'Buy milk + eggs a@b', 'priority': 'Medium', 'completed': False,
+                             'created_at': None, 'tags': []}),
+])
+def test_parse_todo_txt(line, expected):
+    assert importer.parse_todo_txt(line) == expected
+
+
+def test_todo_txt_task():
+    record = importer.parse_todo_txt('x 2024-05-02 2024-04-30 (A) File taxes +home')
+    task = importer.new_task(record, NOW)
+    assert task['completed'] and task['completed_at'].startswith('2024-05-02')
+    assert task['created_at'].startswith('2024-04-30')
+    assert task['tags'] == ['home']
+
+
+def test_csv_records():
+    text = 'Description,Priority,Completed,Tags\nShip it,High,yes,work; release\n\nRest,,,\n'
+    tasks = [importer.new_task(record, NOW) for record in records(text, 'csv')]
+    assert [(task['task'], task['priority'], task['completed'], task['tags']) for task in tasks] == [
+        ('Ship it', 'High', True, ['work', 'release']),
+        ('Rest', 'Medium', False, []),
+    ]
+    assert tasks[1]['created_at'] == NOW
+
+
+def test_csv_without_a_task_column_is_refused():
+    with pytest.raises(ValueError):
+        records('name,priority\nx,High\n', 'csv')
+
+
+def test_json_file_may_hold_one_object_per_line():
+    text = '{"task": "a"}\n{"task": "b", "tags": ["x"]}\n'
+    assert records(text, 'json') == [{'task': 'a'}, {'task': 'b', 'tags': ['x']}]
+    assert records('[' + text.replace('\n', ',', 1) + ']', 'json') == records(text, 'json')
+
+
+def test_bad_ndjson_line_is_one_rejected_record():
+    result = records('{"task": "a"}\n{"task": \n{"task": "c"}\n', 'ndjson')
+    assert isinstance(result[1], ValueError)
+    with pytest.raises(ValueError):
+        importer.new_task(result[1], NOW)
+    assert [importer.new_task(record, NOW)['task'] for record in (result[0], result[2])] == ['a', 'c']
+
+
+@pytest.mark.parametrize('record', [
+    ['not', 'an', 'object'],
+    {'priority': 'High'},
+    {'task': 'a', 'tags': [1, 2]},
+    {'task': 'a', 'completed': 'maybe'},
+    {'task': 'a', 'created_at': 'yesterday'},
+    {'task': 'a', 'completed': True, 'completed_at': '31/05/2024'},
+])
+def test_unusable_records_are_refused(record):
+    with pytest.raises(ValueError):
+        importer.new_task(record, NOW)
+
+
+@pytest.mark.parametrize('record', [{'task': '   '}, {'task': 'a', 'priority': 'Urgent'}])
+def test_records_add_would_refuse_fail_the_check(record):
+    task = importer.new_task(record, NOW)
+    with pytest.raises(ValueError):
+        check_new_task(task['task'], task['priority'])
+
+
+def test_ids_and_dependencies_in_the_file_are_ignored():
+    task = importer.new_task({'id': 7, 'task': 'a', 'depends_on': [3]}, NOW)
+    assert 'id' not in task and task['depends_on'] == []
+
+
+def test_detect_format():
+    assert [importer.detect_format(name) for name in ('a.CSV', 'b.jsonl', 'c.json', 'todo.txt', 'd.xml')] == \
+        ['csv', 'ndjson', 'json', 'todotxt', None]
@@ -0,0 +1,118 @@
+"""Offline queue replay: coalescing operations per task and applying the result."""
+
+import json
+
+import pytest
+
+from python_ver.offline_queue import apply_queue, mark_synced, read_queue
+from python_ver.tasklist import TaskList
+from python_ver.todo import check_new_task
+
+
+def operation(timestamp, kind, task_id, **data):
+    entry = {'timestamp': timestamp, 'operation': kind, 'task_id': task_id}
+    if data:
+        entry['task_data'] = data
+    return entry
+
+
+@pytest.fixture
+def queue(tmp_path):
+    path = tmp_path / 'offline_queue.json'
+
+    def write(*operations):
+        path.write_text(json.dumps(list(operations), indent=2))
+        return path
+    return write
+
+
+def replay(path, tasks=None):
+    tasks = tasks if tasks is not None else TaskList()
+    result = apply_queue(tasks, read_queue(path).tasks, check_new_task)
+    return tasks, result
+
+
+def test_add_edits_and_completion_become_one_task(queue):
+    path = queue(
+        operation(100, 'add', 'u1', task='draft', priority='Low', tags=['a']),
+        operation(200, 'edit', 'u1', task='final'),
+        operation(300, 'complete', 'u1'),
+    )
+    coalesced = read_queue(path)
+    assert (coalesced.read, coalesced.used, len(coalesced.tasks)) == (3, 3, 1)
+    tasks, (added, updated, removed, unknown, rejected) = replay(path)
+    assert (added, updated, removed, unknown, rejected) == (1, 0, 0, 0, [])
+    [task] = list(tasks)
+    assert (task['task'], task['priority'], task['tags'], task['completed'], task['sync_id']) == \
+        ('final', 'Low', ['a'], True, 'u1')
+
+
+def test_task_added_and_deleted_in_the_queue_is_never_written(queue):
+    path = queue(operation(100, 'add', 'u1', task='gone'), operation(200, 'delete', 'u1'))
+    tasks, result = replay(path)
+    assert len(tasks) == 0 and result == (0, 0, 0, 0, [])
+
+
+def test_newest_timestamp_wins_whatever_the_order(queue):
+    path = queue(
+        operation(300, 'edit', 'u1', priority='High'),
+        operation(100, 'add', 'u1', task='a', priority='Low'),
+        operation(200, 'edit', 'u1', priority='Medium'),
+    )
+    tasks, _ = replay(path)
+    assert [task['priority'] for task in tasks] == ['High']
+
+
+def test_delete_before_a_later_add_keeps_the_task(queue):
+    path = queue(operation(200, 'add', 'u1', task='back'), operation(100, 'delete', 'u1'))
+    tasks, _ = replay(path)
+    assert [task['task'] for task in tasks] == ['back']
+
+
+def test_replaying_again_updates_instead_of_adding(queue):
+    tasks, _ = replay(queue(operation(100, 'add', 'u1', task='a')))
+    tasks, result = replay(queue(operation(200, 'edit', 'u1', priority='High')), tasks)
+    assert result == (0, 1, 0, 0, [])
+    assert [(task['task'], task['priority']) for task in tasks] == [('a', 'High')]
+    tasks, result = replay(queue(operation(300, 'remove', 'u1')), tasks)
+    assert result == (0, 0, 1, 0, []) and len(tasks) == 0
+
+
+def test_edits_of_unknown_tasks_are_counted(queue):
+    tasks, result = replay(queue(operation(100, 'edit', 'nobody', task='x')))
+    assert len(tasks) == 0 and result[3] == 1
+
+
+def test_invalid_tasks_are_rejected_and_extra_fields_dropped(queue):
+    path = queue(
+        operation(100, 'add', 'bad', task='x', priority='Urgent'),
+        operation(100, 'add', 'empty', task='   '),
+        operation(100, 'add', 'good', task=' ok ', tags='x;y', history=[{'change': 'created'}],
+                  shared_with=['eleena'], id='good', synced=False),
+    )
+    tasks, (added, _, _, _, rejected) = replay(path)
+    assert added == 1 and len(rejected) == 2
+    assert all(message.startswith(('bad:', 'empty:')) for message in rejected)
+    [task] = list(tasks)
+    assert task['task'] == 'ok' and task['tags'] == ['x', 'y']
+    assert 'history' not in task and 'shared_with' not in task
+
+
+def test_malformed_operations_are_skipped(queue):
+    path = queue(
+        'not an operation',
+        {'operation': 'add', 'task_id': 'u1', 'timestamp': 'noon', 'task_data': {'task': 'a'}},
+        {'operation': 'rename', 'task_id': 'u1', 'timestamp': 1},
+        operation(100, 'add', 'u2', task='b'),
+    )
+    coalesced = read_queue(path)
+    assert (coalesced.read, coalesced.used, coalesced.skipped) == (4, 1, 3)
+
+
+def test_mark_synced_skips_them_next_time(queue):
+    path = queue(operation(100, 'add', 'u1', task='a'), 'malformed', operation(200, 'add', 'u2', task='b'))
+    mark_synced(path, read_queue(path).read - 1)
+    entries = json.loads(path.read_text())
+    assert [entry.get('synced') if isinstance(entry, dict) else entry for entry in entries] == \
+        [True, 'malformed', None]
+    assert list(read_queue(path).tasks) == ['u2']
@@ -0,0 +1,71 @@
+"""Search queries: parsing, the SQLite index and the matcher used for archived tasks."""
+
+import pytest
+
+from python_ver.search import SearchIndex, parse_query, query_matcher
+
+TASKS = [
+    {'id': 0, 'task': 'Fix the deploy script', 'priority': 'High', 'completed': False, 'tags': ['ops'],
+     'depends_on': []},
+    {'id': 1, 'task': 'Send invoice to ACME', 'priority': 'Medium', 'completed': False, 'tags': ['billing'],
+     'depends_on': [0]},
+    {'id': 2, 'task': 'Write quarterly report', 'priority': 'Low', 'completed': True, 'tags': ['billing'],
+     'depends_on': []},
+    {'id': 3, 'task': 'Deploy dependency update', 'priority': 'Medium', 'completed': False, 'tags': [],
+     'depends_on': []},
+]
+
+QUERIES = [
+    ('deploy', [0, 3]),
+    ('DEPLOY fix', [0]),
+    ('report OR invoice', [1, 2]),
+    ('dep*', [0, 3]),
+    ('dep* OR billing acme', [0, 1, 3]),
+    ('ops', [0]),
+    ('missing', []),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(tmp_path / 'tasks.json.search')
+    index.rebuild(TASKS, revision=1)
+    yield index
+    index.close()
+
+
+def test_parse_query_groups_terms():
+    assert parse_query('fix deploy OR report*') == [[('fix', False), ('deploy', False)], [('report', True)]]
+    assert parse_query('project-3*') == [[('project', False), ('3', True)]]
+
+
+@pytest.mark.parametrize('query', ['', '   ', 'OR', '*'])
+def test_empty_query_is_refused(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+@pytest.mark.parametrize('query, expected', QUERIES)
+def test_index_search(index, query, expected):
+    # Display order: pending before completed, then priority, then id
+    assert [task['id'] for task in index.search(query)] == expected
+
+
+@pytest.mark.parametrize('query, expected', QUERIES)
+def test_matcher_agrees_with_the_index(query, expected):
+    matches = query_matcher(query)
+    assert {task['id'] for task in TASKS if matches(task)} == set(expected)
+
+
+def test_filters(index):
+    assert [task['id'] for task in index.search('billing', completed=False)] == [1]
+    assert [task['id'] for task in index.search('deploy', priority='Medium')] == [3]
+
+
+def test_apply_keeps_the_index_current(index):
+    updated = dict(TASKS[0], task='Fix the build')
+    added = {'id': 4, 'task': 'Deploy docs', 'priority': 'Low', 'completed': False, 'tags': [], 'depends_on': []}
+    index.apply([added], [updated], [TASKS[3]], revision=2)
+    assert [task['id'] for task in index.search('deploy')] == [4]
+    assert [task['id'] for task in index.search('build')] == [0]
+    assert index.revision() == 2
@@ -0,0 +1,52 @@
+"""
+Startup budget of the CLI: ``todo.py add x`` has to stay fast, and importing
+todo.py must not load the modules that only some commands need.
+
+The budget is a median over several runs and can be raised on slow machines
+with ``TODO_STARTUP_BUDGET_MS``.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from conftest import REPO_ROOT
+
+# Modules that must not be imported just by loading todo.py
+LAZY_MODULES = ('rich', 'speech_recognition', 'asyncio', 'sqlite3', 'tempfile', 'numpy', 'csv', 'socket',
+                'python_ver.analytics', 'python_ver.archive', 'python_ver.daemon', 'python_ver.export',
+                'python_ver.importer', 'python_ver.offline_queue')
+
+DEFAULT_BUDGET_MS = 120
+RUNS = 7
+
+
+def loaded_modules(code, env):
+    """Names from LAZY_MODULES in sys.modules after running ``code``."""
+    probe = f'{code}; import sys; print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', probe], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    last_line = (result.stdout.strip().splitlines() or [''])[-1]
+    return {name for name in last_line.split(',') if name}
+
+
+def test_import_loads_no_lazy_modules(cli_env):
+    # site may already load some of them (e.g. tempfile from a .pth file)
+    preloaded = loaded_modules('pass', cli_env)
+    eager = loaded_modules('import python_ver.todo', cli_env) - preloaded
+    assert not eager, f"importing todo.py loads {', '.join(sorted(eager))}; import them where they are used"
+
+
+def test_add_is_within_budget(cli_env, todo):
+    budget = float(os.environ.get('TODO_STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+    assert todo('add', 'warm-up').returncode == 0
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = todo('add', 'x')
+        timings.append((time.perf_counter() - start) * 1000)
+        assert result.returncode == 0, result.stdout + result.stderr
+    median = statistics.median(timings)
+    assert median <= budget, f"todo.py add x takes {median:.1f} ms (median of {RUNS}), budget {budget:.0f} ms"
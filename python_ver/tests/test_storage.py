@@ -0,0 +1,150 @@
+"""Storage backends: round trips, change sets, the id high-water mark and journal recovery."""
+
+import json
+
+import pytest
+
+from python_ver.storage import JournalStorage, open_storage
+
+BACKENDS = ('json', 'journal', 'sqlite')
+
+
+def make_task(task_id, text, **fields):
+    return {'id': task_id, 'task': text, 'priority': 'Medium', 'completed': False, 'tags': [],
+            'created_at': '2024-05-01T09:00:00', 'depends_on': [], **fields}
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request, tmp_path):
+    storage = open_storage(request.param, tmp_path / 'tasks.json', tmp_path / 'tasks.db')
+    yield storage
+    if hasattr(storage, 'close'):
+        storage.close()
+
+
+def by_id(tasks):
+    return {task['id']: task for task in tasks}
+
+
+def test_round_trip_keeps_every_field(store):
+    tasks = [
+        make_task(0, 'write report', priority='High', tags=['work', 'q2']),
+        make_task(1, 'send report', depends_on=[0], completed=True, completed_at='2024-05-02T10:00:00'),
+        make_task(2, 'plan trip', priority='Low', due_date='2024-06-01'),
+    ]
+    store.save(tasks)
+    assert by_id(store.load()) == by_id(tasks)
+    assert by_id(store.iter_tasks()) == by_id(tasks)
+
+
+def test_empty_store_loads_nothing(store):
+    assert store.load() == []
+    assert list(store.iter_tasks()) == []
+
+
+def test_change_sets_are_applied(store):
+    tasks = [make_task(i, f"task {i}") for i in range(3)]
+    store.save(tasks)
+    added = make_task(3, 'task 3')
+    updated = dict(tasks[1], completed=True, tags=['done'])
+    removed = tasks[0]
+    store.save([updated, tasks[2], added], added=[added], updated=[updated], removed=[removed])
+    assert by_id(store.load()) == {1: updated, 2: tasks[2], 3: added}
+
+
+def test_journal_ignores_a_torn_last_line(tmp_path):
+    store = JournalStorage(tmp_path / 'tasks.json')
+    store.save([make_task(0, 'a')])
+    added = make_task(1, 'b')
+    store.save([make_task(0, 'a'), added], added=[added])
+    with open(store.journal_path, 'a') as f:
+        f.write('{"op": "put", "task": {"id": 2, "ta')
+    assert by_id(JournalStorage(tmp_path / 'tasks.json').load()) == {0: make_task(0, 'a'), 1: added}
+
+
+def test_saves_after_a_torn_last_line_are_kept(tmp_path):
+    store = JournalStorage(tmp_path / 'tasks.json')
+    tasks = [make_task(0, 'one')]
+    store.save(tasks)
+    tasks.append(make_task(1, 'two'))
+    store.save(tasks, added=tasks[-1:])
+    with open(store.journal_path, 'a') as f:
+        f.write('{"op":"put","task":{"id":5,"ta')
+    store = JournalStorage(tmp_path / 'tasks.json')
+    tasks = store.load()
+    for i, text in ((2, 'three'), (3, 'four')):
+        tasks.append(make_task(i, text))
+        store.save(tasks, added=tasks[-1:])
+    assert [task['task'] for task in JournalStorage(tmp_path / 'tasks.json').load()] == \
+        ['one', 'two', 'three', 'four']
+
+
+def test_saves_after_a_stale_journal_are_kept(tmp_path):
+    store = JournalStorage(tmp_path / 'tasks.json')
+    tasks = [make_task(0, 'one')]
+    store.save(tasks)
+    tasks.append(make_task(1, 'two'))
+    store.save(tasks, added=tasks[-1:])
+    journal = store.journal_path.read_text()
+    store.compact(tasks)
+    store.journal_path.write_text(journal)
+    store = JournalStorage(tmp_path / 'tasks.json')
+    tasks = store.load()
+    tasks.append(make_task(2, 'three'))
+    store.save(tasks, added=tasks[-1:])
+    assert [task['task'] for task in JournalStorage(tmp_path / 'tasks.json').load()] == ['one', 'two', 'three']
+
+
+def test_journal_from_before_the_snapshot_is_not_replayed(tmp_path):
+    store = JournalStorage(tmp_path / 'tasks.json')
+    store.save([make_task(0, 'a')])
+    added = make_task(1, 'b')
+    store.save([make_task(0, 'a'), added], added=[added])
+    journal = store.journal_path.read_text()
+    # A crash after compaction wrote the snapshot but before it emptied the journal
+    store.compact([make_task(0, 'a')])
+    store.journal_path.write_text(journal)
+    assert JournalStorage(tmp_path / 'tasks.json').load() == [make_task(0, 'a')]
+
+
+def test_journal_compacts_into_the_snapshot(tmp_path):
+    store = JournalStorage(tmp_path / 'tasks.json', compact_threshold=3)
+    tasks = [make_task(0, 'a')]
+    store.save(tasks)
+    for i in range(1, 5):
+        added = make_task(i, f"task {i}")
+        tasks.append(added)
+        store.save(tasks, added=[added])
+    snapshot = json.loads(store.path.read_text())
+    assert len(snapshot) > 1
+    assert by_id(JournalStorage(tmp_path / 'tasks.json').load()) == by_id(tasks)
+
+
+def test_next_id_never_goes_down(store):
+    assert store.next_id() == 0
+    store.save([make_task(0, 'a'), make_task(1, 'b')], next_id=2)
+    # Removing the newest task keeps its id taken
+    store.save([make_task(0, 'a')], next_id=1)
+    assert store.next_id() == 2
+
+
+def test_iter_tasks_filters(store):
+    store.save([make_task(0, 'a', tags=['x', 'y']), make_task(1, 'b', tags=['x'], priority='High'),
+                make_task(2, 'c')])
+    assert {task['id'] for task in store.iter_tasks(tags=['x'])} == {0, 1}
+    assert {task['id'] for task in store.iter_tasks(tags=['x', 'y'])} == {0}
+    assert {task['id'] for task in store.iter_tasks(priority='High')} == {1}
+    assert {task['id'] for task in store.iter_tasks(ids=[0, 2])} == {0, 2}
+
+
+def test_every_save_bumps_the_version(store):
+    before = store.version()
+    store.save([make_task(0, 'a')])
+    middle = store.version()
+    store.save([make_task(0, 'a'), make_task(1, 'b')])
+    assert before < middle < store.version()
+
+
+def test_unknown_backend_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        open_storage('csv', tmp_path / 'tasks.json', tmp_path / 'tasks.db')
@@ -0,0 +1,38 @@
+"""Compact Task records: every field reads back as it was stored."""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from python_ver.task import Task
+
+
+def make_task(**fields):
+    return {'id': 3, 'task': 'write report', 'priority': 'High', 'completed': True, 'tags': ['work', 'q2'],
+            'created_at': '2024-05-01T09:00:00.123456', 'completed_at': '2024-05-02T10:30:00',
+            'depends_on': [0, 2], **fields}
+
+
+def test_round_trip():
+    data = make_task(due_date='2024-06-01', sync_id='abc')
+    task = Task.from_dict(data)
+    assert task.to_dict() == data
+    assert dict(task) == data
+
+
+@pytest.mark.parametrize('value', ['2024-05-01', '2024-05-01T09:00:00+02:00', '2024-05-01 09:00:00', None, 17,
+                                   '2024-05-01T09:00:00.000000'])
+def test_other_timestamp_values_are_kept_as_they_are(value):
+    assert Task.from_dict(make_task(created_at=value))['created_at'] == value
+
+
+def test_timestamps_keep_every_microsecond_up_to_the_limit():
+    rng = random.Random(0)
+    # Up to just below 2**32 seconds after 1970 (February 2106)
+    latest = datetime(1970, 1, 1) + timedelta(seconds=2 ** 32 - 1)
+    for _ in range(2000):
+        moment = latest - timedelta(microseconds=rng.randrange(10 ** 15))
+        if moment.microsecond:
+            value = moment.isoformat()
+            assert Task.from_dict(make_task(created_at=value))['created_at'] == value
@@ -0,0 +1,141 @@
+"""TaskList: display order kept by the priority buckets, and rebase() onto what another process saved."""
+
+import pytest
+
+from python_ver.tasklist import ConflictError, TaskList
+
+
+def make_task(task_id, text, **fields):
+    return {'id': task_id, 'task': text, 'priority': 'Medium', 'completed': False, 'tags': [],
+            'created_at': '2024-05-01T09:00:00', 'depends_on': [], **fields}
+
+
+def order(tasks):
+    return [task['task'] for task in tasks]
+
+
+def mixed():
+    return TaskList([
+        make_task(0, 'low', priority='Low'),
+        make_task(3, 'done high', priority='High', completed=True),
+        make_task(1, 'high', priority='High'),
+        make_task(2, 'medium'),
+        make_task(4, 'done low', priority='Low', completed=True),
+    ])
+
+
+def test_pending_before_completed_then_priority_then_id():
+    tasks = mixed()
+    assert order(tasks) == ['high', 'medium', 'low', 'done high', 'done low']
+    assert order(tasks.pending()) == ['high', 'medium', 'low']
+    assert (tasks.count(False), tasks.count(True)) == (3, 2)
+
+
+def test_add_and_update_keep_the_order():
+    tasks = mixed()
+    added = tasks.add(make_task(None, 'new high', priority='High'))
+    assert added['id'] == 5
+    tasks.update(0, {'priority': 'High'})
+    tasks.update(1, {'completed': True})
+    assert order(tasks) == ['low', 'new high', 'medium', 'high', 'done high', 'done low']
+
+
+def test_window_pages_through_the_order():
+    tasks = mixed()
+    assert order(tasks.window(1, 3)) == ['medium', 'low', 'done high']
+    assert order(tasks.window(4)) == ['done low']
+    assert order(tasks.window(9)) == []
+
+
+def test_unsorted_stored_tasks_are_put_in_order():
+    tasks = TaskList([make_task(2, 'b'), make_task(0, 'a'), make_task(1, 'c')])
+    assert [task['id'] for task in tasks] == [0, 1, 2]
+
+
+def stored():
+    return [make_task(0, 'a', tags=['x']), make_task(1, 'b'), make_task(2, 'c')]
+
+
+def snapshot(tasks):
+    return {task['id']: dict(task) for task in tasks}
+
+
+@pytest.fixture(params=[False, True], ids=['dicts', 'compact'])
+def lists(request):
+    """(ours, theirs): two processes that loaded the same tasks."""
+    return TaskList(stored(), compact=request.param), TaskList(stored(), compact=request.param)
+
+
+def test_edits_of_different_fields_merge(lists):
+    ours, theirs = lists
+    ours.update(0, {'priority': 'High'})
+    theirs.update(0, {'completed': True})
+    ours.rebase(theirs)
+    assert ours.get(0)['priority'] == 'High' and ours.get(0)['completed'] is True
+
+
+def test_tags_merge_as_sets(lists):
+    ours, theirs = lists
+    ours.update(0, {'tags': ['y']})
+    theirs.update(0, {'tags': ['x', 'z']})
+    ours.rebase(theirs)
+    assert sorted(ours.get(0)['tags']) == ['y', 'z']
+
+
+def test_added_tasks_get_new_ids(lists):
+    ours, theirs = lists
+    mine = ours.add(make_task(None, 'mine'))
+    ours.add(make_task(None, 'after mine', depends_on=[mine['id']]))
+    theirs.add(make_task(None, 'theirs'))
+    theirs.mark_saved()
+    ours.rebase(theirs)
+    texts = {task['id']: task['task'] for task in ours}
+    assert texts[3] == 'theirs' and texts[4] == 'mine' and texts[5] == 'after mine'
+    # References within the change set follow the new ids
+    assert ours.get(5)['depends_on'] == [4]
+    assert [task['id'] for task in ours.changes()[0]] == [4, 5]
+
+
+def test_same_field_changed_on_both_sides_conflicts(lists):
+    ours, theirs = lists
+    ours.update(1, {'task': 'ours'})
+    theirs.update(1, {'task': 'theirs'})
+    with pytest.raises(ConflictError):
+        ours.rebase(theirs)
+
+
+def test_editing_a_task_the_other_side_removed_conflicts(lists):
+    ours, theirs = lists
+    ours.update(1, {'priority': 'Low'})
+    theirs.remove(1)
+    with pytest.raises(ConflictError):
+        ours.rebase(theirs)
+
+
+def test_removing_a_task_the_other_side_changed_conflicts(lists):
+    ours, theirs = lists
+    ours.remove(1)
+    theirs.update(1, {'completed': True})
+    with pytest.raises(ConflictError):
+        ours.rebase(theirs)
+
+
+def test_merged_dependencies_that_form_a_cycle_conflict(lists):
+    ours, theirs = lists
+    ours.update(0, {'depends_on': [1]})
+    theirs.update(1, {'depends_on': [0]})
+    with pytest.raises(ConflictError):
+        ours.rebase(theirs)
+
+
+def test_conflict_leaves_the_list_unchanged(lists):
+    ours, theirs = lists
+    ours.add(make_task(None, 'mine'))
+    ours.update(1, {'task': 'ours'})
+    theirs.add(make_task(None, 'theirs'))
+    theirs.update(1, {'task': 'theirs'})
+    before, changes = snapshot(ours), ours.changes()
+    with pytest.raises(ConflictError):
+        ours.rebase(theirs)
+    assert snapshot(ours) == before
+    assert ours.changes() == changes
@@ -449,55 +449,64 @@ CLI Todo App - Complete Implementation with All Features
 Includes: Task management, priorities, tags, voice commands, analytics, and more
 """
 
+import contextlib
+import gc
+import importlib
+import io
 import json
 import os
+import shlex
+import shutil
 import sys
 import argparse
 from pathlib import Path
 from datetime import datetime
-from collections import Counter
+from itertools import chain, islice
 from .i18n import set_language, t
-
-# Try to import optional dependencies
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.progress import Progress, BarColumn, TextColumn
-    from rich.panel import Panel
-    from rich import print as rprint
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
-    print("Warning: 'rich' library not found. Install with: pip install rich")
-
-try:
-    import speech_recognition as sr
-    VOICE_AVAILABLE = True
-except ImportError:
-    VOICE_AVAILABLE = False
-
-# Colors for terminal output (fallback when rich not available)
-class Colors:
-    RESET = '\033[0m'
-    GREEN = '\033[32m'
-    YELLOW = '\033[33m'
-    BLUE = '\033[34m'
-    CYAN = '\033[36m'
-    GRAY = '\033[90m'
-    RED = '\033[31m'
-    BOLD = '\033[1m'
-    STRIKETHROUGH = '\033[9m'
+from .tasklist import ConflictError, TaskList, sort_key
+from .aggregates import Aggregates
+from .storage import open_storage, SQLiteStorage, JSONStorage, JournalStorage
+from .search import SearchIndex, query_matcher
+from .render import Colors, OutputBuffer, color_enabled, color_wanted, renderer, set_color, write_task_rows
+
+# Optional dependencies, and the modules behind commands like import, serve
+# or --format (csv, socket, ...), are imported by the commands that use them,
+# so everyday commands like add/complete start quickly.
+_optional_modules = {}
+
+def optional_import(name):
+    """Import an optional module on first use; returns None if it isn't installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
 
 # File paths
 BASE_DIR = Path(__file__).parent
 TASKS_FILE = Path(os.environ.get('TODO_FILE', BASE_DIR / 'tasks.json'))
 CONFIG_FILE = Path(os.environ.get('TODO_CONFIG_FILE', BASE_DIR / 'config.json'))
+DB_FILE = Path(os.environ.get('TODO_DB_FILE', BASE_DIR / 'tasks.db'))
+SOCKET_FILE = Path(os.environ.get('TODO_SOCKET', TASKS_FILE.parent / 'todo.sock'))
+QUEUE_FILE = Path(os.environ.get('TODO_QUEUE_FILE', BASE_DIR.parent / 'offline_queue.json'))
+
+# Commands a running `todo.py serve` process answers on behalf of the CLI
+DAEMON_COMMANDS = {'add', 'list', 'remove', 'complete', 'depends', 'stats', 'search'}
+
+# Tasks per page for list --page when --limit isn't given
+LIST_PAGE_SIZE = 20
+
+# import: records between progress updates, and rejected records listed
+IMPORT_PROGRESS_EVERY = 10000
+IMPORT_ERRORS_SHOWN = 20
 
 # Default settings
 DEFAULT_SETTINGS = {
     'username': '',
     'require_auth': True,
-    'dark_mode': False
+    'dark_mode': False,
+    'storage': 'json'
 }
 
 def load_settings():
@@ -559,151 +568,374 @@ def backup_file(filepath):
     except Exception as e:
         print(f"{Colors.RED}Error creating backup: {e}{Colors.RESET}")
 
-def load_tasks():
-    """Load tasks from JSON file with error handling and backward compatibility."""
+_storage = None
+
+def get_storage():
+    """Return the storage backend chosen by TODO_STORAGE or the 'storage' setting."""
+    global _storage
+    if _storage is None:
+        backend = os.environ.get('TODO_STORAGE') or load_settings().get('storage', 'json')
+        try:
+            _storage = open_storage(backend, TASKS_FILE, DB_FILE)
+        except ValueError as e:
+            print(f"{Colors.RED}Error: {e}{Colors.RESET}")
+            sys.exit(1)
+    return _storage
+
+def store_identity():
+    """Which store get_storage() reads: the backend and the resolved path (sent to the server)."""
+    storage = get_storage()
+    return {'backend': storage.name, 'path': str(storage.path.resolve())}
+
+_search_index = None
+
+def get_search_index():
+    """Return the search index that belongs to the current storage."""
+    global _search_index
+    path = Path(str(get_storage().path) + '.search')
+    if _search_index is None or _search_index.path != path:
+        _search_index = SearchIndex(path)
+    return _search_index
+
+def get_archive():
+    """The archive of completed tasks that belongs to the current storage (see archive.py)."""
+    from . import archive
+
+    return archive.Archive(str(get_storage().path) + '.archive')
+
+def update_search_index(revision, added, updated, removed):
+    """
+    Apply a saved change set to the search index, if there is one and it was
+    current before the save (``revision``); otherwise the next search rebuilds it.
+    """
+    index = get_search_index()
+    if revision is None or not index.exists():
+        return
     try:
-        if not TASKS_FILE.exists():
-            return []
-        
-        with open(TASKS_FILE, 'r') as f:
-            tasks = json.load(f)
-        
-        # Ensure backward compatibility
-        normalized_tasks = []
-        for task in tasks:
-            if isinstance(task, str):
-                normalized_tasks.append({
-                    'id': len(normalized_tasks),
-                    'task': task,
-                    'priority': 'Medium',
-                    'completed': False,
-                    'tags': [],
-                    'created_at': datetime.now().isoformat()
-                })
-            else:
-                if 'id' not in task:
-                    task['id'] = len(normalized_tasks)
-                if 'completed' not in task:
-                    task['completed'] = False
-                if 'priority' not in task:
-                    task['priority'] = 'Medium'
-                if 'tags' not in task:
-                    task['tags'] = []
-                if 'created_at' not in task:
-                    task['created_at'] = datetime.now().isoformat()
-                if 'depends_on' not in task:
-                    task['depends-on'] = []
-                normalized_tasks.append(task)
-        
-        return normalized_tasks
+        if index.revision() == revision:
+            index.apply(added, updated, removed, get_storage().revision())
+    except Exception:
+        pass  # only an index; the next search rebuilds it
+
+def normalize_task(task):
+    """Bring one raw task record up to the current schema (backward compatibility)."""
+    if isinstance(task, str):
+        return {
+            'task': task,
+            'priority': 'Medium',
+            'completed': False,
+            'tags': [],
+            'created_at': datetime.now().isoformat()
+        }
+    if 'completed' not in task:
+        task['completed'] = False
+    if 'priority' not in task:
+        task['priority'] = 'Medium'
+    if 'tags' not in task:
+        task['tags'] = []
+    if 'created_at' not in task:
+        task['created_at'] = datetime.now().isoformat()
+    # Older versions wrote the key as 'depends-on'
+    legacy_depends = task.pop('depends-on', [])
+    if 'depends_on' not in task:
+        task['depends_on'] = legacy_depends
+    return task
+
+def normalize_tasks(tasks, next_id=0):
+    """
+    Normalize every record and give tasks saved before ids existed an id
+    (from ``next_id``, the store's id counter, if that is higher).
+    """
+    normalized_tasks = [normalize_task(task) for task in tasks]
+
+    # Records written before ids existed get the next free ids, in file order
+    next_id = max(max((task['id'] for task in normalized_tasks if 'id' in task), default=-1) + 1, next_id)
+    for task in normalized_tasks:
+        if 'id' not in task:
+            task['id'] = next_id
+            next_id += 1
+    return normalized_tasks
+
+def stream_tasks(tags=(), priority=None, ids=None):
+    """
+    Yield normalized tasks one at a time without loading the whole list.
+
+    Meant for read-only commands: memory stays flat however big the store is.
+    Records saved before ids existed come through without an 'id'. ``tags``
+    and ``priority`` limit the stream to the tasks that have all of them, and
+    ``ids`` to the tasks with those ids.
+    """
+    for task in get_storage().iter_tasks(tags=tags, priority=priority, ids=ids):
+        yield normalize_task(task)
+
+# Inside the daemon the loaded TaskList (and its dependency graph) is kept
+# between requests and reused for as long as the storage stamp is unchanged.
+_keep_resident = False
+_resident = None  # (storage stamp, TaskList)
+
+def keep_tasks_resident(enabled=True):
+    """Reuse the loaded task list across load_tasks() calls (used by the daemon)."""
+    global _keep_resident, _resident
+    _keep_resident = enabled
+    _resident = None
+
+def load_tasks(compact=False):
+    """
+    Load tasks from the configured storage with error handling and backward compatibility.
+
+    ``compact`` stores the tasks as memory-efficient Task objects; lists that
+    stay in memory for a long time (the daemon, batch mode) use it.
+    """
+    global _resident
+    try:
+        if not _keep_resident:
+            return read_task_list(compact)
+
+        stamp = get_storage().stamp()
+        if _resident is not None:
+            resident_stamp, tasks = _resident
+            # A command that failed half-way may have left unsaved changes behind
+            if resident_stamp == stamp and not any(tasks.changes()):
+                return tasks
+        tasks = read_task_list(compact=True)
+        _resident = (stamp, tasks)
+        return tasks
     
     except json.JSONDecodeError:
         print(f"{Colors.YELLOW}Warning: Corrupted tasks file detected!{Colors.RESET}")
         backup_file(TASKS_FILE)
         print(f"{Colors.YELLOW}Starting with empty task list.{Colors.RESET}")
-        return []
+        return TaskList()
     except Exception as e:
         print(f"{Colors.RED}Error loading tasks: {e}{Colors.RESET}")
-        return []
+        return TaskList()
+
+def read_task_list(compact=False):
+    """Read the stored tasks into a TaskList that remembers the storage version it was read at."""
+    storage = get_storage()
+    # The shared lock keeps the version and the data from coming from different saves
+    with storage.locked(shared=True):
+        version = storage.version()
+        next_id = storage.next_id()
+        records = storage.load()
+    tasks = TaskList(normalize_tasks(records, next_id), compact=compact, next_id=next_id)
+    tasks.version = version
+    return tasks
 
 def save_tasks(tasks):
-    """Save tasks to JSON file with error handling."""
+    """
+    Save tasks with error handling.
+
+    Only the tasks added, updated or removed since load_tasks() are handed to
+    the backend, so backends that store rows individually only write those.
+
+    Saving holds the storage lock. If another process saved since the tasks
+    were loaded (the storage version moved on), this process's changes are
+    replayed on top of what it wrote rather than overwriting it; changes that
+    clash with it are not saved. Returns whether the changes were saved.
+    """
+    global _resident
+    if not any(tasks.changes()):
+        return True
+    storage = get_storage()
     try:
-        # Reindex tasks
-        for i, task in enumerate(tasks):
-            task['id'] = i
-        
-        with open(TASKS_FILE, 'w') as f:
-            json.dump(tasks, f, indent=2)
+        with storage.locked():
+            if tasks.version is not None and storage.version() != tasks.version:
+                next_id = storage.next_id()
+                fresh = TaskList(normalize_tasks(storage.load(), next_id), compact=tasks.compact, next_id=next_id)
+                fresh.version = storage.version()
+                tasks.rebase(fresh)
+            added, updated, removed = tasks.changes()
+            # Revision the search index has to be at for the change set to apply to it
+            indexed_revision = storage.revision() if get_search_index().exists() else None
+            storage.save(tasks, added=added, updated=updated, removed=removed,
+                         aggregates=tasks.aggregates.to_dict(), next_id=tasks.next_id())
+            tasks.version = storage.version()
+            tasks.mark_saved()
+            update_search_index(indexed_revision, added, updated, removed)
+        if _resident is not None and _resident[1] is tasks:
+            _resident = (storage.stamp(), tasks)
+        return True
+    except ConflictError as e:
+        print(f"{Colors.RED}Error: {e} at the same time; this change was not saved. "
+              f"Run the command again.{Colors.RESET}")
     except PermissionError:
-        print(f"{Colors.RED}Error: Permission denied. Cannot write to {TASKS_FILE}{Colors.RESET}")
+        print(f"{Colors.RED}Error: Permission denied. Cannot write to {get_storage().path}{Colors.RESET}")
     except OSError as e:
         print(f"{Colors.RED}Error: Disk I/O error - {e}{Colors.RESET}")
     except Exception as e:
         print(f"{Colors.RED}Error saving tasks: {e}{Colors.RESET}")
+    return False
 
-def check_for_cycle(tasks, start_index, target_index):
-    if start_index == target_index:
-        return True 
-        
-    stack = [target_index]
-    visited = set()
+# --- In-memory task operations ---
+# These change a loaded TaskList without printing or saving, and raise
+# ValueError with a user-facing message when a change is not allowed. The CLI
+# commands below and batch mode are built on top of them.
+
+def check_new_task(description, priority):
+    """The rules a new task has to meet (add, batch mode and import)."""
+    if not description or description.isspace():
+        raise ValueError("Error: Task description cannot be empty")
     
-    while stack:
-        current_index = stack.pop()
-        
-        if current_index == start_index:
-            return True 
-        
-        if current_index in visited:
-            continue
-            
-        visited.add(current_index)
-        
-        prerequisites = tasks[current_index].get('depends_on', [])
-        
-        for prereq_index in prerequisites:
-            # Only push valid indices onto the stack
-            if 0 <= prereq_index < len(tasks):
-                stack.append(prereq_index)
-                
-    return False
+    if priority not in ['High', 'Medium', 'Low']:
+        raise ValueError("Error: Invalid priority. Use High, Medium, or Low")
 
-def add_dependency(task_id: int, prerequisite_id: int):
-    """Adds a dependency: task_id depends on prerequisite_id (1-based indices)."""
-    tasks = load_tasks()
+def apply_add(tasks, description, priority='Medium', tags=None, completed=False):
+    """Validate and add a new task; returns the stored task."""
+    check_new_task(description, priority)
+    
+    new_task = {
+        'task': description.strip(),
+        'priority': priority,
+        'completed': completed,
+        'tags': tags if tags else [],
+        'created_at': datetime.now().isoformat(),
+        'depends_on': []
+    }
+    if completed:
+        new_task['completed_at'] = new_task['created_at']
+    # Allocates a stable id and files the task under its priority (no re-sort)
+    return tasks.add(new_task)
+
+def apply_remove(tasks, task_id):
+    """Remove a task by its number and drop edges that pointed at it."""
+    if task_id - 1 not in tasks:
+        raise ValueError(t('py_error_task_not_found', {'task_id': task_id}))
     
-    task_idx = task_id - 1
-    prereq_idx = prerequisite_id - 1
+    # Drop edges that pointed at the removed task so its id can't be confused later
+    for dependent_id in list(tasks.graph.dependents[task_id - 1]):
+        depends_on = tasks.get(dependent_id)['depends_on']
+        tasks.update(dependent_id, {'depends_on': [p for p in depends_on if p != task_id - 1]})
+    return tasks.remove(task_id - 1)
+
+def pending_prereqs(tasks, task):
+    """Prerequisites of task that are not completed yet (looked up by id)."""
+    return [
+        tasks.get(prereq_id) for prereq_id in task.get('depends_on', [])
+        if prereq_id in tasks and not tasks.get(prereq_id).get('completed', False)
+    ]
+
+def apply_complete(tasks, task_id):
+    """Toggle completion of a task by its number; returns the task."""
+    task = tasks.get(task_id - 1)
+    if task is None:
+        raise ValueError(f"Error: Task ID {task_id} not found. Use 'list' to see available tasks.")
     
-    # Validation and bounds check
-    if not (0 <= task_idx < len(tasks) and 0 <= prereq_idx < len(tasks)):
-        print(f"{Colors.YELLOW}Error: One or both task IDs are invalid. Use 'list' to see available IDs.{Colors.RESET}")
-        return
+    # Only check dependencies if the task is being COMPLETED
+    if not task.get('completed', False):
+        blocking = pending_prereqs(tasks, task)
+        if blocking:
+            ids = ', '.join(str(prereq['id'] + 1) for prereq in blocking)
+            raise ValueError(f"Cannot complete Task {task_id}: prerequisite tasks still pending ({ids})")
+    
+    completed = not task.get('completed', False)
+    return tasks.update(task['id'], {
+        'completed': completed,
+        'completed_at': datetime.now().isoformat() if completed else None,
+    })
 
-    task = tasks[task_idx]
-    prereq = tasks[prereq_idx]
+def apply_add_dependency(tasks, task_id, prerequisite_id):
+    """Make task_id depend on prerequisite_id; returns (task, prerequisite)."""
+    task = tasks.get(task_id - 1)
+    prereq = tasks.get(prerequisite_id - 1)
+    
+    if task is None or prereq is None:
+        raise ValueError("Error: One or both task IDs are invalid. Use 'list' to see available IDs.")
 
-    # Cyclic Dependency Check
-    if check_for_cycle(tasks, task_idx, prereq_idx):
-        print(f"{Colors.RED}🛑 Error: Adding '{task['task']}' dependency on '{prereq['task']}' creates a circular dependency!{Colors.RESET}")
-        return
+    if prereq['id'] in task.get('depends_on', []):
+        raise ValueError("Warning: Dependency already exists.")
 
-    # Add Dependency
-    if prereq_idx not in task.get('depends_on', []):
-        task['depends_on'].append(prereq_idx)
-        save_tasks(tasks)
-        print(f"{Colors.GREEN}✓ Success:{Colors.RESET} Task {task_id} ('{task['task']}') now depends on Task {prerequisite_id} ('{prereq['task']}').")
-    else:
-        print(f"{Colors.YELLOW}Warning:{Colors.RESET} Dependency already exists.")
+    # Cyclic Dependency Check (incremental, only the affected region is searched)
+    if not tasks.graph.add_edge(task['id'], prereq['id']):
+        raise ValueError(f"🛑 Error: Adding '{task['task']}' dependency on '{prereq['task']}' creates a circular dependency!")
+
+    tasks.update(task['id'], {'depends_on': task.get('depends_on', []) + [prereq['id']]})
+    return task, prereq
+
+def apply_remove_dependency(tasks, task_id, prerequisite_id):
+    """Drop the edge task_id -> prerequisite_id; returns the task."""
+    task = tasks.get(task_id - 1)
+    prereq_id = prerequisite_id - 1
+    
+    if task is None or prereq_id not in tasks:
+        raise ValueError("Error: One or both task IDs are invalid. Use 'list' to see available IDs.")
+
+    if prereq_id not in task.get('depends_on', []):
+        raise ValueError(f"Warning: Task {task_id} does not depend on Task {prerequisite_id}.")
+
+    return tasks.update(task['id'], {'depends_on': [p for p in task['depends_on'] if p != prereq_id]})
+
+def add_dependency(task_id: int, prerequisite_id: int):
+    """Adds a dependency: task_id depends on prerequisite_id (task numbers as shown by list)."""
+    tasks = load_tasks()
+    try:
+        task, prereq = apply_add_dependency(tasks, task_id, prerequisite_id)
+    except ValueError as e:
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
+        return
+    if not save_tasks(tasks):
+        sys.exit(1)
+    print(f"{Colors.GREEN}✓ Success:{Colors.RESET} Task {task_id} ('{task['task']}') now depends on Task {prerequisite_id} ('{prereq['task']}').")
 
 def remove_dependency(task_id: int, prerequisite_id: int):
     #Removes a dependency:
     tasks = load_tasks()
-    
-    task_idx = task_id - 1
-    prereq_idx = prerequisite_id - 1
-    
-    if not (0 <= task_idx < len(tasks) and 0 <= prereq_idx < len(tasks)):
-        print(f"{Colors.YELLOW}Error: One or both task IDs are invalid. Use 'list' to see available IDs.{Colors.RESET}")
+    try:
+        apply_remove_dependency(tasks, task_id, prerequisite_id)
+    except ValueError as e:
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
         return
+    if not save_tasks(tasks):
+        sys.exit(1)
+    print(f"{Colors.GREEN}Success:{Colors.RESET} Removed dependency: Task {task_id} no longer depends on Task {prerequisite_id}.")
 
-    task = tasks[task_idx]
-    
-    if prereq_idx in task.get('depends_on', []):
-        task['depends_on'].remove(prereq_idx)
-        save_tasks(tasks)
-        print(f"{Colors.GREEN}Success:{Colors.RESET} Removed dependency: Task {task_id} no longer depends on Task {prerequisite_id}.")
-    else:
-        print(f"{Colors.YELLOW}Warning:{Colors.RESET} Task {task_id} does not depend on Task {prerequisite_id}.")
+def show_ready_tasks():
+    """List pending tasks whose prerequisites are all complete."""
+    tasks = load_tasks()
+    ready = sorted(tasks.graph.ready())
+    if not ready:
+        print(f"{Colors.YELLOW}No tasks are ready to start.{Colors.RESET}")
+        return
+    print(f"{Colors.CYAN}{Colors.BOLD}Ready to start:{Colors.RESET}")
+    for ready_id in ready:
+        display_task(tasks.get(ready_id), '○')
+
+def show_dependency_chain(task_id: int):
+    """List every task that task_id transitively depends on, in the order they can be done."""
+    tasks = load_tasks()
+    task = tasks.get(task_id - 1)
+    if task is None:
+        print(f"{Colors.YELLOW}Error: Task ID {task_id} not found. Use 'list' to see available tasks.{Colors.RESET}")
+        return
+    graph = tasks.graph
+    chain = graph.chain(task['id'])
+    if not chain:
+        print(f"{Colors.GREEN}Task {task_id} ('{task['task']}') has no prerequisites.{Colors.RESET}")
+        return
+    print(f"{Colors.CYAN}{Colors.BOLD}Prerequisites of Task {task_id} ('{task['task']}'):{Colors.RESET}")
+    for prereq_id in chain:
+        prereq = tasks.get(prereq_id)
+        display_task(prereq, '●' if prereq.get('completed') else '○', graph.blocked[prereq_id])
 
-def calculate_progress(tasks):
-    """Calculate completion statistics."""
+def show_dependency_order():
+    """List all tasks in an order that respects every dependency."""
+    tasks = load_tasks()
     if not tasks:
+        print(f"{Colors.YELLOW}No tasks found.{Colors.RESET}")
+        return
+    graph = tasks.graph
+    print(f"{Colors.CYAN}{Colors.BOLD}Dependency order:{Colors.RESET}")
+    for ordered_id in graph.topological_order():
+        task = tasks.get(ordered_id)
+        display_task(task, '●' if task.get('completed') else '○', graph.blocked[ordered_id])
+
+def calculate_progress(aggregates):
+    """Calculate completion statistics from the maintained task counts."""
+    if not aggregates.total:
         return {'completed': 0, 'total': 0, 'percentage': 0}
     
-    completed = sum(1 for task in tasks if task.get('completed', False))
-    total = len(tasks)
+    completed = aggregates.completed
+    total = aggregates.total
     percentage = round((completed / total) * 100, 2) if total > 0 else 0
     
     return {
@@ -714,212 +946,366 @@ def calculate_progress(tasks):
 
 def create_progress_bar(percentage, width=30):
     """Create a visual progress bar."""
-    filled_length = round((width * percentage) / 100)
-    empty_length = width - filled_length
-    
-    filled = '█' * filled_length
-    empty = '░' * empty_length
-    
-    return f"{Colors.GREEN}{filled}{Colors.GRAY}{empty}{Colors.RESET}"
+    return renderer().progress_bar(percentage, width)
 
-def display_progress_bar(tasks):
-    """Display the progress bar with statistics."""
-    stats = calculate_progress(tasks)
+def format_progress_bar(aggregates):
+    """The progress bar line with statistics (surrounded by blank lines)."""
+    stats = calculate_progress(aggregates)
     progress_bar = create_progress_bar(stats['percentage'])
     
-    print(f"\n{Colors.CYAN}{Colors.BOLD}Progress:{Colors.RESET} {progress_bar} "
-          f"{Colors.GREEN}{stats['percentage']}%{Colors.RESET} "
-          f"{Colors.GRAY}({stats['completed']}/{stats['total']} completed){Colors.RESET}\n")
+    return (f"\n{Colors.CYAN}{Colors.BOLD}Progress:{Colors.RESET} {progress_bar} "
+            f"{Colors.GREEN}{stats['percentage']}%{Colors.RESET} "
+            f"{Colors.GRAY}({stats['completed']}/{stats['total']} completed){Colors.RESET}\n")
+
+def display_progress_bar(aggregates):
+    """Display the progress bar with statistics."""
+    print(format_progress_bar(aggregates))
 
 def add_task(description, priority='Medium', tags=None, completed=False):
     """Add a new task with priority, tags, and completion status."""
-    if not description or description.isspace():
-        print(f"{Colors.YELLOW}Error: Task description cannot be empty{Colors.RESET}")
-        return
-    
-    if priority not in ['High', 'Medium', 'Low']:
-        print(f"{Colors.YELLOW}Error: Invalid priority. Use High, Medium, or Low{Colors.RESET}")
-        return
-    
     tasks = load_tasks()
-    new_task = {
-        'id': len(tasks),
-        'task': description.strip(),
-        'priority': priority,
-        'completed': completed,
-        'tags': tags if tags else [],
-        'created_at': datetime.now().isoformat()
-    }
-    tasks.append(new_task)
-    
-    # Sort by priority and completion status
-    priority_order = {'High': 0, 'Medium': 1, 'Low': 2}
-    tasks.sort(key=lambda x: (x.get('completed', False), priority_order.get(x.get('priority', 'Medium'), 1)))
+    try:
+        apply_add(tasks, description, priority, tags, completed)
+    except ValueError as e:
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
+        return
     
-    save_tasks(tasks)
+    if not save_tasks(tasks):
+        sys.exit(1)
     
     tags_str = f" {Colors.CYAN}[{', '.join(tags)}]{Colors.RESET}" if tags else ""
     status_str = f" {Colors.GREEN}[✓ Completed]{Colors.RESET}" if completed else ""
     print(f"{Colors.GREEN}✓{Colors.RESET} Added: \"{description.strip()}\" {Colors.BLUE}[{priority}]{Colors.RESET}{tags_str}{status_str}")
-    display_progress_bar(tasks)
+    display_progress_bar(tasks.aggregates)
+
+def list_tasks(tags=None, priority=None, limit=None, offset=0):
+    """
+    List tasks in display order.
+
+    ``tags`` and ``priority`` filter the list; ``limit`` and ``offset`` show
+    only a window of it, and only the rows in that window are read and rendered.
+    """
+    if tags or priority:
+        list_filtered_tasks(tags or [], priority, limit, offset)
+        return
+
+    if not _keep_resident and get_storage().can_stream_in_order():
+        stream_list_tasks(limit, offset)
+        return
 
-def list_tasks():
-    """List all tasks with rich formatting if available."""
     tasks = load_tasks()
     
     if not tasks:
         print(f"{Colors.YELLOW}No tasks found.{Colors.RESET} Add one with: {Colors.CYAN}python todo.py add \"Your task\"{Colors.RESET}")
         return
     
-    display_progress_bar(tasks)
+    # Dependency state is resolved once for the whole list instead of per row
+    blocked = tasks.graph.blocked
     
-    # Separate pending and completed tasks
-    pending_tasks = [t for t in tasks if not t.get('completed', False)]
-    completed_tasks = [t for t in tasks if t.get('completed', False)]
-    
-    # Display pending tasks
-    if pending_tasks:
-        print(f"{Colors.CYAN}{Colors.BOLD}Pending tasks:{Colors.RESET}")
-        for task in pending_tasks:
-            display_task(task, '○')
-        print()
-    
-    # Display completed tasks
-    if completed_tasks:
-        print(f"{Colors.GREEN}{Colors.BOLD}Completed tasks:{Colors.RESET}")
-        for task in completed_tasks:
-            display_task(task, '●')
+    with OutputBuffer() as out:
+        out.line(format_progress_bar(tasks.aggregates))
+        # Rows come straight from the priority index, already in order
+        shown = write_task_rows(out, tasks.window(offset, limit), lambda task: blocked[task['id']])
+        if limit is not None or offset:
+            write_window_footer(out, offset, limit, shown, len(tasks))
+
+def list_filtered_tasks(tags, priority=None, limit=None, offset=0):
+    """
+    List only the tasks that have every tag in ``tags`` (and ``priority``).
+
+    A resident task list intersects the id sets of its tag index; otherwise the
+    storage backend does the filtering (SQLite from its tag table) so the whole
+    list is never loaded.
+    """
+    if _keep_resident:
+        tasks = load_tasks()
+        matches = tasks.filter(tags, priority)
+        blocked = tasks.graph.blocked
+        blocked_count = lambda task: blocked[task['id']]
+    else:
+        matches = sorted(stream_tasks(tags, priority), key=lambda task: (sort_key(task), task['id']))
+        blocked_count = None
+
+    description = ', '.join([f"tag '{tag}'" for tag in tags] + ([f"priority {priority}"] if priority else []))
+    if not matches:
+        print(f"{Colors.YELLOW}No tasks with {description}.{Colors.RESET}")
+        return
+
+    total = len(matches)
+    matches = matches[offset:None if limit is None else offset + limit]
+    if blocked_count is None:
+        blocked_count = lookup_blocked_counts(matches)
+    with OutputBuffer() as out:
+        out.line(f"{Colors.CYAN}{Colors.BOLD}Tasks with {description}:{Colors.RESET} {Colors.GRAY}({total} found){Colors.RESET}\n")
+        shown = write_task_rows(out, matches, blocked_count)
+        if limit is not None or offset:
+            write_window_footer(out, offset, limit, shown, total)
+
+def stream_list_tasks(limit=None, offset=0):
+    """
+    Same output as list_tasks(), printed while the tasks are read from storage
+    in display order instead of after loading them all.
+    """
+    aggregates = load_aggregates()
+    if not aggregates.total:
+        print(f"{Colors.YELLOW}No tasks found.{Colors.RESET} Add one with: {Colors.CYAN}python todo.py add \"Your task\"{Colors.RESET}")
+        return
+
+    if limit is not None or offset:
+        # Reading stops at the end of the window, and only the prerequisites
+        # of the rows in it are looked up
+        stream = stream_tasks()
+        try:
+            rows = list(islice(stream, offset, None if limit is None else offset + limit))
+        finally:
+            stream.close()
+        blocked_count = lookup_blocked_counts(rows)
+    else:
+        # Blocked counts need to know which tasks are unfinished before the rows
+        # that depend on them are printed: one light pass that keeps only ids
+        incomplete = set()
+        if aggregates.dependencies:
+            incomplete = {task['id'] for task in stream_tasks() if not task['completed']}
+        rows = stream_tasks()
+        blocked_count = lambda task: len((set(task['depends_on']) - {task['id']}) & incomplete)
+
+    with OutputBuffer() as out:
+        out.line(format_progress_bar(aggregates))
+        shown = write_task_rows(out, rows, blocked_count)
+        if limit is not None or offset:
+            write_window_footer(out, offset, limit, shown, aggregates.total)
+
+def lookup_blocked_counts(rows, known=None):
+    """
+    blocked_count(task) for a handful of rows read from storage: only their
+    prerequisites are looked up, not the status of every task. ``known`` maps
+    task ids to their completed flag and is filled in as ids are looked up.
+    """
+    known = {} if known is None else known
+    missing = {prereq for task in rows if not task['completed'] for prereq in task['depends_on']} - known.keys()
+    if missing:
+        known.update((task['id'], task['completed']) for task in stream_tasks(ids=missing))
+    return lambda task: sum(1 for prereq in set(task['depends_on']) - {task['id']}
+                            if known.get(prereq) is False)
+
+def write_window_footer(out, offset, limit, shown, total):
+    """Which part of the list a --limit/--offset window showed, and how to get the next one."""
+    if not shown:
+        out.line(f"{Colors.YELLOW}No tasks at offset {offset}; there are {total}.{Colors.RESET}")
+        return
+    footer = f"Showing {offset + 1}-{offset + shown} of {total} tasks."
+    if offset + shown < total:
+        if limit and offset % limit == 0:
+            footer += f" Next page: --page {offset // limit + 2}"
+        else:
+            footer += f" Next: --offset {offset + shown}"
+    out.line(f"{Colors.GRAY}{footer}{Colors.RESET}\n")
+
+def page_tasks(tags=None, priority=None):
+    """
+    Interactive pager (``list --pager``): shows one screen of tasks at a time.
+
+    Rows are read from storage only as their page is reached and are kept for
+    paging back, so a huge list opens as fast as a small one.
+    """
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        list_tasks(tags, priority)
+        return
+
+    known = {}
+    if _keep_resident or not (tags or priority or get_storage().can_stream_in_order()):
+        tasks = load_tasks()
+        source = iter(tasks.filter(tags or [], priority) if tags or priority else tasks)
+        blocked = tasks.graph.blocked
+        blocked_counts = lambda rows: (lambda task: blocked[task['id']])
+    else:
+        if tags or priority:
+            source = iter(sorted(stream_tasks(tags or [], priority), key=lambda task: (sort_key(task), task['id'])))
+        else:
+            source = stream_tasks()
+        blocked_counts = lambda rows: lookup_blocked_counts(rows, known)
+
+    size = max(5, shutil.get_terminal_size().lines - 6)
+    seen, page = [], 0
+    try:
+        while True:
+            # One row past the page tells whether there is a next one
+            while len(seen) <= (page + 1) * size:
+                task = next(source, None)
+                if task is None:
+                    break
+                seen.append(task)
+            rows = seen[page * size:(page + 1) * size]
+            if not rows:
+                print(f"{Colors.YELLOW}No tasks found.{Colors.RESET}")
+                return
+            more = len(seen) > (page + 1) * size
+
+            sys.stdout.write('\033[2J\033[H')
+            with OutputBuffer() as out:
+                write_task_rows(out, rows, blocked_counts(rows))
+                keys = ('[Enter] next  ' if more else '') + ('[p] previous  ' if page else '') + '[q] quit'
+                out.line(f"{Colors.GRAY}Tasks {page * size + 1}-{page * size + len(rows)}   {keys}{Colors.RESET}")
+            key = input().strip().lower()
+            if key == 'q' or (key == '' and not more):
+                return
+            if key == 'p':
+                page = max(0, page - 1)
+            elif more:
+                page += 1
+    except (EOFError, KeyboardInterrupt):
         print()
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
 
-def display_task(task, checkbox):
-    """Display a single task with formatting."""
-    task_id = task.get('id', 0)
-    priority = task.get('priority', 'Medium')
-    completed = task.get('completed', False)
-    tags = task.get('tags', [])
-    
-    # Priority colors
-    priority_colors = {
-        'High': Colors.RED,
-        'Medium': Colors.BLUE,
-        'Low': Colors.GRAY
-    }
-    priority_color = priority_colors.get(priority, Colors.RESET)
-    
-    # Task text styling
-    task_text = task['task']
-    if completed:
-        task_text = f"{Colors.GRAY}{Colors.STRIKETHROUGH}{task_text}{Colors.RESET}"
-    
-    # Tags display
-    tags_str = ""
-    if tags:
-        tags_str = f" {Colors.CYAN}[{', '.join(tags)}]{Colors.RESET}"
-
-    # Dependency Indicator 
-    dependency_str = ""
-    # Check if this task has incomplete prerequisites
-    if not task.get('completed', False):
-        incomplete_count = 0
-        tasks = load_tasks() #relaod tasks
-        for prereq_idx in task.get('depends_on', []):
-            if 0 <= prereq_idx < len(tasks) and not tasks[prereq_idx].get('completed', False):
-                incomplete_count += 1
-        
-        if incomplete_count > 0:
-            dependency_str = f" {Colors.RED}🔗 ({incomplete_count} blocked){Colors.RESET}"
-        elif task.get('depends_on'):
-             dependency_str = f" {Colors.GREEN}🔗{Colors.RESET}"
-    
-    print(f"  {Colors.YELLOW}{checkbox}{Colors.RESET} {Colors.CYAN}{task_id + 1}.{Colors.RESET} {task_text} {priority_color}({priority}){Colors.RESET}{tags_str}")
+def display_task(task, checkbox, blocked_count=0):
+    """Display a single task with formatting (see format_task)."""
+    print(format_task(task, checkbox, blocked_count))
+
+def format_task(task, checkbox, blocked_count=0):
+    """
+    A single task row with formatting (see render.RowRenderer).
+
+    blocked_count is the number of incomplete prerequisites, precomputed by
+    the dependency graph so rendering a row never has to reload the task list.
+    """
+    return renderer().row(task, checkbox, blocked_count)
 
 def remove_task(task_id):
-    """Remove a task by ID (1-based index)."""
+    """Remove a task by its number (as shown by list)."""
     tasks = load_tasks()
     
     if not tasks:
         print(f"{Colors.YELLOW}{t('py_no_tasks_to_remove')}{Colors.RESET}")
         return
     
-    # Convert to 0-based index
-    index = task_id - 1
-    
-    if 0 <= index < len(tasks):
-        task_to_remove = tasks.pop(index)
-        save_tasks(tasks)
-        print(f"{Colors.GREEN}✓{Colors.RESET}{t('py_removed_success', {'task_name': task_to_remove['task']})}")
-        if tasks:
-            display_progress_bar(tasks)
-    else:
-        print(f"{Colors.YELLOW}{t('py_error_task_not_found', {'task_id': task_id})}{Colors.RESET}")
+    try:
+        task_to_remove = apply_remove(tasks, task_id)
+    except ValueError as e:
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
+        return
+    if not save_tasks(tasks):
+        sys.exit(1)
+    print(f"{Colors.GREEN}✓{Colors.RESET}{t('py_removed_success', {'task_name': task_to_remove['task']})}")
+    if tasks:
+        display_progress_bar(tasks.aggregates)
 
 def complete_task(task_id):
-    """Toggle task completion status (1-based index)."""
+    """Toggle task completion status by its number (as shown by list)."""
     tasks = load_tasks()
     
     if not tasks:
         print(f"{Colors.YELLOW}No tasks available{Colors.RESET}")
         return
     
-    # Convert to 0-based index
-    index = task_id - 1
+    task = tasks.get(task_id - 1)
     
-    if 0 <= index < len(tasks):
-        task = tasks[index]
+    #dependency check logic
+    if task is not None and not task.get('completed', False):
+        incomplete_prereqs = pending_prereqs(tasks, task)
+        if incomplete_prereqs:
+            print(f"{Colors.RED}{Colors.BOLD}WARNING: Cannot complete Task {task_id}!{Colors.RESET}")
+            print(f"{Colors.YELLOW}The following prerequisite tasks are still pending:{Colors.RESET}")
+            for prereq in incomplete_prereqs:
+                print(f"  - [{Colors.CYAN}{prereq['id'] + 1}{Colors.RESET}] {prereq['task']}")
+            return 
 
-        #dependency check logic
-        if not task.get('completed', False): # Only check dependencies if user is trying to COMPLETE the task
-            incomplete_prereqs = []
-            
-            # Check each prerequisite stored as a 0-based index
-            for prereq_idx in task.get('depends_on', []):
-                # Ensure the prerequisite index is valid and the task is incomplete
-                if 0 <= prereq_idx < len(tasks) and not tasks[prereq_idx].get('completed', False):
-                    incomplete_prereqs.append({
-                        'id': prereq_idx + 1,
-                        'task': tasks[prereq_idx]['task']
-                    })
-
-            if incomplete_prereqs:
-                print(f"{Colors.RED}{Colors.BOLD}WARNING: Cannot complete Task {task_id}!{Colors.RESET}")
-                print(f"{Colors.YELLOW}The following prerequisite tasks are still pending:{Colors.RESET}")
-                for prereq in incomplete_prereqs:
-                    print(f"  - [{Colors.CYAN}{prereq['id']}{Colors.RESET}] {prereq['task']}")
-                return 
-
-        task['completed'] = not task.get('completed', False)
-        status = "completed" if task['completed'] else "incomplete"
-        icon = "✓" if task['completed'] else "○"
-        print(f"{Colors.GREEN}{icon}{Colors.RESET} Marked task {task_id} as {Colors.BOLD}{status}{Colors.RESET}: \"{task['task']}\"")
-        save_tasks(tasks)
-        display_progress_bar(tasks)
+    try:
+        task = apply_complete(tasks, task_id)
+    except ValueError as e:
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
+        return
+    if not save_tasks(tasks):
+        sys.exit(1)
+    status = "completed" if task['completed'] else "incomplete"
+    icon = "✓" if task['completed'] else "○"
+    print(f"{Colors.GREEN}{icon}{Colors.RESET} Marked task {task_id} as {Colors.BOLD}{status}{Colors.RESET}: \"{task['task']}\"")
+    display_progress_bar(tasks.aggregates)
+
+def load_aggregates():
+    """
+    Task counts for stats: read from storage when they are current, otherwise
+    recomputed from the tasks once and stored again.
+    """
+    storage = get_storage()
+    try:
+        stored = storage.load_aggregates()
+        if stored is not None:
+            return Aggregates.from_dict(stored)
+    except (KeyError, TypeError, ValueError):
+        pass  # unreadable record; rebuild it below
+
+    if _keep_resident:
+        aggregates = load_tasks().aggregates
     else:
-        print(f"{Colors.YELLOW}Error: Task ID {task_id} not found. Use 'list' to see available tasks.{Colors.RESET}")
+        aggregates = Aggregates.from_tasks(stream_tasks())
+    try:
+        storage.save_aggregates(aggregates.to_dict())
+    except OSError:
+        pass  # only a cache; stats still works without it
+    return aggregates
+
+def verify_aggregates():
+    """Recompute the task counts from scratch and compare them with the stored ones."""
+    storage = get_storage()
+    actual = Aggregates.from_tasks(stream_tasks())
+    stored = storage.load_aggregates()
+    if stored is None:
+        print(f"{Colors.YELLOW}No current stored counts; they will be rebuilt from the tasks.{Colors.RESET}")
+        storage.save_aggregates(actual.to_dict())
+        return True
 
-def show_stats():
-    """Display detailed statistics with rich formatting if available."""
-    tasks = load_tasks()
+    try:
+        differences = Aggregates.from_dict(stored).differences(actual)
+    except (KeyError, TypeError, ValueError):
+        differences = ["stored counts are unreadable"]
+    if not differences:
+        print(f"{Colors.GREEN}✓{Colors.RESET} Stored counts match the tasks ({actual.total} tasks checked)")
+        return True
+
+    print(f"{Colors.RED}{Colors.BOLD}Stored counts have drifted from the tasks (stored != actual):{Colors.RESET}")
+    for difference in differences:
+        print(f"  - {difference}")
+    storage.save_aggregates(actual.to_dict())
+    print(f"{Colors.YELLOW}Stored counts have been rebuilt.{Colors.RESET}")
+    return False
+
+def show_stats(verify=False, by=None, include_archive=False):
+    """
+    Display detailed statistics with rich formatting if available.
+    ``include_archive`` counts the archived tasks too.
+    """
+    if verify and not verify_aggregates():
+        sys.exit(1)
+    if by:
+        show_analytics(by, include_archive)
+        return
+
+    # Maintained counts; the task bodies are not loaded when these are current
+    aggregates = load_stats_aggregates(include_archive)
     
-    if not tasks:
+    if not aggregates.total:
         print(f"{Colors.YELLOW}No tasks found. Add some tasks to see statistics!{Colors.RESET}")
         return
     
-    stats = calculate_progress(tasks)
+    stats = calculate_progress(aggregates)
     pending = stats['total'] - stats['completed']
+    archived_str = f" (including {aggregates.total - load_aggregates().total} archived)" if include_archive else ""
     
     # Count by priority
-    priority_counts = Counter(t.get('priority', 'Medium') for t in tasks if not t.get('completed'))
+    priority_counts = aggregates.pending_by_priority
     
     # Count by tags
-    all_tags = []
-    for task in tasks:
-        all_tags.extend(task.get('tags', []))
-    tag_counts = Counter(all_tags)
+    tag_counts = aggregates.tags
     
-    if RICH_AVAILABLE:
-        console = Console()
+    rich_console = optional_import('rich.console')
+    rich_table = optional_import('rich.table')
+    if rich_console and rich_table:
+        Table = rich_table.Table
+        console = rich_console.Console()
         console.print("\n[cyan bold]════════════════════ Task Analytics Dashboard ════════════════════[/cyan bold]\n")
-        console.print(f"[green]Completion:[/green] {stats['completed']}/{stats['total']} tasks completed ({stats['percentage']}%)\n")
+        console.print(f"[green]Completion:[/green] {stats['completed']}/{stats['total']} tasks completed ({stats['percentage']}%){archived_str}\n")
         
         # Priority table
         priority_table = Table(title="Priority Breakdown", show_header=True)
@@ -944,12 +1330,13 @@ def show_stats():
             
             console.print(tag_table)
     else:
+        print("Warning: 'rich' library not found. Install with: pip install rich")
         print(f"\n{Colors.CYAN}{Colors.BOLD}📊 Task Analytics Dashboard{Colors.RESET}")
         print('═' * 60)
         
-        display_progress_bar(tasks)
+        display_progress_bar(aggregates)
         
-        print(f"{Colors.CYAN}Total Tasks:{Colors.RESET}        {stats['total']}")
+        print(f"{Colors.CYAN}Total Tasks:{Colors.RESET}        {stats['total']}{Colors.GRAY}{archived_str}{Colors.RESET}")
         print(f"{Colors.GREEN}✓ Completed:{Colors.RESET}        {stats['completed']} {Colors.GRAY}({stats['percentage']}%){Colors.RESET}")
         print(f"{Colors.YELLOW}○ Pending:{Colors.RESET}          {pending} {Colors.GRAY}({100 - stats['percentage']}%){Colors.RESET}")
         print()
@@ -975,6 +1362,220 @@ def show_stats():
     
     print('═' * 60 + '\n')
 
+def load_stats_aggregates(include_archive=False):
+    """load_aggregates(), plus the counts of the archived tasks with ``include_archive``."""
+    aggregates = load_aggregates()
+    if include_archive:
+        # A copy: these may be the counts a resident task list keeps up to date
+        aggregates = Aggregates.from_dict(aggregates.to_dict())
+        aggregates.merge(get_archive().aggregates())
+    return aggregates
+
+def load_columns(include_archive=False):
+    """Columnar copy of the tasks for the detailed reports (cached next to the data)."""
+    from . import analytics
+
+    storage = get_storage()
+    source = load_tasks if _keep_resident else stream_tasks
+    if not include_archive:
+        return analytics.load_columns(storage.revision(), source, Path(str(storage.path) + '.columns.npz'))
+    archived = get_archive()
+    return analytics.load_columns([storage.revision(), archived.revision()],
+                                  lambda: chain(source(), archived.iter_tasks()),
+                                  Path(str(storage.path) + '.archive-columns.npz'))
+
+def show_analytics(by, include_archive=False):
+    """Detailed reports over the whole task history: by week, tag or priority."""
+    from . import analytics
+
+    if not analytics.available():
+        print(f"{Colors.YELLOW}Detailed reports need NumPy. Install with: pip install numpy{Colors.RESET}")
+        return
+
+    columns = load_columns(include_archive)
+    if not len(columns):
+        print(f"{Colors.YELLOW}No tasks found. Add some tasks to see statistics!{Colors.RESET}")
+        return
+
+    if by == 'week':
+        rows = analytics.weekly_report(columns)
+        print(f"\n{Colors.CYAN}{Colors.BOLD}📅 Completion by Week{Colors.RESET} {Colors.GRAY}(last {len(rows)} active weeks){Colors.RESET}")
+        print('═' * 60)
+        print(f"{Colors.BOLD}{'Week of':<12} {'Created':>9} {'Completed':>10} {'Done':>8}{Colors.RESET}")
+        for start, created, completed, rate in rows:
+            done = f"{rate:.1f}%" if rate is not None else '-'
+            print(f"{start.isoformat():<12} {created:>9} {completed:>10} {done:>8}")
+        print(f"{Colors.GRAY}Done: share of the tasks created that week that are completed now{Colors.RESET}")
+    elif by == 'tag':
+        tags, pairs = analytics.tag_report(columns)
+        print(f"\n{Colors.CYAN}{Colors.BOLD}🏷️  Tags{Colors.RESET}")
+        print('═' * 60)
+        if not tags:
+            print(f"{Colors.YELLOW}No tagged tasks.{Colors.RESET}")
+        else:
+            print(f"{Colors.BOLD}{'Tag':<20} {'Tasks':>9} {'Done':>8}{Colors.RESET}")
+            for tag, count, rate in tags:
+                print(f"{Colors.CYAN}{tag:<20}{Colors.RESET} {count:>9} {rate:>7.1f}%")
+        if pairs:
+            print()
+            print(f"{Colors.BOLD}Often Used Together:{Colors.RESET}")
+            for first, second, count in pairs:
+                print(f"  {Colors.CYAN}{first}{Colors.RESET} + {Colors.CYAN}{second}{Colors.RESET}: {count}")
+    elif by == 'priority':
+        print(f"\n{Colors.CYAN}{Colors.BOLD}⚡ Priorities{Colors.RESET}")
+        print('═' * 60)
+        print(f"{Colors.BOLD}{'Priority':<10} {'Tasks':>9} {'Completed':>10} {'Done':>8} {'Median time to complete':>25}{Colors.RESET}")
+        for priority, total, completed, rate, median in analytics.priority_report(columns):
+            done = f"{rate:.1f}%" if rate is not None else '-'
+            print(f"{priority:<10} {total:>9} {completed:>10} {done:>8} {analytics.format_duration(median):>25}")
+    print('═' * 60 + '\n')
+
+def search_tasks(query, priority=None, completed=None, fmt=None, include_archive=False):
+    """
+    Find tasks by words in their description or tags (see search.py for the
+    syntax). ``fmt`` writes the matches as ndjson, csv or json instead.
+    ``include_archive`` also searches the archived tasks, after the others.
+    """
+    index = get_search_index()
+    revision = get_storage().revision()
+    if index.revision() != revision:
+        index.rebuild(load_tasks() if _keep_resident else stream_tasks(), revision)
+
+    try:
+        matches = index.search(query, priority, completed)
+        archived = search_archive(query, priority, completed) if include_archive else []
+    except (OSError, ValueError) as e:
+        if fmt:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f"{Colors.YELLOW}{e}{Colors.RESET}")
+        return
+    if fmt:
+        from . import export
+
+        # The index keeps only the searchable fields; exports show whole tasks
+        if _keep_resident:
+            tasks = load_tasks()
+            full = (tasks.get(task['id']) for task in matches)
+        else:
+            by_id = {task['id']: task for task in stream_tasks(ids={task['id'] for task in matches})}
+            full = (by_id[task['id']] for task in matches if task['id'] in by_id)
+        # Archived tasks have no number in the list any more
+        full = chain(full, ({**task, 'id': None, 'depends_on': []} for task in archived))
+        with export_output():
+            export.write_tasks(full, fmt)
+        return
+    if not matches and not archived:
+        print(f"{Colors.YELLOW}No tasks match \"{query}\".{Colors.RESET}")
+        return
+
+    if matches:
+        print(f"{Colors.CYAN}{Colors.BOLD}Tasks matching \"{query}\":{Colors.RESET} {Colors.GRAY}({len(matches)} found){Colors.RESET}")
+        for task in matches:
+            display_task(task, '●' if task['completed'] else '○')
+        print()
+    if archived:
+        print(f"{Colors.CYAN}{Colors.BOLD}Archived tasks matching \"{query}\":{Colors.RESET} {Colors.GRAY}({len(archived)} found){Colors.RESET}")
+        for task in archived:
+            print(format_archived_task(task))
+        print()
+
+def search_archive(query, priority=None, completed=None):
+    """
+    Archived tasks matching ``query``, by priority and then most recently
+    completed first. The segments are read in full: the archive is not indexed.
+    """
+    if completed is False:
+        return []
+    matches = query_matcher(query)
+    found = [task for task in get_archive().iter_tasks()
+             if (priority is None or task.get('priority') == priority) and matches(task)]
+    found.sort(key=lambda task: task.get('completed_at') or '', reverse=True)
+    found.sort(key=sort_key)
+    return found
+
+def format_archived_task(task):
+    """A row for an archived task: it has no number any more, so it shows when it was completed."""
+    tags = task.get('tags')
+    tags_str = f" {Colors.CYAN}[{', '.join(tags)}]{Colors.RESET}" if tags else ""
+    completed = (task.get('completed_at') or task.get('created_at') or '')[:10]
+    return (f"  {Colors.GRAY}●{Colors.RESET} {task['task']} {Colors.GRAY}({task.get('priority', 'Medium')}){Colors.RESET}"
+            f"{tags_str} {Colors.GRAY}completed {completed}{Colors.RESET}")
+
+def export_tasks(fmt, tags=None, priority=None, limit=None, offset=0):
+    """
+    list --format: the tasks in display order as ndjson, csv or json (see
+    export.py), written as they are read from storage.
+    """
+    from . import export
+
+    if tags or priority:
+        if _keep_resident:
+            source = iter(load_tasks().filter(tags or [], priority))
+        else:
+            source = iter(sorted(stream_tasks(tags or [], priority), key=lambda task: (sort_key(task), task['id'])))
+    elif _keep_resident or not get_storage().can_stream_in_order():
+        source = load_tasks().window()
+    else:
+        source = stream_tasks()
+    try:
+        with export_output():
+            export.write_tasks(islice(source, offset, None if limit is None else offset + limit), fmt)
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+def export_stats(fmt, by=None, include_archive=False):
+    """stats --format: the counts (or a --by report) as ndjson, csv or json."""
+    from . import analytics, export
+
+    if not by:
+        aggregates = load_stats_aggregates(include_archive)
+        stats = calculate_progress(aggregates)
+        priorities = dict.fromkeys(['High', 'Medium', 'Low'], 0)
+        priorities.update(aggregates.pending_by_priority)
+        with export_output():
+            export.write_object({
+                'total': stats['total'],
+                'completed': stats['completed'],
+                'pending': stats['total'] - stats['completed'],
+                'percentage': stats['percentage'],
+                'pending_by_priority': priorities,
+                'tags': dict(aggregates.tags.most_common()),
+            }, fmt)
+        return
+
+    if not analytics.available():
+        print("Error: detailed reports need NumPy. Install with: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+    columns = load_columns(include_archive)
+    if by == 'week':
+        fields = ('week', 'created', 'completed', 'done_percent')
+        rows = ((start.isoformat(), created, completed, rate)
+                for start, created, completed, rate in analytics.weekly_report(columns))
+    elif by == 'tag':
+        # Tag rows, then the pairs of tags most often used together
+        fields = ('kind', 'tag', 'with', 'tasks', 'done_percent')
+        tags, pairs = analytics.tag_report(columns) if len(columns) else ([], [])
+        rows = [('tag', tag, None, count, rate) for tag, count, rate in tags]
+        rows += [('pair', first, second, count, None) for first, second, count in pairs]
+    else:
+        fields = ('priority', 'tasks', 'completed', 'done_percent', 'median_seconds_to_complete')
+        rows = analytics.priority_report(columns)
+    with export_output():
+        export.write_rows(fields, iter(rows), fmt)
+
+@contextlib.contextmanager
+def export_output():
+    """Let a reader stop early (``| head``) without a traceback."""
+    try:
+        yield
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Python flushes stdout again at exit; point it somewhere harmless
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
+
 def manage_settings(dark_mode=None):
     """Manage application settings."""
     settings = load_settings()
@@ -1018,9 +1619,369 @@ def manage_settings(dark_mode=None):
         status = "enabled" if settings['dark_mode'] else "disabled"
         print(f"{Colors.GREEN}✓ Dark mode {status}!{Colors.RESET}")
 
+def migrate_storage(source=None, force=False):
+    """Import tasks from a JSON file into the SQLite database and switch to it."""
+    source = Path(source) if source else TASKS_FILE
+    if not source.exists():
+        print(f"{Colors.YELLOW}Error: {source} does not exist. Nothing to migrate.{Colors.RESET}")
+        return
+
+    try:
+        source_storage = JSONStorage(source)
+        next_id = source_storage.next_id()
+        tasks = normalize_tasks(source_storage.load(), next_id)
+    except json.JSONDecodeError:
+        print(f"{Colors.RED}Error: {source} is not valid JSON. Fix or remove it before migrating.{Colors.RESET}")
+        return
+
+    database = SQLiteStorage(DB_FILE)
+    try:
+        if database.load() and not force:
+            print(f"{Colors.YELLOW}Error: {DB_FILE} already contains tasks. Use --force to replace them.{Colors.RESET}")
+            return
+        # A full save replaces every row inside a single transaction
+        database.save(tasks, aggregates=Aggregates.from_tasks(tasks).to_dict(), next_id=next_id)
+    except Exception as e:
+        print(f"{Colors.RED}Error migrating tasks: {e}{Colors.RESET}")
+        return
+    finally:
+        database.close()
+
+    settings = load_settings()
+    settings['storage'] = 'sqlite'
+    save_settings(settings)
+    print(f"{Colors.GREEN}✓{Colors.RESET} Imported {len(tasks)} tasks from {source} into {DB_FILE}")
+    print(f"{Colors.GRAY}Storage backend set to sqlite (override with TODO_STORAGE=json).{Colors.RESET}")
+
+def archive_tasks(days=None, compression='gzip'):
+    """
+    Move the tasks completed more than ``days`` days ago (default:
+    archive.ARCHIVE_AFTER_DAYS) into a new archive segment (see archive.py),
+    so the task list only holds recent work. Returns False if nothing could
+    be archived because of an error.
+    """
+    from . import archive
+
+    if days is None:
+        days = archive.ARCHIVE_AFTER_DAYS
+    if not archive.compression_available(compression):
+        print(f"{Colors.RED}Error: {compression} archives need the zstandard package. "
+              f"Install with: pip install zstandard{Colors.RESET}")
+        return False
+    tasks = load_tasks()
+    cutoff = archive.archive_cutoff(days)
+    moving = {task['id'] for task in tasks.completed() if archive.completed_before(task, cutoff)}
+    # A task that stays keeps its prerequisites, however old they are
+    graph = tasks.graph
+    kept = [task_id for task_id in moving if not graph.dependents[task_id] <= moving]
+    held = 0
+    while kept:
+        task_id = kept.pop()
+        if task_id in moving:
+            moving.discard(task_id)
+            held += 1
+            kept.extend(graph.prereqs[task_id] & moving)
+    held_str = f" {Colors.GRAY}({held} kept: tasks that stay depend on them){Colors.RESET}" if held else ""
+    if not moving:
+        print(f"{Colors.YELLOW}Nothing to archive: no tasks completed before {cutoff:%Y-%m-%d}.{Colors.RESET}{held_str}")
+        return True
+
+    archived = get_archive()
+    moved = [task for task in tasks if task['id'] in moving]
+    try:
+        entry = archived.append(moved, compression)
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}Error: Cannot write the archive - {e}{Colors.RESET}")
+        return False
+    for task in moved:
+        tasks.remove(task['id'])
+    if not save_tasks(tasks):
+        # The tasks are still in the list, so they must not stay in the archive too
+        archived.remove(entry)
+        return False
+
+    print(f"{Colors.GREEN}✓{Colors.RESET} Archived {len(moved)} tasks completed before {cutoff:%Y-%m-%d} "
+          f"into {archived.path / entry['file']}{held_str}")
+    if tasks:
+        display_progress_bar(tasks.aggregates)
+    return True
+
+def compact_storage():
+    """Fold the change journal into a fresh tasks.json snapshot."""
+    storage = get_storage()
+    if not isinstance(storage, JournalStorage):
+        print(f"{Colors.YELLOW}Nothing to compact: the '{storage.name}' backend does not use a journal.{Colors.RESET}")
+        return
+    try:
+        # Under the lock no save can land between reading the tasks and rewriting them
+        with storage.locked():
+            next_id = storage.next_id()
+            tasks = TaskList(normalize_tasks(storage.load(), next_id), next_id=next_id)
+            storage.compact(tasks)
+            storage.save_aggregates(tasks.aggregates.to_dict())
+    except json.JSONDecodeError:
+        print(f"{Colors.RED}Error: {storage.path} is not valid JSON. Fix or remove it before compacting.{Colors.RESET}")
+        return
+    except OSError as e:
+        print(f"{Colors.RED}Error: Disk I/O error - {e}{Colors.RESET}")
+        return
+    print(f"{Colors.GREEN}✓{Colors.RESET} Compacted {len(tasks)} tasks into {storage.path}")
+
+def _batch_argv(record):
+    """Translate a JSON batch record into the equivalent CLI arguments."""
+    cmd = record.get('cmd')
+    if cmd == 'add':
+        argv = ['add', '-p', record.get('priority', 'Medium')]
+        if record.get('completed'):
+            argv.append('--completed')
+        if record.get('tags'):
+            argv += ['-t'] + [str(tag) for tag in record['tags']]
+        return argv + ['--', str(record.get('description', ''))]
+    if cmd in ('remove', 'complete'):
+        return [cmd, str(record.get('id'))]
+    if cmd == 'depends':
+        return ['depends', str(record.get('action')), str(record.get('task_id')), str(record.get('prerequisite_id'))]
+    return [str(cmd)]
+
+def _parse_batch_line(parser, line):
+    """Parse one batch line: a JSON object or CLI-style arguments (e.g. add "Task" -p High)."""
+    if line.startswith('{'):
+        argv = _batch_argv(json.loads(line))
+    else:
+        argv = shlex.split(line)
+    errors = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(errors):
+            return parser.parse_args(argv)
+    except SystemExit:
+        message = errors.getvalue().strip().splitlines()
+        raise ValueError(message[-1] if message else f"Invalid command: {line}")
+
+def _apply_batch_command(tasks, args):
+    if args.cmd == 'add':
+        apply_add(tasks, ' '.join(args.description), args.priority, args.tags, args.completed)
+    elif args.cmd == 'remove':
+        apply_remove(tasks, args.id)
+    elif args.cmd == 'complete':
+        apply_complete(tasks, args.id)
+    elif args.cmd == 'depends' and args.depends_cmd == 'add':
+        apply_add_dependency(tasks, args.task_id, args.prerequisite_id)
+    elif args.cmd == 'depends' and args.depends_cmd == 'remove':
+        apply_remove_dependency(tasks, args.task_id, args.prerequisite_id)
+    else:
+        raise ValueError(f"'{args.cmd}' is not supported in batch mode (use add, remove, complete or depends add/remove)")
+
+def run_batch(source='-', atomic=False):
+    """
+    Apply many add/remove/complete/depends commands against a single load and
+    commit them with one save. Each line is either a JSON object such as
+    {"cmd": "add", "description": "Buy milk", "priority": "High"} or the same
+    arguments you would pass on the command line. Returns False if any line failed.
+    """
+    parser = build_parser()
+    tasks = load_tasks(compact=True)
+    applied, failed = 0, 0
+
+    try:
+        stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"{Colors.RED}Error: Cannot read {source}: {e}{Colors.RESET}")
+        return False
+
+    with stream:
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                _apply_batch_command(tasks, _parse_batch_line(parser, line))
+                applied += 1
+            except ValueError as e:
+                failed += 1
+                print(f"{Colors.YELLOW}Line {line_number}: {e}{Colors.RESET}")
+                if atomic:
+                    break
+
+    if failed and atomic:
+        print(f"{Colors.RED}Batch aborted: no changes were saved.{Colors.RESET}")
+        return False
+
+    if not save_tasks(tasks):
+        return False
+    failed_str = f" {Colors.YELLOW}({failed} failed){Colors.RESET}" if failed else ""
+    print(f"{Colors.GREEN}✓{Colors.RESET} Applied {applied} commands{failed_str}")
+    if tasks:
+        display_progress_bar(tasks.aggregates)
+    return not failed
+
+def replay_queue(source=None):
+    """
+    Apply the operations waiting in the offline queue with a single save and
+    mark them as synced (see offline_queue.py).
+    """
+    from .offline_queue import apply_queue, mark_synced, read_queue
+
+    path = Path(source) if source else QUEUE_FILE
+    if not path.exists():
+        print(f"{Colors.YELLOW}No offline queue at {path}.{Colors.RESET}")
+        return False
+    try:
+        replay = read_queue(path)
+    except json.JSONDecodeError:
+        print(f"{Colors.RED}Error: {path} is not valid JSON. Fix or remove it before replaying.{Colors.RESET}")
+        return False
+    except OSError as e:
+        print(f"{Colors.RED}Error: Cannot read {path}: {e}{Colors.RESET}")
+        return False
+
+    skipped_str = f" {Colors.YELLOW}({replay.skipped} malformed skipped){Colors.RESET}" if replay.skipped else ""
+    if not replay.used:
+        print(f"{Colors.GREEN}✓{Colors.RESET} Nothing to replay: no unsynced operations in {path}{skipped_str}")
+        return not replay.skipped
+
+    tasks = load_tasks(compact=True)
+    added, updated, removed, unknown, rejected = apply_queue(tasks, replay.tasks, check_new_task)
+    if not save_tasks(tasks):
+        print(f"{Colors.RED}The queue was left as it was; replay it again later.{Colors.RESET}")
+        return False
+    try:
+        mark_synced(path, replay.read)
+    except OSError as e:
+        # Replaying again is harmless: replayed tasks are matched by their sync_id
+        print(f"{Colors.YELLOW}Warning: Could not mark the queue as synced: {e}{Colors.RESET}")
+
+    for message in rejected[:IMPORT_ERRORS_SHOWN]:
+        print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+    if len(rejected) > IMPORT_ERRORS_SHOWN:
+        print(f"{Colors.YELLOW}... and {len(rejected) - IMPORT_ERRORS_SHOWN} more rejected.{Colors.RESET}")
+    rejected_str = f" {Colors.YELLOW}({len(rejected)} rejected){Colors.RESET}" if rejected else ""
+    print(f"{Colors.GREEN}✓{Colors.RESET} Replayed {replay.used} queued operations on {len(replay.tasks)} tasks: "
+          f"{added} added, {updated} updated, {removed} removed{skipped_str}{rejected_str}")
+    if unknown:
+        print(f"{Colors.YELLOW}{unknown} tasks were edited in the queue but are not in the task list; "
+              f"their operations were dropped.{Colors.RESET}")
+    if tasks:
+        display_progress_bar(tasks.aggregates)
+    return not replay.skipped and not rejected
+
+def import_tasks(source, fmt=None, atomic=False):
+    """
+    Add every task in a CSV, JSON, NDJSON or todo.txt file (see importer.py)
+    with a single save. Tasks are checked with the same rules as ``add``, and
+    ones with the same description, priority and tags as a task already in
+    the list (or earlier in the file) are skipped. Returns False if any
+    record was rejected.
+    """
+    from . import importer
+
+    fmt = fmt or importer.detect_format(source)
+    if fmt is None:
+        print(f"{Colors.RED}Error: Cannot tell the format of {source}; "
+              f"pass --format {'|'.join(importer.FORMATS)}.{Colors.RESET}")
+        return False
+    try:
+        binary = sys.stdin.buffer if source == '-' else open(source, 'rb')
+    except OSError as e:
+        print(f"{Colors.RED}Error: Cannot read {source}: {e}{Colors.RESET}")
+        return False
+    # Every task read stays alive until the save, so collector passes over
+    # them would find nothing to free
+    with paused_gc():
+        return _import_file(binary, source, fmt, atomic)
+
+def _import_file(binary, source, fmt, atomic):
+    from . import importer
+
+    total = os.fstat(binary.fileno()).st_size if source != '-' else None
+    tasks = load_tasks()
+    seen = {(task['task'], task['priority'], tuple(sorted(task['tags']))) for task in tasks}
+    now = datetime.now().isoformat()
+    imported, duplicates, rejected = 0, 0, []
+    # utf-8-sig: spreadsheets often start CSV files with a byte order mark
+    with io.TextIOWrapper(binary, encoding='utf-8-sig', newline='') as f, \
+            import_progress(total) as progress:
+        try:
+            for where, record in importer.read_records(f, fmt):
+                try:
+                    task = importer.new_task(record, now)
+                    check_new_task(task['task'], task['priority'])
+                except ValueError as e:
+                    rejected.append(f"{where}: {e}")
+                    if atomic:
+                        break
+                    continue
+                task['task'] = task['task'].strip()
+                key = (task['task'], task['priority'], tuple(sorted(task['tags'])))
+                if key in seen:
+                    duplicates += 1
+                else:
+                    seen.add(key)
+                    tasks.add(task)
+                    imported += 1
+                if not (imported + duplicates) % IMPORT_PROGRESS_EVERY:
+                    progress(binary.tell() if total else imported + duplicates)
+        except ValueError as e:
+            print(f"{Colors.RED}Error: {source} is not valid {fmt}: {e}. Nothing was imported.{Colors.RESET}")
+            return False
+
+    for message in rejected[:IMPORT_ERRORS_SHOWN]:
+        print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+    if len(rejected) > IMPORT_ERRORS_SHOWN:
+        print(f"{Colors.YELLOW}... and {len(rejected) - IMPORT_ERRORS_SHOWN} more rejected.{Colors.RESET}")
+    if rejected and atomic:
+        print(f"{Colors.RED}Import aborted: no tasks were saved.{Colors.RESET}")
+        return False
+
+    if imported and not save_tasks(tasks):
+        return False
+    skipped_str = f" {Colors.GRAY}({duplicates} duplicates skipped){Colors.RESET}" if duplicates else ""
+    rejected_str = f" {Colors.YELLOW}({len(rejected)} rejected){Colors.RESET}" if rejected else ""
+    print(f"{Colors.GREEN}✓{Colors.RESET} Imported {imported} tasks{skipped_str}{rejected_str}")
+    if tasks:
+        display_progress_bar(tasks.aggregates)
+    return not rejected
+
+@contextlib.contextmanager
+def paused_gc():
+    """Hold off the cyclic garbage collector while creating many long-lived objects."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+@contextlib.contextmanager
+def import_progress(total):
+    """
+    Yields update(done): a rich progress bar (or a plain counter without rich)
+    while an import runs in a terminal. ``done`` is bytes read out of
+    ``total``, or records read when the size is unknown.
+    """
+    if not sys.stdout.isatty():
+        yield lambda done: None
+        return
+    rich_progress = optional_import('rich.progress')
+    if rich_progress is None:
+        unit = 'MB' if total else 'records'
+        scale = 1e6 if total else 1
+        def update(done):
+            shown = f"{done / scale:.1f}/{total / scale:.1f} MB" if total else f"{done} {unit}"
+            print(f"\r{Colors.GRAY}Importing... {shown}{Colors.RESET}", end='', flush=True)
+        try:
+            yield update
+        finally:
+            print('\r\033[K', end='')
+        return
+    with rich_progress.Progress(transient=True) as bar:
+        job = bar.add_task('Importing', total=total)
+        yield lambda done: bar.update(job, completed=done)
+
 def voice_command():
     """Voice command mode for hands-free interaction."""
-    if not VOICE_AVAILABLE:
+    sr = optional_import('speech_recognition')
+    if sr is None:
         print(f"{Colors.RED}Voice commands require SpeechRecognition library.{Colors.RESET}")
         print(f"{Colors.YELLOW}Install with: pip install SpeechRecognition pyaudio{Colors.RESET}")
         return
@@ -1087,14 +2048,88 @@ def voice_command():
         except Exception as e:
             print(f"{Colors.RED}Error: {e}{Colors.RESET}\n")
 
-def main():
-    """Main entry point."""
-    # Check authentication
-    if not validate_user():
+def start_daemon():
+    """Run the background server until it is stopped."""
+    import asyncio
+
+    from . import daemon
+
+    keep_tasks_resident()
+    tasks = load_tasks()
+    tasks.graph  # build it now rather than on the first request
+    server = daemon.TodoServer(SOCKET_FILE, run_command, store_identity())
+    print(f"{Colors.GREEN}✓{Colors.RESET} Serving {len(tasks)} tasks on {SOCKET_FILE} {Colors.GRAY}(Ctrl+C to stop){Colors.RESET}")
+    try:
+        asyncio.run(server.serve_forever())
+    except RuntimeError as e:
+        print(f"{Colors.RED}Error: {e}{Colors.RESET}")
         sys.exit(1)
-    
+    except KeyboardInterrupt:
+        pass
+    print(f"{Colors.YELLOW}Server stopped.{Colors.RESET}")
+
+def stop_daemon():
+    """Ask a running server to shut down."""
+    from . import daemon
+
+    try:
+        daemon.call(SOCKET_FILE, 'shutdown')
+    except daemon.DaemonUnavailable:
+        print(f"{Colors.YELLOW}No server is running on {SOCKET_FILE}{Colors.RESET}")
+        return
+    except daemon.DaemonError as e:
+        print(f"{Colors.RED}Error: {e}{Colors.RESET}")
+        return
+    print(f"{Colors.GREEN}✓{Colors.RESET} Server on {SOCKET_FILE} is shutting down")
+
+def run_command(argv, lang=None, color=True):
+    """
+    Run one CLI command inside this process and return its exit code (used by
+    the daemon). ``color`` tells whether the client's output is coloured.
+    """
+    set_color(color)
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+        if args.cmd not in DAEMON_COMMANDS:
+            print(f"{Colors.RED}Error: '{args.cmd}' cannot be run through the server{Colors.RESET}")
+            return 2
+        set_language(lang or args.lang)
+        dispatch(args, parser)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else int(e.code is not None)
+    return 0
+
+def forward_to_daemon(argv, lang):
+    """
+    Run the command on a running server. Returns its exit code, or None if no
+    server is listening (or it serves another store) and the command should
+    run here instead.
+    """
+    if os.environ.get('TODO_DAEMON', '').lower() in ('0', 'off', 'no'):
+        return None
+    # Without a socket there is no server, and no need to load the client
+    if not SOCKET_FILE.exists():
+        return None
+    from . import daemon
+
+    try:
+        output, exit_code = daemon.run(SOCKET_FILE, argv, lang, color_enabled(), store_identity())
+    except daemon.DaemonUnavailable:
+        return None
+    except daemon.DaemonError as e:
+        print(f"{Colors.RED}Error: {e}{Colors.RESET}")
+        return 1
+    sys.stdout.write(output)
+    return exit_code
+
+def build_parser():
+    """Build the argument parser for all CLI commands."""
     parser = argparse.ArgumentParser(
         description='CLI Todo App with Progress Tracking, Tags, Voice Commands, and Analytics',
+        epilog='Task numbers are the ids shown by list, not positions in the list. A task keeps its\n'
+               'number until it is removed and numbers are never reused, so they can have gaps\n'
+               '(1, 3, 4, ...) after remove or archive. complete, remove and depends take these numbers.',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
@@ -1121,15 +2156,30 @@ def main():
                            help='Mark task as completed when adding')
     
     # List command
-    subparsers.add_parser('list', help='List all tasks with progress bar')
+    list_parser = subparsers.add_parser('list', help='List all tasks with progress bar')
+    list_parser.add_argument('-t', '--tag', action='append', dest='tags', metavar='TAG',
+                             help='Only tasks with this tag (repeat to require several)')
+    list_parser.add_argument('-p', '--priority', choices=['High', 'Medium', 'Low'],
+                             help='Only tasks with this priority')
+    list_parser.add_argument('--limit', type=int, metavar='N',
+                             help='Show at most N tasks')
+    window_group = list_parser.add_mutually_exclusive_group()
+    window_group.add_argument('--offset', type=int, default=0, metavar='N',
+                              help='Skip the first N tasks')
+    window_group.add_argument('--page', type=int, metavar='N',
+                              help=f'Show page N (of --limit tasks, default {LIST_PAGE_SIZE})')
+    list_parser.add_argument('--pager', action='store_true',
+                             help='Browse the list one screen at a time')
+    list_parser.add_argument('--format', choices=['ndjson', 'csv', 'json'],
+                             help='Write the tasks as ndjson, csv or json for scripts')
     
     # Remove command
     remove_parser = subparsers.add_parser('remove', help='Remove a task')
-    remove_parser.add_argument('id', type=int, help='Task ID (1-based)')
+    remove_parser.add_argument('id', type=int, help='Task number as shown by list (a permanent id, not a position)')
     
     # Complete command
     complete_parser = subparsers.add_parser('complete', help='Toggle task completion')
-    complete_parser.add_argument('id', type=int, help='Task ID (1-based)')
+    complete_parser.add_argument('id', type=int, help='Task number as shown by list (a permanent id, not a position)')
 
     #Depends command
     depends_parser = subparsers.add_parser('depends', help='Manage task dependencies')
@@ -1145,9 +2195,39 @@ def main():
     depends_remove_parser.add_argument('task_id', type=int, help='ID of the task to modify')
     depends_remove_parser.add_argument('prerequisite_id', type=int, help='ID of the prerequisite to remove')
 
+    # Depends Ready / Chain / Order commands
+    depends_subparsers.add_parser('ready', help='List pending tasks with no unfinished prerequisites')
+    depends_chain_parser = depends_subparsers.add_parser('chain', help='List all prerequisites of a task')
+    depends_chain_parser.add_argument('task_id', type=int, help='ID of the task to inspect')
+    depends_subparsers.add_parser('order', help='List all tasks in dependency order')
+
     # Stats command
-    subparsers.add_parser('stats', help='Show task statistics and analytics')
+    stats_parser = subparsers.add_parser('stats', help='Show task statistics and analytics')
+    stats_parser.add_argument('--verify', action='store_true',
+                              help='Recompute the counts from every task and report any drift')
+    stats_parser.add_argument('--by', choices=['week', 'tag', 'priority'],
+                              help='Detailed report over the whole history (needs NumPy)')
+    stats_parser.add_argument('--format', choices=['ndjson', 'csv', 'json'],
+                              help='Write the statistics as ndjson, csv or json for scripts')
+    stats_parser.add_argument('--include-archive', action='store_true',
+                              help='Count the archived tasks too')
     
+    # Search command
+    search_parser = subparsers.add_parser('search', help='Find tasks by words in their description or tags')
+    search_parser.add_argument('query', nargs='+',
+                               help='Words to find; OR between alternatives, word* for prefixes (quote it)')
+    search_parser.add_argument('-p', '--priority', choices=['High', 'Medium', 'Low'],
+                               help='Only tasks with this priority')
+    search_status = search_parser.add_mutually_exclusive_group()
+    search_status.add_argument('--completed', dest='completed', action='store_const', const=True,
+                               help='Only completed tasks')
+    search_status.add_argument('--pending', dest='completed', action='store_const', const=False,
+                               help='Only pending tasks')
+    search_parser.add_argument('--format', choices=['ndjson', 'csv', 'json'],
+                               help='Write the matches as ndjson, csv or json for scripts')
+    search_parser.add_argument('--include-archive', action='store_true',
+                               help='Search the archived tasks too')
+
     # Settings command
     settings_parser = subparsers.add_parser('settings', help='Manage settings')
     settings_parser.add_argument('--dark-mode',
@@ -1156,34 +2236,150 @@ def main():
     
     # Voice command
     subparsers.add_parser('voice', help='Voice command mode')
+
+    # Migrate command
+    migrate_parser = subparsers.add_parser('migrate', help='Import tasks.json into the SQLite backend')
+    migrate_parser.add_argument('--source', type=str, help='JSON file to import (default: TODO_FILE)')
+    migrate_parser.add_argument('--force', action='store_true',
+                                help='Replace tasks already stored in the database')
+
+    # Compact command
+    subparsers.add_parser('compact', help='Fold the change journal into tasks.json (journal backend)')
+
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Keep tasks in memory and answer commands over a local socket')
+    serve_parser.add_argument('--stop', action='store_true', help='Stop the running server')
+
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Apply many commands with a single load and save')
+    batch_parser.add_argument('file', nargs='?', default='-',
+                              help='File with one command per line (default: read stdin)')
+    batch_parser.add_argument('--atomic', action='store_true',
+                              help='Save nothing if any command fails')
+
+    # Import command
+    import_parser = subparsers.add_parser('import', help='Add the tasks in a CSV, JSON or todo.txt file with a single save')
+    import_parser.add_argument('file', help="File to import ('-' reads stdin and needs --format)")
+    import_parser.add_argument('--format', choices=['csv', 'json', 'ndjson', 'todotxt'],
+                               help='Format of the file (default: from its extension)')
+    import_parser.add_argument('--atomic', action='store_true',
+                               help='Save nothing if any task is rejected')
+
+    # Archive command
+    archive_parser = subparsers.add_parser('archive', help='Move old completed tasks out of the list into compressed files')
+    archive_parser.add_argument('--older-than', type=int, metavar='DAYS',
+                                help='Archive tasks completed more than DAYS days ago (default: 90)')
+    archive_parser.add_argument('--compression', choices=['gzip', 'zstd'], default='gzip',
+                                help='Compression of the new segment (zstd needs the zstandard package)')
+
+    # Replay-queue command
+    replay_parser = subparsers.add_parser('replay-queue',
+                                          help='Apply the offline operation queue with a single save')
+    replay_parser.add_argument('file', nargs='?',
+                               help=f'Queue file (default: {QUEUE_FILE.name} in the project folder)')
+
+    return parser
+
+def main():
+    """Main entry point."""
+    # No escape codes in output that goes to a file or another program
+    if not color_wanted():
+        set_color(False)
+
+    # Check authentication
+    if not validate_user():
+        sys.exit(1)
     
+    parser = build_parser()
     args = parser.parse_args()
 
     lang = args.lang or os.getenv('TODO_LANG')
+    # The pager needs this terminal, so it always runs here; exports are
+    # streamed straight to stdout rather than collected by the server
+    if args.cmd in DAEMON_COMMANDS and not getattr(args, 'pager', False) and not getattr(args, 'format', None):
+        exit_code = forward_to_daemon(sys.argv[1:], lang)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
     set_language(lang)
-    
+    dispatch(args, parser)
+
+def dispatch(args, parser):
+    """Run the command selected by the parsed arguments."""
     if args.cmd == 'add':
         description = ' '.join(args.description)
         add_task(description, args.priority, args.tags, args.completed)
     elif args.cmd == 'list':
-        list_tasks()
+        if args.limit is not None and args.limit < 1:
+            parser.error('--limit must be at least 1')
+        if args.offset < 0:
+            parser.error('--offset cannot be negative')
+        if args.page is not None:
+            if args.page < 1:
+                parser.error('--page must be at least 1')
+            args.limit = args.limit or LIST_PAGE_SIZE
+            args.offset = (args.page - 1) * args.limit
+        if args.format:
+            if args.pager:
+                parser.error('--pager cannot be combined with --format')
+            export_tasks(args.format, args.tags, args.priority, args.limit, args.offset)
+        elif args.pager:
+            page_tasks(args.tags, args.priority)
+        else:
+            list_tasks(args.tags, args.priority, args.limit, args.offset)
     elif args.cmd == 'remove':
         remove_task(args.id)
     elif args.cmd == 'complete':
         complete_task(args.id)
-    elif args.cmd == 'depands': 
+    elif args.cmd == 'depends': 
         if args.depends_cmd == 'add':
             add_dependency(args.task_id, args.prerequisite_id)
         elif args.depends_cmd == 'remove':
             remove_dependency(args.task_id, args.prerequisite_id)
+        elif args.depends_cmd == 'ready':
+            show_ready_tasks()
+        elif args.depends_cmd == 'chain':
+            show_dependency_chain(args.task_id)
+        elif args.depends_cmd == 'order':
+            show_dependency_order()
         else:
-            depends_parser.print_help()
+            parser.parse_args(['depends', '--help'])
     elif args.cmd == 'stats':
-        show_stats()
+        if args.format:
+            if args.verify:
+                parser.error('--verify cannot be combined with --format')
+            export_stats(args.format, args.by, args.include_archive)
+        else:
+            show_stats(args.verify, args.by, args.include_archive)
+    elif args.cmd == 'search':
+        search_tasks(' '.join(args.query), args.priority, args.completed, args.format, args.include_archive)
     elif args.cmd == 'settings':
         manage_settings(args.dark_mode)
     elif args.cmd == 'voice':
         voice_command()
+    elif args.cmd == 'migrate':
+        migrate_storage(args.source, args.force)
+    elif args.cmd == 'compact':
+        compact_storage()
+    elif args.cmd == 'serve':
+        if args.stop:
+            stop_daemon()
+        else:
+            start_daemon()
+    elif args.cmd == 'batch':
+        if not run_batch(args.file, args.atomic):
+            sys.exit(1)
+    elif args.cmd == 'import':
+        if not import_tasks(args.file, args.format, args.atomic):
+            sys.exit(1)
+    elif args.cmd == 'archive':
+        if args.older_than is not None and args.older_than < 0:
+            parser.error('--older-than cannot be negative')
+        if not archive_tasks(args.older_than, args.compression):
+            sys.exit(1)
+    elif args.cmd == 'replay-queue':
+        if not replay_queue(args.file):
+            sys.exit(1)
     else:
         parser.print_help()
 